@@ -0,0 +1,219 @@
+# etl/prometheus.py
+"""
+Optional in-process metrics registry in the Prometheus text exposition format.
+
+Counters, gauges and histograms are declared at import time but record
+nothing until configure() enables the registry; while it is off every
+inc() / set() / observe() returns after one flag check, so instrumented
+code stays cheap. serve() exposes /metrics over HTTP, on 127.0.0.1 unless
+configure() is given another host.
+
+Stdlib only, so the dashboard imports this same module. The loader enables
+it when EXCHANGE_METRICS_PORT is set and the backfill CLI serves it; Airflow
+task processes exit with the task, so they never serve. The dashboard
+enables and serves it when DASHBOARD_METRICS_PORT is set.
+"""
+
+import bisect
+import logging
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_enabled = False
+_host = "127.0.0.1"
+_port = None
+_server = None
+_server_lock = threading.Lock()
+_metrics = []
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + [f'{n}="{v}"' for n, v in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _samples(self):
+        with self._lock:
+            return [(f"{self.name}{_labels(self.labelnames, k)}", v) for k, v in sorted(self._values.items())]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{name} {_format_value(value)}" for name, value in self._samples()]
+        return "\n".join(lines)
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        if not _enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._functions = {}
+
+    def set(self, value: float, **labels):
+        if not _enabled:
+            return
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def set_function(self, fn, **labels):
+        """Evaluate fn() at scrape time instead of storing a value."""
+        if not _enabled:
+            return
+        with self._lock:
+            self._functions[self._key(labels)] = fn
+
+    def _samples(self):
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, fn in functions.items():
+            try:
+                value = fn()
+            except Exception as e:
+                logging.debug("Gauge %s callback failed: %s", self.name, e)
+                continue
+            if value is not None:
+                values[key] = float(value)
+        return [(f"{self.name}{_labels(self.labelnames, k)}", v) for k, v in sorted(values.items())]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        if not _enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # per-bucket counts (+Inf last), then sum
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    def time(self, **labels):
+        """Context manager observing the elapsed seconds of its block."""
+        return _Timer(self, labels)
+
+    def _samples(self):
+        samples = []
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        for key, counts in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts[:-1]):
+                cumulative += count
+                le = (("le", _format_value(bound)),)
+                samples.append((f"{self.name}_bucket{_labels(self.labelnames, key, le)}", cumulative))
+            samples.append((f"{self.name}_sum{_labels(self.labelnames, key)}", counts[-1]))
+            samples.append((f"{self.name}_count{_labels(self.labelnames, key)}", cumulative))
+        return samples
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter() if _enabled else None
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+def enabled() -> bool:
+    return _enabled
+
+def configure(port, host: str = None) -> bool:
+    """
+    Enable the registry when port is set (e.g. from an env var); serve() binds host
+    (default 127.0.0.1, local scrapes only). Returns whether it is enabled.
+    """
+    global _enabled, _host, _port
+    if port:
+        _enabled, _port = True, int(port)
+        _host = host or _host
+    return _enabled
+
+def render() -> str:
+    """Every registered metric in the text exposition format."""
+    return "\n".join(m.render() for m in _metrics) + "\n"
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(port: int = None):
+    """
+    Start the /metrics HTTP server in a daemon thread, once per process (no-op while disabled).
+    A port already taken by another process is logged, not raised.
+    """
+    global _server
+    if not _enabled:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((_host, port or _port), _Handler)
+            except OSError as e:
+                logging.warning("Metrics endpoint not started on port %s: %s", port or _port, e)
+                _server = False
+                return None
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+            logging.info("Serving metrics on %s:%d/metrics", *_server.server_address[:2])
+        return _server or None
@@ -1,11 +1,82 @@
+-- Monthly range-partitioned on fetched_at; the loader (etl/partitions.py) creates
+-- exchange_rates_pYYYYMM partitions ahead of the data and detaches expired ones.
 CREATE TABLE IF NOT EXISTS exchange_rates (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     base_currency VARCHAR(10) NOT NULL,
     target_currency VARCHAR(10) NOT NULL,
     rate NUMERIC(18,8) NOT NULL,
     fetched_at TIMESTAMP WITH TIME ZONE NOT NULL,
-    source VARCHAR(255)
-);
+    source VARCHAR(255),
+    PRIMARY KEY (id, fetched_at)
+) PARTITION BY RANGE (fetched_at);
 
 CREATE INDEX IF NOT EXISTS idx_exchange_rates_fetched_at ON exchange_rates(fetched_at);
 CREATE INDEX IF NOT EXISTS idx_exchange_rates_target ON exchange_rates(target_currency);
+
+-- Natural key: one row per base/target pair per snapshot; loader upserts on it
+CREATE UNIQUE INDEX IF NOT EXISTS uq_exchange_rates_natural_key
+    ON exchange_rates(base_currency, target_currency, fetched_at);
+
+-- Current rate per base/target pair, upserted by the loader in the same
+-- transaction as each insert so "latest" is an indexed point read
+CREATE TABLE IF NOT EXISTS latest_rates (
+    base_currency VARCHAR(10) NOT NULL,
+    target_currency VARCHAR(10) NOT NULL,
+    rate NUMERIC(18,8) NOT NULL,
+    fetched_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    source VARCHAR(255),
+    PRIMARY KEY (base_currency, target_currency)
+);
+
+-- Daily / weekly OHLC rollups (weeks start Monday UTC), maintained by
+-- reduce_rates_task (or fused_etl_task) via etl/rollups.py for the buckets
+-- each DAG run loads into
+CREATE TABLE IF NOT EXISTS exchange_rates_daily (
+    base_currency VARCHAR(10) NOT NULL,
+    target_currency VARCHAR(10) NOT NULL,
+    period_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    open NUMERIC(18,8) NOT NULL,
+    high NUMERIC(18,8) NOT NULL,
+    low NUMERIC(18,8) NOT NULL,
+    close NUMERIC(18,8) NOT NULL,
+    mean NUMERIC(18,8) NOT NULL,
+    samples INTEGER NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    PRIMARY KEY (base_currency, target_currency, period_start)
+);
+
+CREATE TABLE IF NOT EXISTS exchange_rates_weekly (
+    base_currency VARCHAR(10) NOT NULL,
+    target_currency VARCHAR(10) NOT NULL,
+    period_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    open NUMERIC(18,8) NOT NULL,
+    high NUMERIC(18,8) NOT NULL,
+    low NUMERIC(18,8) NOT NULL,
+    close NUMERIC(18,8) NOT NULL,
+    mean NUMERIC(18,8) NOT NULL,
+    samples INTEGER NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    PRIMARY KEY (base_currency, target_currency, period_start)
+);
+
+CREATE TABLE IF NOT EXISTS pipeline_metrics (
+    id BIGSERIAL PRIMARY KEY,
+    dag_id VARCHAR(250),
+    run_id VARCHAR(250),
+    task_id VARCHAR(250),
+    stage VARCHAR(64) NOT NULL,
+    started_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    wall_seconds DOUBLE PRECISION NOT NULL,
+    cpu_seconds DOUBLE PRECISION NOT NULL,
+    peak_rss_kb BIGINT,
+    bytes_in BIGINT NOT NULL DEFAULT 0,
+    rows_in BIGINT,
+    rows_out BIGINT,
+    rows_dropped BIGINT,
+    db_round_trips INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_pipeline_metrics_stage_started ON pipeline_metrics(stage, started_at);
+
+-- Example partition (normally created by the loader)
+-- CREATE TABLE IF NOT EXISTS exchange_rates_p202501 PARTITION OF exchange_rates
+--     FOR VALUES FROM ('2025-01-01 00:00:00+00') TO ('2025-02-01 00:00:00+00');
@@ -0,0 +1,100 @@
+# benchmarks/bench_analytics.py
+"""
+Dashboard analytics (returns, rolling volatility, moving averages, correlation)
+over synthetic hourly history, vectorized module vs. a per-currency pandas loop.
+
+Usage:
+    python -m benchmarks.bench_analytics --currencies 160 --hours 8760
+
+The default is 160 currencies x 1 year hourly (~1.4M rows). Each stage of
+streamlit_app/analytics.py is timed separately, then the whole compute()
+is compared against the loop version a caller would otherwise write.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit_app"))
+
+import analytics  # noqa: E402
+
+VOL_WINDOW = 24 * 7
+MA_WINDOWS = (24, 24 * 7)
+
+
+def synthetic_history(n_currencies, n_hours, missing=0.01, seed=0):
+    """Long-format history (fetched_at, target_currency, rate) with a fraction of rows missing."""
+    rng = np.random.default_rng(seed)
+    times = pd.date_range("2025-01-01", periods=n_hours, freq="h", tz="UTC") + pd.Timedelta(seconds=7)
+    codes = [f"C{i:03d}" for i in range(n_currencies)]
+    prices = np.exp(np.cumsum(rng.normal(0, 0.001, (n_hours, n_currencies)), axis=0)) * rng.uniform(0.5, 200, n_currencies)
+    history = pd.DataFrame({
+        "fetched_at": np.repeat(times, n_currencies),
+        "target_currency": pd.Categorical(np.tile(codes, n_hours)),
+        "rate": prices.ravel(),
+    })
+    keep = rng.random(len(history)) >= missing
+    return history[keep].reset_index(drop=True)
+
+
+def loop_compute(history):
+    """Per-currency pandas version this benchmark compares against."""
+    returns, summary = {}, []
+    buckets = history["fetched_at"].dt.floor("h")
+    grid = pd.date_range(buckets.min(), buckets.max(), freq="h")
+    for currency, group in history.groupby("target_currency", observed=True):
+        prices = group.set_index("fetched_at")["rate"].resample("h").last().reindex(grid)
+        prices = prices.ffill(limit=analytics.FILL_LIMIT)
+        ret = np.log(prices).diff()
+        vol = ret.rolling(VOL_WINDOW, min_periods=VOL_WINDOW // 2).std() * np.sqrt(24 * 365)
+        mas = {w: prices.rolling(w).mean() for w in MA_WINDOWS}
+        returns[currency] = ret
+        summary.append({"target_currency": currency, "last": prices.iloc[-1],
+                        "volatility_pct": vol.iloc[-1] * 100, **{f"ma_{w}": ma.iloc[-1] for w, ma in mas.items()}})
+    correlation = pd.DataFrame(returns).corr()
+    return pd.DataFrame(summary), correlation
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--currencies", type=int, default=160)
+    parser.add_argument("--hours", type=int, default=24 * 365)
+    parser.add_argument("--skip-loop", action="store_true", help="only time the vectorized module")
+    args = parser.parse_args(argv)
+
+    history = synthetic_history(args.currencies, args.hours)
+    print(f"{len(history):,} rows, {args.currencies} currencies x {args.hours} hours")
+
+    prices, t_pivot = timed(lambda: analytics.pivot_dense(history))
+    returns, t_returns = timed(lambda: analytics.log_returns(prices))
+    _, t_vol = timed(lambda: analytics.rolling_volatility(returns, VOL_WINDOW))
+    _, t_ma = timed(lambda: [analytics.rolling_mean(prices, w) for w in MA_WINDOWS])
+    _, t_corr = timed(lambda: analytics.correlation_matrix(returns))
+    result, t_total = timed(lambda: analytics.compute(history, vol_window=VOL_WINDOW, ma_windows=MA_WINDOWS))
+
+    print(f"{'stage':<22} {'seconds':>9}")
+    for name, seconds in [("pivot to dense", t_pivot), ("log returns", t_returns), ("rolling volatility", t_vol),
+                          (f"moving averages x{len(MA_WINDOWS)}", t_ma), ("correlation matrix", t_corr),
+                          ("compute() total", t_total)]:
+        print(f"{name:<22} {seconds:>9.3f}")
+
+    if not args.skip_loop:
+        (summary, correlation), t_loop = timed(lambda: loop_compute(history))
+        print(f"{'per-currency loop':<22} {t_loop:>9.3f}   ({t_loop / t_total:.1f}x slower)")
+        same = np.allclose(result["correlation"].to_numpy(), correlation.to_numpy(), equal_nan=True)
+        print(f"correlation matches loop version: {same}")
+
+
+if __name__ == "__main__":
+    main()
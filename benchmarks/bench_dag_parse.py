@@ -0,0 +1,88 @@
+# benchmarks/bench_dag_parse.py
+"""
+Scheduler-side cost of parsing the DAG files, one fresh interpreter per parse.
+
+Usage:
+    python -m benchmarks.bench_dag_parse --repeat 5
+    git show <rev>:dags/exchange_rates_DAG.py > /tmp/old_dag.py
+    python -m benchmarks.bench_dag_parse --dag-file /tmp/old_dag.py dags/exchange_rates_DAG.py
+
+Like Airflow's DAG file processor, each child has Airflow imported already
+and then loads one file into a DagBag; only that load is timed. Modules the
+load adds to sys.modules are counted, and heavy ones (pandas, numpy,
+pyarrow, requests, psycopg2, etl) are listed. Airflow itself imports
+SQLAlchemy, so it never shows up in the diff. Needs apache-airflow.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DAGS_FOLDER = os.path.join(PROJECT_ROOT, "dags")
+DAG_FILES = [os.path.join(DAGS_FOLDER, "exchange_rates_DAG.py"),
+             os.path.join(DAGS_FOLDER, "exchange_rates_backfill_DAG.py")]
+HEAVY_MODULES = {"pandas", "numpy", "pyarrow", "requests", "psycopg2", "etl", "ETL"}
+
+CHILD = '''
+import json, sys, time
+sys.path.insert(0, sys.argv[2])  # Airflow puts the dags folder on sys.path
+from airflow.models import DagBag
+before = set(sys.modules)
+start = time.perf_counter()
+bag = DagBag(dag_folder=sys.argv[1], include_examples=False, safe_mode=False)
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "new_modules": sorted(set(sys.modules) - before),
+                  "dag_ids": sorted(bag.dag_ids), "import_errors": {k: str(v) for k, v in bag.import_errors.items()}}))
+'''
+
+
+def parse_in_subprocess(dag_file, dags_folder=DAGS_FOLDER, airflow_home=None):
+    """
+    Load dag_file into a DagBag in a fresh interpreter.
+    Returns dict: seconds, new_modules, heavy_modules, dag_ids, import_errors.
+    """
+    env = dict(os.environ)
+    env.setdefault("AIRFLOW__CORE__LOAD_EXAMPLES", "False")
+    env.setdefault("AIRFLOW__CORE__UNIT_TEST_MODE", "True")
+    with tempfile.TemporaryDirectory() as home:
+        env["AIRFLOW_HOME"] = airflow_home or env.get("AIRFLOW_HOME") or home
+        out = subprocess.run([sys.executable, "-c", CHILD, dag_file, dags_folder], env=env,
+                             capture_output=True, text=True, check=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    result["heavy_modules"] = sorted({m.split(".")[0] for m in result["new_modules"]} & HEAVY_MODULES)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dag-file", nargs="+", default=DAG_FILES)
+    parser.add_argument("--dags-folder", default=DAGS_FOLDER, help="put on sys.path, as Airflow does")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    try:
+        import airflow  # noqa: F401
+    except ImportError:
+        print("apache-airflow is not installed; nothing to parse")
+        return 1
+
+    print(f"{'dag file':<36} {'median s':>9} {'min s':>9} {'new modules':>12}  heavy")
+    for dag_file in args.dag_file:
+        runs = [parse_in_subprocess(dag_file, args.dags_folder) for _ in range(args.repeat)]
+        errors = runs[-1]["import_errors"]
+        seconds = [r["seconds"] for r in runs]
+        heavy = ", ".join(runs[-1]["heavy_modules"]) or "-"
+        print(f"{os.path.basename(dag_file):<36} {statistics.median(seconds):>9.3f} {min(seconds):>9.3f} "
+              f"{len(runs[-1]['new_modules']):>12}  {heavy}")
+        for path, error in errors.items():
+            print(f"  import error in {path}: {error}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
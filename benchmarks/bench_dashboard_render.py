@@ -0,0 +1,132 @@
+# benchmarks/bench_dashboard_render.py
+"""
+Script run time of the Currency Converter page for a growing number of currencies.
+
+Usage:
+    python -m benchmarks.bench_dashboard_render --currencies 10 160 1000
+
+Runs the real page under streamlit.testing (AppTest, Streamlit >= 1.28) with
+synthetic latest rates and no database, comparing the batched card grid
+against the previous per-currency markdown + columns + two buttons loop.
+Reported times are the median of warm reruns. Without AppTest only the
+HTML builder is timed.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+APP_DIR = os.path.join(PROJECT_ROOT, "streamlit_app")
+
+SCRIPT = """
+import sys
+sys.path[:0] = [{app_dir!r}, {root!r}]
+import app
+from benchmarks.bench_dashboard_render import synthetic_latest, legacy_show_currency_cards
+latest = synthetic_latest({n})
+app.load_latest = lambda *args, **kwargs: latest
+# app stays imported between runs: remember the real card grid before swapping it out
+if not hasattr(app, "_bench_batched_cards"):
+    app._bench_batched_cards = app.show_currency_cards
+app.show_currency_cards = legacy_show_currency_cards if {legacy!r} else app._bench_batched_cards
+app.show_currency_converter(None)
+"""
+
+
+def synthetic_latest(n):
+    """Latest-rates frame with n made-up currency codes (AAA, AAB, ...)."""
+    codes = [chr(65 + i // 676 % 26) + chr(65 + i // 26 % 26) + chr(65 + i % 26) for i in range(n)]
+    return pd.DataFrame({
+        "target_currency": codes,
+        "rate": [1.0 + i / 7 for i in range(n)],
+        "fetched_at": pd.Timestamp("2025-01-01", tz="UTC"),
+    })
+
+
+def legacy_show_currency_cards(ordered, latest_rates, amount):
+    """The per-currency card loop this benchmark compares against."""
+    import streamlit as st
+    import app
+
+    for currency in ordered:
+        rate = latest_rates.get(currency, 0)
+        info = app.CURRENCY_INFO.get(currency, {'name': currency, 'flag_emoji': '🏳️', 'symbol': '', 'country': 'Unknown', 'cc': None})
+        st.markdown(f"""
+        <div class='currency-card'>
+            <div class='currency-title'>{info.get('flag_emoji')} {currency} <span class='small muted'>{info['name']}</span></div>
+            <div class='currency-sub'>{info['country']}</div>
+            <div class='big-amount'>{info['symbol']}{amount * rate:,.2f}</div>
+            <div class='muted small'>Rate: {rate:.4f}</div>
+        </div>
+        """, unsafe_allow_html=True)
+        cols = st.columns([0.1, 0.5, 0.4])
+        with cols[0]:
+            current = st.session_state['favorites'].get(currency, False)
+            st.button('⭐' if current else '☆', key=f'btn_fav_{currency}')
+        with cols[1]:
+            st.button('Show history', key=f'btn_hist_{currency}')
+        with cols[2]:
+            st.write('')
+
+
+def time_apptest(AppTest, n, legacy, reruns):
+    at = AppTest.from_string(SCRIPT.format(app_dir=APP_DIR, root=PROJECT_ROOT, n=n, legacy=legacy),
+                             default_timeout=600)
+    start = time.perf_counter()
+    at.run()
+    cold = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    warm = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        warm.append(time.perf_counter() - start)
+    return cold, statistics.median(warm), len(at.button) + len(at.markdown)
+
+
+def time_html_builder(n, repeat):
+    sys.path.insert(0, APP_DIR)
+    import cards
+
+    latest = synthetic_latest(n)
+    rates = dict(zip(latest["target_currency"], latest["rate"]))
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cards.render_cards(list(rates), rates, 100.0, {})
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--currencies", type=int, nargs="+", default=[10, 160, 1000])
+    parser.add_argument("--reruns", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("FAV_DB_PATH", os.path.join(tempfile.mkdtemp(), "favorites.db"))
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        print("streamlit.testing not available; timing the HTML builder only")
+        print(f"{'currencies':>10} {'render_cards s':>15}")
+        for n in args.currencies:
+            print(f"{n:>10} {time_html_builder(n, args.reruns):>15.5f}")
+        return
+
+    print(f"{'currencies':>10} {'mode':>8} {'cold s':>8} {'rerun s':>8} {'elements':>9}")
+    for n in args.currencies:
+        for legacy in (True, False):
+            cold, warm, elements = time_apptest(AppTest, n, legacy, args.reruns)
+            print(f"{n:>10} {'legacy' if legacy else 'batched':>8} {cold:>8.3f} {warm:>8.3f} {elements:>9}")
+
+
+if __name__ == "__main__":
+    main()
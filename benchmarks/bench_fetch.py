@@ -0,0 +1,55 @@
+# benchmarks/bench_fetch.py
+"""
+Wall-clock time of fetching N base currencies, sequentially vs. concurrently.
+
+Usage:
+    python -m benchmarks.bench_fetch --bases 1 8 32 64 --latency 0.05
+
+Runs against benchmarks.stub_server, which adds a fixed per-request latency
+to mimic the round trip to the real API.
+"""
+
+import argparse
+import time
+
+from ETL.fetch_data import fetch_rates, fetch_rates_for_bases, make_session
+from benchmarks.stub_server import StubRatesServer
+
+
+def make_bases(n: int) -> list:
+    return ["USD"] + [f"B{i:02d}" for i in range(n - 1)]
+
+
+def time_sequential(bases, url_template) -> float:
+    start = time.perf_counter()
+    with make_session(1) as session:
+        for base in bases:
+            fetch_rates(base=base, session=session, url=url_template.format(base=base))
+    return time.perf_counter() - start
+
+
+def time_concurrent(bases, url_template, max_workers) -> float:
+    start = time.perf_counter()
+    fetch_rates_for_bases(bases, max_workers=max_workers, url_template=url_template)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bases", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--latency", type=float, default=0.05, help="stub response latency in seconds")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--currencies", type=int, default=160)
+    args = parser.parse_args(argv)
+
+    with StubRatesServer(n_currencies=args.currencies, latency=args.latency) as server:
+        print(f"{'bases':>6} {'sequential s':>13} {'concurrent s':>13} {'speedup':>8}")
+        for n in args.bases:
+            bases = make_bases(n)
+            seq = time_sequential(bases, server.url_template)
+            conc = time_concurrent(bases, server.url_template, args.workers)
+            print(f"{n:>6} {seq:>13.3f} {conc:>13.3f} {seq / conc:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
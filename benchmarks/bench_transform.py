@@ -0,0 +1,86 @@
+# benchmarks/bench_transform.py
+"""
+Micro-benchmark of transform_rates_to_df against the previous per-row dict version.
+
+Usage:
+    python -m benchmarks.bench_transform --rows 150 15000 1500000
+
+Each size is built from payloads of 150 currencies (1, 100 and 10,000 payloads
+for the defaults). The legacy version only accepts one payload, so batches are
+transformed one payload at a time and concatenated, as a caller would have to.
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from ETL.transform import transform_rates_to_df
+from benchmarks.stub_server import synthetic_rates
+
+CURRENCIES_PER_PAYLOAD = 150
+
+
+def legacy_transform_rates_to_df(fetch_payload):
+    """The per-row dict implementation this benchmark compares against."""
+    base = fetch_payload["base"]
+    fetched_at = fetch_payload["fetched_at"]
+    source = fetch_payload.get("source")
+    rates = fetch_payload.get("rates") or {}
+
+    rows = []
+    for currency, rate in rates.items():
+        rows.append({
+            "base_currency": base,
+            "target_currency": currency,
+            "rate": float(rate),
+            "fetched_at": fetched_at,
+            "source": source
+        })
+
+    return pd.DataFrame(rows, columns=["base_currency", "target_currency", "rate", "fetched_at", "source"])
+
+
+def make_payloads(n_rows: int) -> list:
+    n_payloads = max(1, n_rows // CURRENCIES_PER_PAYLOAD)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    rates = synthetic_rates("USD", CURRENCIES_PER_PAYLOAD)
+    return [{
+        "base": "USD",
+        "rates": rates,
+        "fetched_at": start + timedelta(hours=i),
+        "source": "https://api.exchangerate-api.com/v4/latest/USD",
+    } for i in range(n_payloads)]
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[150, 15_000, 1_500_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>10} {'legacy s':>10} {'columnar s':>11} {'speedup':>8} {'legacy MB':>10} {'columnar MB':>12}")
+    for n_rows in args.rows:
+        payloads = make_payloads(n_rows)
+        legacy = lambda: pd.concat([legacy_transform_rates_to_df(p) for p in payloads], ignore_index=True)
+        columnar = lambda: transform_rates_to_df(payloads)
+        t_legacy = best_of(legacy, args.repeat)
+        t_columnar = best_of(columnar, args.repeat)
+        mb_legacy = legacy().memory_usage(deep=True).sum() / 1e6
+        mb_columnar = columnar().memory_usage(deep=True).sum() / 1e6
+        print(f"{n_rows:>10} {t_legacy:>10.4f} {t_columnar:>11.4f} {t_legacy / t_columnar:>7.1f}x "
+              f"{mb_legacy:>10.1f} {mb_columnar:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# benchmarks/stub_server.py
+"""
+Local stand-in for the exchangerate-api "latest" endpoint.
+
+Serves GET /v4/latest/<BASE> with a deterministic synthetic payload so the
+fetcher can be exercised and timed without touching the network.
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def synthetic_rates(base: str, n_currencies: int = 160, seed: int = 0) -> dict:
+    """Deterministic { code: rate } mapping for a base currency."""
+    rng = random.Random(f"{seed}:{base}")
+    codes = [base] + [f"C{i:03d}" for i in range(n_currencies - 1)]
+    return {code: (1.0 if code == base else round(rng.uniform(0.01, 1000.0), 6)) for code in codes}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # default backlog of 5 drops bursts of concurrent connects
+
+    def handle_error(self, request, client_address):
+        pass  # clients that time out and hang up mid-response are expected
+
+
+class StubRatesServer:
+    """
+    Threaded HTTP server on 127.0.0.1 serving synthetic latest-rates payloads.
+
+    latency:  seconds slept before every response
+    failures: { base: n } answers the first n requests for base with HTTP 503
+    etag:     send an ETag and answer matching If-None-Match with 304
+    version:  bump to publish a new snapshot (changes every rate)
+    """
+
+    def __init__(self, n_currencies: int = 160, latency: float = 0.0, failures: dict = None,
+                 etag: bool = True, version: int = 0):
+        self.n_currencies = n_currencies
+        self.latency = latency
+        self.failures = dict(failures or {})
+        self.etag = etag
+        self.version = version
+        self.requests = []
+        self._lock = threading.Lock()
+        self._httpd = _Server(("127.0.0.1", 0), self._make_handler())
+        self._thread = None
+
+    @property
+    def url_template(self) -> str:
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}/v4/latest/{{base}}"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                base = self.path.rstrip("/").rsplit("/", 1)[-1].upper()
+                with server._lock:
+                    server.requests.append(base)
+                    failing = server.failures.get(base, 0) > 0
+                    if failing:
+                        server.failures[base] -= 1
+                if server.latency:
+                    time.sleep(server.latency)
+                if failing:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                body = json.dumps({
+                    "base": base,
+                    "version": server.version,
+                    "rates": synthetic_rates(base, server.n_currencies, seed=server.version),
+                }).encode()
+                etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+                if server.etag and self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                if server.etag:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,261 @@
+# benchmarks/suite.py
+"""
+End-to-end benchmark suite: fetch, transform, load and dashboard queries.
+
+Usage:
+    python -m benchmarks.suite --currencies 160 --hours 168 --out results.json
+    python -m benchmarks.suite --compare baseline.json results.json --threshold 0.1
+
+Synthetic snapshots (--currencies per snapshot, --hours of hourly history)
+drive every stage:
+
+- fetch:     fetch_rates_for_bases() against benchmarks.stub_server
+- transform: transform_rates_to_df() over the whole history of payloads
+- load:      load_df_to_postgres() into a scratch schema
+- queries:   the dashboard's queries.py functions over the loaded history
+
+Load and queries need a Postgres URL (the ETL load path and the queries
+are Postgres-specific) and are skipped without one.
+
+Each benchmark runs --repeat times; results (every run, min and median)
+are written as JSON together with environment metadata. --compare reads
+two such files and flags benchmarks whose median grew by more than
+--threshold, exiting with status 1 if any did.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from importlib import metadata
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit_app"))
+
+import queries  # noqa: E402
+from ETL import loader, rollups  # noqa: E402
+from ETL.fetch_data import fetch_rates_for_bases  # noqa: E402
+from ETL.transform import transform_rates_to_df  # noqa: E402
+from benchmarks.stub_server import StubRatesServer, synthetic_rates  # noqa: E402
+
+SCHEMA = "bench_suite"
+PACKAGES = ("pandas", "numpy", "sqlalchemy", "psycopg2-binary", "pyarrow", "requests", "streamlit")
+
+
+def synthetic_payloads(n_currencies, n_hours, now=None):
+    """One USD payload per hour, newest last, ending at the current hour."""
+    now = (now or datetime.now(timezone.utc)).replace(minute=0, second=0, microsecond=0)
+    return [{
+        "base": "USD",
+        "rates": synthetic_rates("USD", n_currencies, seed=h),
+        "fetched_at": now - timedelta(hours=h),
+        "source": "bench",
+    } for h in range(n_hours - 1, -1, -1)]
+
+
+def measure(fn, repeat, setup=None):
+    """Run fn repeat times (setup before each, untimed); returns the list of seconds."""
+    runs = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return runs
+
+
+def summarize(runs, items=None):
+    result = {"runs": runs, "min": min(runs), "median": statistics.median(runs)}
+    if items:
+        result["items"] = items
+        result["items_per_sec"] = items / result["median"]
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment(engine, args):
+    versions = {}
+    for package in PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    db = {"dialect": engine.dialect.name, "driver": engine.dialect.driver}
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            db["server_version"] = conn.execute(text("SHOW server_version")).scalar()
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions,
+        "database": db,
+        "params": {"currencies": args.currencies, "hours": args.hours, "bases": args.bases,
+                   "latency": args.latency, "repeat": args.repeat},
+    }
+
+
+def scratch_url(db_url):
+    """db_url with search_path pointed at the scratch schema, so ETL and queries use its tables."""
+    url = make_url(db_url)
+    return url.update_query_dict({"options": f"-csearch_path={SCHEMA}"}).render_as_string(hide_password=False)
+
+
+def bench_fetch(args):
+    bases = ["USD"] + [f"B{i:02d}" for i in range(args.bases - 1)]
+    with StubRatesServer(n_currencies=args.currencies, latency=args.latency) as server:
+        runs = measure(lambda: fetch_rates_for_bases(bases, url_template=server.url_template), args.repeat)
+    return {f"fetch/{args.bases}_bases": summarize(runs, items=len(bases))}
+
+
+def bench_transform(args, payloads):
+    rows = sum(len(p["rates"]) for p in payloads)
+    runs = measure(lambda: transform_rates_to_df(payloads), args.repeat)
+    return {"transform": summarize(runs, items=rows)}
+
+
+def bench_postgres(args, df):
+    """Load into the scratch schema, then time the dashboard queries over what was loaded."""
+    url = scratch_url(args.db_url)
+    admin = create_engine(args.db_url)
+    with admin.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    results = {}
+    try:
+        engine = loader.get_engine(url)
+        loader.ensure_table(engine)
+
+        def truncate():
+            with engine.begin() as conn:
+                conn.execute(text("TRUNCATE exchange_rates, latest_rates"))
+
+        runs = measure(lambda: loader.load_df_to_postgres(df, db_url=url), args.repeat, setup=truncate)
+        results["load/postgres_upsert"] = summarize(runs, items=len(df))
+        runs = measure(lambda: rollups.refresh_rollups(engine), args.repeat)
+        results["load/rollups_full"] = summarize(runs, items=len(df))
+
+        currency = df["target_currency"].iloc[-1]
+        start = df["fetched_at"].min()
+        cases = {
+            "latest_rates": lambda: queries.latest_rates(engine),
+            "currency_history": lambda: queries.currency_history(engine, currency, start=start),
+            "currency_history_binned": lambda: queries.currency_history_binned(
+                engine, currency, timedelta(hours=6), start=start),
+            "rollup_history": lambda: queries.rollup_history(engine, currency, "daily", start=start),
+            "history_all": lambda: queries.history_all(engine, start=start),
+        }
+        for name, query in cases.items():
+            query()  # warm the plan and buffer cache
+            results[f"query/{name}"] = summarize(measure(query, args.repeat))
+    finally:
+        loader.dispose_engines()
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        admin.dispose()
+    return results
+
+
+def run(args):
+    engine = create_engine(args.db_url or "sqlite://")
+    meta = environment(engine, args)
+    engine.dispose()
+
+    payloads = synthetic_payloads(args.currencies, args.hours)
+    results = {}
+    results.update(bench_fetch(args))
+    results.update(bench_transform(args, payloads))
+    if meta["database"]["driver"] == "psycopg2":
+        results.update(bench_postgres(args, transform_rates_to_df(payloads)))
+    else:
+        print("No Postgres URL: load and dashboard query benchmarks skipped")
+    return {"meta": meta, "results": results}
+
+
+def print_results(report):
+    print(f"{'benchmark':<34} {'median s':>10} {'min s':>10} {'items/sec':>12}")
+    for name, r in report["results"].items():
+        rate = f"{r['items_per_sec']:>12,.0f}" if "items_per_sec" in r else f"{'':>12}"
+        print(f"{name:<34} {r['median']:>10.4f} {r['min']:>10.4f} {rate}")
+
+
+def compare(baseline, current, threshold):
+    """Print per-benchmark median changes; returns the names that regressed by more than threshold."""
+    for key in ("python", "machine", "cpu_count", "params"):
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            print(f"warning: {key} differs ({baseline['meta'].get(key)} vs {current['meta'].get(key)})")
+    regressions = []
+    print(f"{'benchmark':<34} {'base s':>10} {'new s':>10} {'change':>9}")
+    for name in sorted(set(baseline["results"]) | set(current["results"])):
+        old, new = baseline["results"].get(name), current["results"].get(name)
+        if old is None or new is None:
+            print(f"{name:<34} {'only in ' + ('new' if old is None else 'base'):>31}")
+            continue
+        change = new["median"] / old["median"] - 1.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{name:<34} {old['median']:>10.4f} {new['median']:>10.4f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", default=os.getenv("EXCHANGE_DB_URL", ""),
+                        help="Postgres URL (a scratch schema is created and dropped); load and queries are skipped if empty")
+    parser.add_argument("--currencies", type=int, default=160, help="currencies per snapshot")
+    parser.add_argument("--hours", type=int, default=24 * 7, help="hourly snapshots of history")
+    parser.add_argument("--bases", type=int, default=8, help="base currencies fetched from the stub")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub response latency in seconds")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="compare two JSON reports")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative median slowdown flagged by --compare")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1 if regressions else 0
+
+    # the ETL logs every load and stage at INFO
+    logging.getLogger().setLevel(logging.WARNING)
+    report = run(args)
+    print_results(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
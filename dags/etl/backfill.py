@@ -0,0 +1,228 @@
+# etl/backfill.py
+"""
+Historical backfill over a date range.
+
+Snapshots come from a date-parametrized endpoint (EXCHANGE_HISTORY_URL_TEMPLATE,
+frankfurter.app by default) or from local JSON/CSV archives. The range is split
+into chunks of days; chunks are fetched, transformed and upsert-loaded (COPY into
+a stage, merge on the natural key) in parallel with bounded concurrency, so a
+backfill can be re-run or overlap existing rows without creating duplicates.
+
+Usage:
+    python -m ETL.backfill --start 2024-01-01 --end 2024-03-31
+    python -m ETL.backfill --start 2024-01-01 --end 2024-03-31 --archive /data/rates/
+"""
+
+import argparse
+import csv
+import glob
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, time, timedelta, timezone
+
+import pandas as pd
+import requests
+
+from . import partitions, prometheus, rollups
+from .fetch_data import _get_with_retry, make_session
+from .loader import ensure_table_once, get_engine, load_df_to_postgres
+from .transform import transform_rates_to_df
+
+HISTORY_URL_TEMPLATE = os.getenv("EXCHANGE_HISTORY_URL_TEMPLATE", "https://api.frankfurter.app/{date}?from={base}")
+CHUNK_DAYS = int(os.getenv("EXCHANGE_BACKFILL_CHUNK_DAYS", "7"))
+# concurrent chunks; each holds one pooled DB connection while loading
+MAX_WORKERS = int(os.getenv("EXCHANGE_BACKFILL_WORKERS", "4"))
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+def split_range(start, end, chunk_days: int = None) -> list:
+    """
+    Split the inclusive date range [start, end] into [(chunk_start, chunk_end), ...] of at most chunk_days.
+    """
+    start, end = _as_date(start), _as_date(end)
+    step = timedelta(days=max(1, chunk_days or CHUNK_DAYS))
+    chunks = []
+    while start <= end:
+        chunk_end = min(end, start + step - timedelta(days=1))
+        chunks.append((start, chunk_end))
+        start = chunk_end + timedelta(days=1)
+    return chunks
+
+# ---------------- sources ----------------
+
+def fetch_history_chunk(chunk_start, chunk_end, base: str = "USD", url_template: str = None,
+                        session=None, timeout=15, retries=3, backoff=0.5) -> list:
+    """
+    Fetch one snapshot per day in [chunk_start, chunk_end] from the date endpoint.
+    Days the source answers with another date (weekends, holidays) are skipped, so
+    each snapshot is loaded by exactly one chunk.
+    Returns [payload, ...] in the fetch_rates() payload shape.
+    """
+    template = url_template or HISTORY_URL_TEMPLATE
+    session = session or requests
+    payloads = []
+    day = _as_date(chunk_start)
+    while day <= _as_date(chunk_end):
+        url = template.format(date=day.isoformat(), base=base)
+        data = _get_with_retry(session, url, timeout, retries, backoff).json()
+        effective = _as_date(data.get("date", day))
+        if effective == day:
+            payloads.append({
+                "base": data.get("base", base),
+                "rates": data.get("rates", {}),
+                "fetched_at": _day_start(day),
+                "source": url,
+            })
+        else:
+            logging.info("No snapshot for %s (source returned %s); skipping", day, effective)
+        day += timedelta(days=1)
+    return payloads
+
+def _payload_time(record: dict):
+    if record.get("fetched_at"):
+        ts = pd.Timestamp(record["fetched_at"])
+        return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+    if record.get("time_last_updated"):
+        return pd.Timestamp(int(record["time_last_updated"]), unit="s", tz="UTC")
+    if record.get("date"):
+        return pd.Timestamp(_day_start(_as_date(record["date"])))
+    raise ValueError("archive record has no fetched_at, date or time_last_updated")
+
+def read_archive(path: str, base: str = "USD") -> pd.DataFrame:
+    """
+    Read snapshots from a JSON/CSV file or a directory of them into the transform_rates_to_df() shape.
+    JSON: one payload or a list of payloads with base, rates and fetched_at / date / time_last_updated.
+    CSV: rows with target_currency, rate, fetched_at (base_currency and source optional).
+    """
+    files = sorted(glob.glob(os.path.join(path, "*"))) if os.path.isdir(path) else [path]
+    frames = []
+    for file in files:
+        ext = os.path.splitext(file)[1].lower()
+        if ext == ".json":
+            with open(file, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            records = records if isinstance(records, list) else [records]
+            payloads = [{
+                "base": r.get("base", base),
+                "rates": r.get("rates", {}),
+                "fetched_at": _payload_time(r).to_pydatetime(),
+                "source": r.get("source") or f"archive:{os.path.basename(file)}",
+            } for r in records]
+            frames.append(transform_rates_to_df(payloads))
+        elif ext == ".csv":
+            with open(file, "r", encoding="utf-8", newline="") as f:
+                df = pd.DataFrame(list(csv.DictReader(f)))
+            if df.empty:
+                continue
+            if "base_currency" not in df:
+                df["base_currency"] = base
+            if "source" not in df:
+                df["source"] = f"archive:{os.path.basename(file)}"
+            df["fetched_at"] = pd.to_datetime(df["fetched_at"], utc=True)
+            df["rate"] = pd.to_numeric(df["rate"], errors="coerce")
+            frames.append(df[["base_currency", "target_currency", "rate", "fetched_at", "source"]])
+        else:
+            logging.info("Skipping non-archive file %s", file)
+    if not frames:
+        return pd.DataFrame(columns=["base_currency", "target_currency", "rate", "fetched_at", "source"])
+    return pd.concat(frames, ignore_index=True)
+
+# ---------------- runner ----------------
+
+def run_backfill(start, end, base: str = "USD", archive: str = None, url_template: str = None,
+                 chunk_days: int = None, max_workers: int = None, db_url: str = None,
+                 refresh_rollups: bool = True) -> dict:
+    """
+    Backfill [start, end] (inclusive dates) from the history endpoint, or from archive when given.
+    Chunks load in parallel (max_workers) through the idempotent upsert path; a failed chunk is
+    logged and reported without stopping the others, and the backfill can simply be re-run.
+    Returns dict: { "chunks": int, "rows": int, "failed": [(chunk_start, chunk_end, error), ...] }.
+    """
+    chunks = split_range(start, end, chunk_days)
+    if not chunks:
+        return {"chunks": 0, "rows": 0, "failed": []}
+    workers = max(1, min(max_workers or MAX_WORKERS, len(chunks)))
+    engine = get_engine(db_url)
+    range_start, range_end = _day_start(chunks[0][0]), _day_start(chunks[-1][1] + timedelta(days=1))
+
+    # create the table and every partition up front instead of racing for the DDL lock per chunk
+    ensure_table_once(engine)
+    with engine.begin() as conn:
+        partitions.ensure_partitions(conn, range_start, range_end - timedelta(seconds=1))
+
+    archived = None
+    if archive:
+        archived = read_archive(archive, base)
+        archived = archived[(archived["fetched_at"] >= range_start) & (archived["fetched_at"] < range_end)]
+        logging.info("Read %d archived rows for %s..%s from %s", len(archived), chunks[0][0], chunks[-1][1], archive)
+
+    session = None if archive else make_session(workers)
+
+    def _load_chunk(chunk):
+        chunk_start, chunk_end = chunk
+        if archived is not None:
+            lo, hi = _day_start(chunk_start), _day_start(chunk_end + timedelta(days=1))
+            df = archived[(archived["fetched_at"] >= lo) & (archived["fetched_at"] < hi)]
+        else:
+            payloads = fetch_history_chunk(chunk_start, chunk_end, base, url_template, session)
+            df = transform_rates_to_df(payloads) if payloads else None
+        if df is None or df.empty:
+            return 0
+        return load_df_to_postgres(df, db_url=db_url, load_mode="upsert", on_conflict="nothing")
+
+    rows, failed = 0, []
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backfill") as pool:
+            futures = {pool.submit(_load_chunk, chunk): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    written = future.result()
+                    rows += written
+                    logging.info("Backfilled %s..%s: %d new rows", chunk[0], chunk[1], written)
+                except Exception as e:
+                    logging.error("Backfill of %s..%s failed: %s", chunk[0], chunk[1], e)
+                    failed.append((chunk[0].isoformat(), chunk[1].isoformat(), str(e)))
+    finally:
+        if session is not None:
+            session.close()
+
+    if refresh_rollups and rows:
+        rollups.refresh_rollups(engine, range_start, range_end - timedelta(seconds=1))
+    logging.info("Backfill %s..%s done: %d chunks, %d new rows, %d failed",
+                 chunks[0][0], chunks[-1][1], len(chunks), rows, len(failed))
+    return {"chunks": len(chunks), "rows": rows, "failed": failed}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--start", required=True, help="first day, YYYY-MM-DD")
+    parser.add_argument("--end", required=True, help="last day (inclusive), YYYY-MM-DD")
+    parser.add_argument("--base", default="USD")
+    parser.add_argument("--archive", help="JSON/CSV file or directory to read instead of the API")
+    parser.add_argument("--url-template", help=f"history endpoint (default {HISTORY_URL_TEMPLATE})")
+    parser.add_argument("--chunk-days", type=int, default=CHUNK_DAYS)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--db-url", help="defaults to EXCHANGE_DB_URL")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    # no-op unless EXCHANGE_METRICS_PORT is set
+    prometheus.serve()
+    result = run_backfill(args.start, args.end, base=args.base, archive=args.archive,
+                          url_template=args.url_template, chunk_days=args.chunk_days,
+                          max_workers=args.workers, db_url=args.db_url)
+    print(json.dumps(result, indent=2))
+    return 1 if result["failed"] else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,23 +1,133 @@
 # etl/fetcher.py
-import requests
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import http_cache, metrics
+
 API_URL = "https://api.exchangerate-api.com/v4/latest/USD"
+API_URL_TEMPLATE = os.getenv("EXCHANGE_API_URL_TEMPLATE", "https://api.exchangerate-api.com/v4/latest/{base}")
+
+# Responses worth retrying; anything else non-2xx fails immediately
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_BACKOFF = 30.0
+
+def make_session(pool_size=8):
+    """
+    Build a requests.Session whose connection pool can serve pool_size concurrent requests.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def _get_with_retry(session, url, timeout, retries, backoff, headers=None):
+    """
+    GET url, retrying connection errors, timeouts and RETRY_STATUSES with full-jitter
+    exponential backoff. Raises the last error once retries are exhausted.
+    """
+    for attempt in range(retries + 1):
+        try:
+            resp = session.get(url, timeout=timeout, headers=headers)
+            if resp.status_code not in RETRY_STATUSES or attempt == retries:
+                resp.raise_for_status()
+                return resp
+            logging.warning("GET %s returned %d (attempt %d/%d)", url, resp.status_code, attempt + 1, retries + 1)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == retries:
+                raise
+            logging.warning("GET %s failed: %s (attempt %d/%d)", url, e, attempt + 1, retries + 1)
+        time.sleep(random.uniform(0, min(MAX_BACKOFF, backoff * 2 ** attempt)))
 
-def fetch_rates(timeout=15):
+@metrics.instrumented("fetch")
+def fetch_rates(timeout=15, base=None, session=None, retries=0, backoff=0.5, url=None,
+                use_cache=False, commit_cache=True):
     """
     Fetch the latest exchange rates JSON from the API.
+    Without base this hits API_URL (USD); otherwise API_URL_TEMPLATE for that base.
     Returns dict: { "base": str, "rates": dict, "fetched_at": datetime, "source": str }
     Raises requests.HTTPError on non-2xx responses.
-    """
-    resp = requests.get(API_URL, timeout=timeout)
-    resp.raise_for_status()
-    data = resp.json()
 
+    With use_cache=True the request is conditional on the validators stored in
+    etl.http_cache, and the payload gains "not_modified": True (with empty rates)
+    when the server answers 304 or returns a byte-identical body. With
+    commit_cache=False the new validators are returned as "cache_entry" instead of
+    being saved, so the caller can commit them once the snapshot is safely loaded.
+    """
+    if url is None:
+        url = API_URL_TEMPLATE.format(base=base) if base else API_URL
+    entry = http_cache.load_entry(url) if use_cache else None
+    resp = _get_with_retry(session or requests, url, timeout, retries, backoff,
+                           headers=http_cache.conditional_headers(entry))
     fetched_at = datetime.now(timezone.utc)
-    return {
-        "base": data.get("base", "USD"),
+    metrics.add(bytes_in=len(resp.content))
+
+    if use_cache:
+        unchanged = resp.status_code == 304 or (
+            entry is not None and entry.get("payload_sha256") == http_cache.payload_hash(resp.content)
+        )
+        if unchanged:
+            logging.info("Rates at %s not modified since %s", url, entry.get("stored_at") if entry else "?")
+            return {"base": base or "USD", "rates": {}, "fetched_at": fetched_at, "source": url,
+                    "not_modified": True}
+
+    data = resp.json()
+    payload = {
+        "base": data.get("base", base or "USD"),
         "rates": data.get("rates", {}),
         "fetched_at": fetched_at,
-        "source": API_URL,
+        "source": url,
     }
+    metrics.add(rows_out=len(payload["rates"]))
+    if use_cache:
+        payload["not_modified"] = False
+        new_entry = http_cache.make_entry(url, resp)
+        if commit_cache:
+            http_cache.save_entry(new_entry)
+        else:
+            payload["cache_entry"] = new_entry
+    return payload
+
+def fetch_rates_for_bases(bases, max_workers=8, timeout=15, retries=3, backoff=0.5,
+                          url_template=None, raise_on_error=True, use_cache=False, commit_cache=True):
+    """
+    Fetch latest rates for several base currencies concurrently over one shared session.
+    Returns dict: { base: payload } with the same payload shape as fetch_rates().
+    With raise_on_error=False, bases that still fail after retries are logged and omitted.
+    use_cache / commit_cache are passed through to fetch_rates() for each base.
+    """
+    template = url_template or API_URL_TEMPLATE
+    bases = list(dict.fromkeys(b.upper() for b in bases))
+    if not bases:
+        return {}
+
+    workers = max(1, min(max_workers, len(bases)))
+    session = make_session(workers)
+
+    def _fetch(base):
+        return fetch_rates(timeout=timeout, base=base, session=session, retries=retries,
+                           backoff=backoff, url=template.format(base=base),
+                           use_cache=use_cache, commit_cache=commit_cache)
+
+    results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch_rates") as pool:
+            futures = {base: pool.submit(_fetch, base) for base in bases}
+            for base, future in futures.items():
+                try:
+                    results[base] = future.result()
+                except requests.RequestException as e:
+                    if raise_on_error:
+                        raise
+                    logging.error("Giving up on base %s: %s", base, e)
+    finally:
+        session.close()
+    logging.info("Fetched rates for %d/%d bases", len(results), len(bases))
+    return results
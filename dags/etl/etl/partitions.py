@@ -0,0 +1,114 @@
+# etl/partitions.py
+"""
+Monthly range partitions of exchange_rates on fetched_at.
+Partitions are named <table>_pYYYYMM and created ahead of the data; retention
+detaches whole old partitions (then drops or archives them) instead of DELETE.
+"""
+
+import logging
+import os
+import re
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+PARTITIONS_AHEAD = int(os.getenv("EXCHANGE_PARTITIONS_AHEAD", "2"))
+RETENTION_MONTHS = int(os.getenv("EXCHANGE_RETENTION_MONTHS", "0"))  # 0 keeps every partition
+ARCHIVE_SCHEMA = os.getenv("EXCHANGE_ARCHIVE_SCHEMA", "")  # empty drops detached partitions
+
+# Serializes partition DDL between concurrent loads
+PARTITION_LOCK_KEY = 7_301_001
+
+def _month_start(ts) -> datetime:
+    ts = ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+    ts = ts.astimezone(timezone.utc)
+    return datetime(ts.year, ts.month, 1, tzinfo=timezone.utc)
+
+def _add_months(month: datetime, n: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + n
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+def partition_name(table_name: str, month: datetime) -> str:
+    return f"{table_name}_p{month:%Y%m}"
+
+def list_partitions(conn, table_name: str = "exchange_rates") -> dict:
+    """
+    Returns { partition_name: month_start } for the attached monthly partitions of table_name.
+    """
+    rows = conn.execute(text('''
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:table)
+    '''), {"table": table_name}).scalars()
+    pattern = re.compile(rf"^{re.escape(table_name)}_p(\d{{4}})(\d{{2}})$")
+    partitions = {}
+    for name in rows:
+        match = pattern.match(name)
+        if match:
+            partitions[name] = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+    return partitions
+
+def ensure_partitions(conn, start, end=None, table_name: str = "exchange_rates", ahead: int = None) -> list:
+    """
+    Create the monthly partitions covering [start, end] plus `ahead` upcoming months
+    (counted from the later of end and now). Returns the names of partitions created.
+    """
+    ahead = PARTITIONS_AHEAD if ahead is None else ahead
+    first = _month_start(start)
+    last = max(_month_start(end or start), _month_start(datetime.now(timezone.utc)))
+    last = _add_months(last, ahead)
+
+    existing = set(list_partitions(conn, table_name))
+    wanted = []
+    month = first
+    while month <= last:
+        if partition_name(table_name, month) not in existing:
+            wanted.append(month)
+        month = _add_months(month, 1)
+    if not wanted:
+        return []
+
+    conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY})
+    created = []
+    for month in wanted:
+        name = partition_name(table_name, month)
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table_name} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        ))
+        created.append(name)
+    logging.info("Ensured partitions %s", ", ".join(created))
+    return created
+
+def prune_partitions(engine, retain_months: int = None, archive_schema: str = None,
+                     table_name: str = "exchange_rates", now: datetime = None) -> list:
+    """
+    Detach partitions whose month ended more than retain_months ago.
+    Detached partitions are dropped, or moved to archive_schema when one is configured.
+    Returns the names of partitions removed from table_name.
+    """
+    retain_months = RETENTION_MONTHS if retain_months is None else retain_months
+    archive_schema = ARCHIVE_SCHEMA if archive_schema is None else archive_schema
+    if retain_months <= 0:
+        return []
+
+    cutoff = _add_months(_month_start(now or datetime.now(timezone.utc)), -retain_months)
+    removed = []
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY})
+        if archive_schema:
+            conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}"))
+        for name, month in sorted(list_partitions(conn, table_name).items(), key=lambda item: item[1]):
+            if month >= cutoff:
+                continue
+            conn.execute(text(f"ALTER TABLE {table_name} DETACH PARTITION {name}"))
+            if archive_schema:
+                conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {archive_schema}"))
+            else:
+                conn.execute(text(f"DROP TABLE {name}"))
+            removed.append(name)
+    if removed:
+        logging.info("%s %d partitions older than %s: %s", "Archived" if archive_schema else "Dropped",
+                     len(removed), cutoff.date(), ", ".join(removed))
+    return removed
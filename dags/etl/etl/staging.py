@@ -0,0 +1,88 @@
+# etl/staging.py
+"""
+Run-scoped columnar staging for handing DataFrames between DAG tasks.
+Frames are written as Arrow IPC files on local disk; XCom only carries a
+small manifest (path, row count, checksum) instead of every row as JSON.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+STAGING_DIR = os.getenv("EXCHANGE_STAGING_DIR", os.path.join(tempfile.gettempdir(), "exchange_rates_staging"))
+STAGE_FORMAT = "arrow-ipc"
+
+def run_dir(dag_id: str, run_id: str) -> str:
+    """
+    Directory holding the staged files of one DAG run.
+    """
+    safe_run_id = re.sub(r"[^A-Za-z0-9_.-]", "_", run_id)
+    return os.path.join(STAGING_DIR, dag_id, safe_run_id)
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def write_stage(df: pd.DataFrame, dag_id: str, run_id: str, name: str = "rates") -> dict:
+    """
+    Write df as an Arrow IPC file under the run directory.
+    Returns manifest dict: { "path": str, "rows": int, "sha256": str, "format": str }
+    """
+    directory = run_dir(dag_id, run_id)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.arrow")
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp_path = path + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+    manifest = {"path": path, "rows": table.num_rows, "sha256": _sha256(path), "format": STAGE_FORMAT}
+    logging.info("Staged %d rows to %s", manifest["rows"], path)
+    return manifest
+
+def read_stage(manifest: dict) -> pd.DataFrame:
+    """
+    Memory-map a staged Arrow IPC file back into a DataFrame, verifying its checksum.
+    Raises ValueError if the file does not match the manifest.
+    """
+    path = manifest["path"]
+    if manifest.get("format", STAGE_FORMAT) != STAGE_FORMAT:
+        raise ValueError(f"Unsupported stage format: {manifest.get('format')}")
+    checksum = _sha256(path)
+    if checksum != manifest["sha256"]:
+        raise ValueError(f"Checksum mismatch for staged file {path}")
+
+    with pa.memory_map(path, "r") as source:
+        table = ipc.open_file(source).read_all()
+    if table.num_rows != manifest["rows"]:
+        raise ValueError(f"Staged file {path} has {table.num_rows} rows, manifest says {manifest['rows']}")
+    return table.to_pandas()
+
+def cleanup_stage(manifest: dict):
+    """
+    Remove one staged file. Other files staged in the same run directory
+    (e.g. by parallel shards) are left alone; see cleanup_run.
+    """
+    try:
+        os.remove(manifest["path"])
+    except FileNotFoundError:
+        pass
+
+def cleanup_run(dag_id: str, run_id: str):
+    """
+    Remove the run directory and whatever is still staged in it.
+    """
+    shutil.rmtree(run_dir(dag_id, run_id), ignore_errors=True)
@@ -0,0 +1,69 @@
+# etl/http_cache.py
+"""
+Persistent on-disk HTTP validator cache for the rates endpoint.
+Stores ETag, Last-Modified and a payload hash per URL so fetches can send
+conditional requests and detect unchanged snapshots.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime, timezone
+
+HTTP_CACHE_DIR = os.getenv("EXCHANGE_HTTP_CACHE_DIR", os.path.join(tempfile.gettempdir(), "exchange_rates_http_cache"))
+
+def _entry_path(url: str, cache_dir: str = None) -> str:
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir or HTTP_CACHE_DIR, f"{key}.json")
+
+def payload_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+def load_entry(url: str, cache_dir: str = None):
+    """
+    Returns the cached entry dict for url, or None if missing or unreadable.
+    """
+    path = _entry_path(url, cache_dir)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logging.warning("Ignoring unreadable HTTP cache entry %s: %s", path, e)
+        return None
+    return entry if entry.get("url") == url else None
+
+def save_entry(entry: dict, cache_dir: str = None):
+    """
+    Atomically write an entry: { "url", "etag", "last_modified", "payload_sha256", "stored_at" }.
+    """
+    path = _entry_path(entry["url"], cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+    os.replace(tmp_path, path)
+
+def make_entry(url: str, response) -> dict:
+    return {
+        "url": url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "payload_sha256": payload_hash(response.content),
+        "stored_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+def conditional_headers(entry) -> dict:
+    """
+    If-None-Match / If-Modified-Since headers for a cached entry (empty when there is none).
+    """
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
@@ -0,0 +1,159 @@
+# etl/metrics.py
+"""
+Per-stage pipeline metrics.
+
+Wrap a unit of work in stage() (or decorate it with instrumented()) to record
+its wall time, CPU time of the running thread, peak RSS of the process, bytes
+downloaded, rows in/out/dropped and DB round-trips. Code running inside a
+stage adds to it with add(); a nested stage's bytes and round-trips also count
+toward its parent. Finished stages are kept in memory until flush() writes
+them to the pipeline_metrics table, tagged with the DAG run they belong to.
+
+Disable with EXCHANGE_PIPELINE_METRICS=false; stage() and add() then do no
+bookkeeping.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+
+from sqlalchemy import text
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ENABLED = os.getenv("EXCHANGE_PIPELINE_METRICS", "true").lower() in ("1", "true", "yes")
+METRICS_TABLE = "pipeline_metrics"
+COUNTERS = ("bytes_in", "rows_in", "rows_out", "rows_dropped", "db_round_trips")
+# counters a nested stage also adds to its parent; rows are specific to each stage
+INHERITED = ("bytes_in", "db_round_trips")
+
+METRICS_DDL = '''
+CREATE TABLE IF NOT EXISTS pipeline_metrics (
+    id BIGSERIAL PRIMARY KEY,
+    dag_id VARCHAR(250),
+    run_id VARCHAR(250),
+    task_id VARCHAR(250),
+    stage VARCHAR(64) NOT NULL,
+    started_at TIMESTAMPTZ NOT NULL,
+    wall_seconds DOUBLE PRECISION NOT NULL,
+    cpu_seconds DOUBLE PRECISION NOT NULL,
+    peak_rss_kb BIGINT,
+    bytes_in BIGINT NOT NULL DEFAULT 0,
+    rows_in BIGINT,
+    rows_out BIGINT,
+    rows_dropped BIGINT,
+    db_round_trips INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_pipeline_metrics_stage_started ON pipeline_metrics(stage, started_at);
+'''
+
+_local = threading.local()
+_pending = []
+_pending_lock = threading.Lock()
+
+def _peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+def current():
+    """The innermost open stage record of this thread, or None."""
+    stack = getattr(_local, "stack", None)
+    return stack[-1] if stack else None
+
+def add(**counts):
+    """Add counts (bytes_in=..., rows_out=..., db_round_trips=...) to the current stage, if any."""
+    record = current()
+    if record is None:
+        return
+    for name, value in counts.items():
+        record[name] = (record.get(name) or 0) + value
+
+@contextmanager
+def stage(name: str):
+    """
+    Record one stage; yields its record dict so the caller can set counts directly.
+    rows_dropped defaults to rows_in - rows_out when both are set.
+    """
+    if not ENABLED:
+        yield {}
+        return
+    record = {"stage": name, "started_at": datetime.now(timezone.utc), "bytes_in": 0,
+              "rows_in": None, "rows_out": None, "rows_dropped": None, "db_round_trips": 0}
+    stack = _local.__dict__.setdefault("stack", [])
+    stack.append(record)
+    wall, cpu = time.perf_counter(), time.thread_time()
+    try:
+        yield record
+    finally:
+        record["wall_seconds"] = time.perf_counter() - wall
+        record["cpu_seconds"] = time.thread_time() - cpu
+        record["peak_rss_kb"] = _peak_rss_kb()
+        stack.pop()
+        if stack:
+            for counter in INHERITED:
+                stack[-1][counter] += record[counter]
+        if record["rows_dropped"] is None and record["rows_in"] is not None and record["rows_out"] is not None:
+            record["rows_dropped"] = record["rows_in"] - record["rows_out"]
+        with _pending_lock:
+            _pending.append(record)
+        logging.info("Stage %s: %.3fs wall, %.3fs cpu, %s rows out, %d bytes, %d round-trips",
+                     name, record["wall_seconds"], record["cpu_seconds"], record["rows_out"],
+                     record["bytes_in"], record["db_round_trips"])
+
+def instrumented(name: str):
+    """Decorator form of stage()."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def pending() -> list:
+    """Finished stage records not flushed yet (copies)."""
+    with _pending_lock:
+        return [dict(r) for r in _pending]
+
+def ensure_metrics_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text(METRICS_DDL))
+
+def flush(engine, dag_id: str = None, run_id: str = None, task_id: str = None) -> int:
+    """
+    Writes every pending stage record to pipeline_metrics tagged with the run, and clears them.
+    Metrics are best effort: a failed write is logged and the records are dropped.
+    Returns the number of records written.
+    """
+    with _pending_lock:
+        records = _pending[:]
+        _pending.clear()
+    if not records:
+        return 0
+    rows = [{**r, "dag_id": dag_id, "run_id": run_id, "task_id": task_id} for r in records]
+    try:
+        ensure_metrics_table(engine)
+        with engine.begin() as conn:
+            conn.execute(text('''
+                INSERT INTO pipeline_metrics (dag_id, run_id, task_id, stage, started_at, wall_seconds,
+                                              cpu_seconds, peak_rss_kb, bytes_in, rows_in, rows_out,
+                                              rows_dropped, db_round_trips)
+                VALUES (:dag_id, :run_id, :task_id, :stage, :started_at, :wall_seconds,
+                        :cpu_seconds, :peak_rss_kb, :bytes_in, :rows_in, :rows_out,
+                        :rows_dropped, :db_round_trips)
+            '''), rows)
+    except Exception as e:
+        logging.warning("Could not write %d pipeline metrics: %s", len(rows), e)
+        return 0
+    return len(rows)
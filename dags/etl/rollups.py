@@ -0,0 +1,112 @@
+# etl/rollups.py
+"""
+Daily and weekly OHLC rollups of exchange_rates.
+
+exchange_rates_daily / exchange_rates_weekly hold open/high/low/close/mean and
+the sample count per (base, target, period). After a load only the periods
+touched by the loaded [since, until] window are recomputed from raw rows and
+upserted, so maintenance cost follows the new data, not the table size.
+Weekly periods start on Monday (UTC), matching date_bin's origin below.
+Rollups are independent of raw-row retention: pruned months stay summarized.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+# period name -> (table, bucket width)
+ROLLUPS = {
+    "daily": ("exchange_rates_daily", timedelta(days=1)),
+    "weekly": ("exchange_rates_weekly", timedelta(days=7)),
+}
+# a Monday, so weekly buckets run Monday..Sunday
+BUCKET_ORIGIN = datetime(2000, 1, 3, tzinfo=timezone.utc)
+
+ROLLUP_DDL = '''
+CREATE TABLE IF NOT EXISTS {table} (
+    base_currency VARCHAR(10) NOT NULL,
+    target_currency VARCHAR(10) NOT NULL,
+    period_start TIMESTAMPTZ NOT NULL,
+    open NUMERIC(18,8) NOT NULL,
+    high NUMERIC(18,8) NOT NULL,
+    low NUMERIC(18,8) NOT NULL,
+    close NUMERIC(18,8) NOT NULL,
+    mean NUMERIC(18,8) NOT NULL,
+    samples INTEGER NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (base_currency, target_currency, period_start)
+);
+'''
+
+def period_start(ts, width: timedelta) -> datetime:
+    """Start of the rollup bucket containing ts (same arithmetic as date_bin)."""
+    ts = ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+    return BUCKET_ORIGIN + ((ts - BUCKET_ORIGIN) // width) * width
+
+def ensure_rollup_tables(engine) -> list:
+    """
+    Creates the rollup tables if not exist. Returns the periods whose table was just
+    created, so the caller can seed them from history.
+    """
+    created = []
+    with engine.begin() as conn:
+        for period, (table, _) in ROLLUPS.items():
+            exists = conn.execute(text("SELECT to_regclass(:t) IS NOT NULL"), {"t": table}).scalar()
+            if not exists:
+                conn.execute(text(ROLLUP_DDL.format(table=table)))
+                created.append(period)
+    return created
+
+def refresh_rollup(conn, period: str, since=None, until=None) -> int:
+    """
+    Recomputes the period buckets overlapping [since, until] (all of history when since is
+    None) from exchange_rates and upserts them. Returns the number of rollup rows written.
+    """
+    table, width = ROLLUPS[period]
+    window = ""
+    params = {"width": width, "origin": BUCKET_ORIGIN}
+    if since is not None:
+        until = until if until is not None else since
+        # widen to whole buckets so every touched bucket is rebuilt from all of its rows
+        params["start"] = period_start(since, width)
+        params["end"] = period_start(until, width) + width
+        window = "WHERE fetched_at >= :start AND fetched_at < :end"
+    result = conn.execute(text(f'''
+        INSERT INTO {table} (base_currency, target_currency, period_start,
+                             open, high, low, close, mean, samples, updated_at)
+        SELECT base_currency, target_currency,
+               date_bin(:width, fetched_at, :origin) AS period_start,
+               (array_agg(rate ORDER BY fetched_at))[1],
+               max(rate),
+               min(rate),
+               (array_agg(rate ORDER BY fetched_at DESC))[1],
+               avg(rate),
+               count(*),
+               now()
+        FROM exchange_rates
+        {window}
+        GROUP BY 1, 2, 3
+        ON CONFLICT (base_currency, target_currency, period_start) DO UPDATE
+        SET open = EXCLUDED.open, high = EXCLUDED.high, low = EXCLUDED.low, close = EXCLUDED.close,
+            mean = EXCLUDED.mean, samples = EXCLUDED.samples, updated_at = EXCLUDED.updated_at
+    '''), params)
+    return result.rowcount
+
+def refresh_rollups(engine, since=None, until=None, periods=None) -> dict:
+    """
+    Maintains every rollup for the loaded window [since, until] in one transaction.
+    Tables created by this call are seeded from all of history instead.
+    Returns dict: { period: rows written }.
+    """
+    periods = list(periods or ROLLUPS)
+    created = ensure_rollup_tables(engine)
+    written = {}
+    with engine.begin() as conn:
+        for period in periods:
+            if period in created:
+                written[period] = refresh_rollup(conn, period)
+            else:
+                written[period] = refresh_rollup(conn, period, since, until)
+    logging.info("Refreshed rollups for %s..%s: %s", since, until, written)
+    return written
@@ -1,25 +1,43 @@
 # etl/transform_pandas.py
+from itertools import chain
+
+import numpy as np
 import pandas as pd
 
+from . import metrics
+
+COLUMNS = ["base_currency", "target_currency", "rate", "fetched_at", "source"]
+
+def _repeat_categorical(values, lengths):
+    """
+    Categorical with one entry per payload value, repeated lengths[i] times.
+    """
+    per_payload = pd.Categorical(values)
+    return pd.Categorical.from_codes(np.repeat(per_payload.codes, lengths), categories=per_payload.categories)
+
+@metrics.instrumented("transform")
 def transform_rates_to_df(fetch_payload):
     """
-    Convert the fetcher payload to a pandas DataFrame ready for database insert.
+    Convert the fetcher payload (or a list of payloads) to a pandas DataFrame ready for database insert.
     Columns: base_currency, target_currency, rate, fetched_at, source
+    The frame is built column-wise from NumPy arrays: base_currency, target_currency and
+    source are categorical, fetched_at is one tz-aware UTC timestamp broadcast per payload.
     """
-    base = fetch_payload["base"]
-    fetched_at = fetch_payload["fetched_at"]
-    source = fetch_payload.get("source")
-    rates = fetch_payload.get("rates") or {}
+    payloads = [fetch_payload] if isinstance(fetch_payload, dict) else list(fetch_payload)
+    rate_maps = [p.get("rates") or {} for p in payloads]
+    lengths = np.fromiter((len(r) for r in rate_maps), dtype=np.int64, count=len(rate_maps))
+    total = int(lengths.sum())
 
-    rows = []
-    for currency, rate in rates.items():
-        rows.append({
-            "base_currency": base,
-            "target_currency": currency,
-            "rate": float(rate),
-            "fetched_at": fetched_at,
-            "source": source
-        })
+    targets = np.fromiter(chain.from_iterable(rate_maps), dtype=object, count=total)
+    rates = np.fromiter(chain.from_iterable(r.values() for r in rate_maps), dtype=np.float64, count=total)
+    fetched_at = pd.to_datetime([p["fetched_at"] for p in payloads], utc=True).repeat(lengths)
 
-    df = pd.DataFrame(rows, columns=["base_currency", "target_currency", "rate", "fetched_at", "source"])
+    df = pd.DataFrame({
+        "base_currency": _repeat_categorical([p["base"] for p in payloads], lengths),
+        "target_currency": pd.Categorical(targets),
+        "rate": rates,
+        "fetched_at": fetched_at,
+        "source": _repeat_categorical([p.get("source") for p in payloads], lengths),
+    }, columns=COLUMNS)
+    metrics.add(rows_in=total, rows_out=len(df))
     return df
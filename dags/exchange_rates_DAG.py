@@ -1,92 +1,43 @@
 # dags/exchange_rates_DAG.py
 """
-Robust 3-task DAG (fetch -> transform -> load).
-This DAG tries to import user's etl package (common names).
-If imports fail, it uses small fallback implementations so Airflow can run.
+Robust DAG: choose mode -> plan -> [fetch -> transform -> load] per shard (dynamic task mapping) -> reduce,
+or choose mode -> one fused fetch/transform/load task.
+Parsing only imports Airflow: etl (and with it pandas and SQLAlchemy) is imported
+inside the task callables, so the scheduler's parse loop stays cheap.
 """
 
 from airflow import DAG
-from airflow.operators.python import PythonOperator
+from airflow.decorators import task_group
+from airflow.operators.python import BranchPythonOperator, PythonOperator
 from datetime import datetime, timedelta
-import logging, os, sys
-
-# Make project root importable
-PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-if PROJECT_ROOT not in sys.path:
-    sys.path.insert(0, PROJECT_ROOT)
-ETL_PATH = os.path.join(PROJECT_ROOT, "etl")
-if ETL_PATH not in sys.path:
-    sys.path.insert(0, ETL_PATH)
-
-# Try to import common user ETL modules; provide safe fallbacks if missing.
-fetch_rates = None
-transform_rates_to_df = None
-try:
-    # prefer common names used earlier
-    from etl.fetch_data import fetch_rates as _f1
-    fetch_rates = _f1
-except Exception:
-    try:
-        from etl.fetch_data import fetch_rates as _f2
-        fetch_rates = _f2
-    except Exception:
-        fetch_rates = None
-
-try:
-    from etl.transform import transform_rates_to_df as _t1
-    transform_rates_to_df = _t1
-except Exception:
-    try:
-        from etl.transform import transform_rates_to_df as _t2
-        transform_rates_to_df = _t2
-    except Exception:
-        transform_rates_to_df = None
-
-# loader import must exist (we provided loader.py). If import fails, that will raise at parse time.
-from etl.loader import load_df_to_postgres, get_effective_db_url  # loader.py must provide these
-
-# Fallback implementations (only used if user's etl.fetcher/transform missing)
-if fetch_rates is None:
-    import requests
-    from datetime import datetime, timezone
-
-    def fetch_rates():
-        """Fallback fetch: calls exchangerate-api (same endpoint you provided)."""
-        url = "https://api.exchangerate-api.com/v4/latest/USD"
-        resp = requests.get(url, timeout=10)
-        resp.raise_for_status()
-        j = resp.json()
-        # convert to expected structure
-        return {
-            "base": j.get("base", "USD"),
-            "rates": j.get("rates", {}),
-            "fetched_at": datetime.now(timezone.utc),
-            "source": url,
-        }
+from functools import wraps
+import logging, os
 
-if transform_rates_to_df is None:
-    import pandas as pd
-
-    def transform_rates_to_df(payload: dict) -> pd.DataFrame:
-        """
-        Fallback transform: turns payload['rates'] dict into DataFrame with columns:
-        base_currency, target_currency, rate, fetched_at, source
-        """
-        rows = []
-        base = payload.get("base", "USD")
-        fetched_at = payload.get("fetched_at")
-        source = payload.get("source")
-        rates = payload.get("rates", {}) or {}
-        for tgt, rate in rates.items():
-            rows.append({
-                "base_currency": base,
-                "target_currency": tgt,
-                "rate": rate,
-                "fetched_at": fetched_at,
-                "source": source,
-            })
-        df = pd.DataFrame(rows)
-        return df
+# Conditional fetch: skip transform/load when the upstream snapshot has not changed
+USE_HTTP_CACHE = os.getenv("EXCHANGE_HTTP_CACHE", "true").lower() in ("1", "true", "yes")
+# Base currencies to fetch, and how many of them each mapped shard handles
+BASES = [b.strip().upper() for b in os.getenv("EXCHANGE_BASES", "USD").split(",") if b.strip()]
+SHARD_SIZE = int(os.getenv("EXCHANGE_SHARD_SIZE", "1"))
+# "sharded" (mapped fetch/transform/load per shard, per-stage retries) or "fused" (one
+# in-process task, no inter-task scheduling or XCom); the DAG param "mode", then the
+# Airflow Variable exchange_rates_pipeline_mode, override this default
+PIPELINE_MODE = os.getenv("EXCHANGE_PIPELINE_MODE", "sharded")
+PIPELINE_MODES = ("sharded", "fused")
+
+def _metered(fn):
+    """Run a task callable inside a metrics stage named after its task, then store the run's stage records."""
+    @wraps(fn)
+    def wrapper(*args, **context):
+        from etl import metrics
+        from etl.loader import get_engine
+
+        ti = context["ti"]
+        try:
+            with metrics.stage(f"task:{ti.task_id}"):
+                return fn(*args, **context)
+        finally:
+            metrics.flush(get_engine(), context["dag"].dag_id, context["run_id"], ti.task_id)
+    return wrapper
 
 DEFAULT_ARGS = {
     "owner": "airflow",
@@ -102,62 +53,228 @@ with DAG(
     schedule_interval="0 * * * *",
     catchup=False,
     max_active_runs=1,
+    params={"bases": None, "shard_size": None, "mode": None},
     tags=["exchange", "rates"],
 ) as dag:
 
-    def task_fetch(**context):
-        logging.info("Starting fetch_rates()")
-        payload = fetch_rates()
-        # ensure fetched_at is a datetime object (fallback gives datetime)
-        fetched = payload.get("fetched_at")
-        # make XCom-safe: convert to ISO string
-        payload_serializable = {
-            "base": payload.get("base", "USD"),
-            "rates": payload.get("rates", {}),
-            "source": payload.get("source"),
-            "fetched_at": fetched.isoformat() if hasattr(fetched, "isoformat") else str(fetched),
-        }
-        logging.info("Fetched %d rates", len(payload_serializable["rates"]))
-        return payload_serializable
+    def _run_bases(params):
+        bases = params.get("bases") or BASES
+        if isinstance(bases, str):
+            bases = bases.split(",")
+        return list(dict.fromkeys(b.strip().upper() for b in bases if b.strip()))
+
+    def task_choose_mode(**context):
+        """Branch to the sharded chain or the fused task."""
+        from airflow.models import Variable
+
+        mode = context["params"].get("mode") or Variable.get("exchange_rates_pipeline_mode", default_var=PIPELINE_MODE)
+        if mode not in PIPELINE_MODES:
+            raise ValueError(f"Unknown pipeline mode {mode!r}; expected one of {PIPELINE_MODES}")
+        logging.info("Running in %s mode", mode)
+        return "fused_etl_task" if mode == "fused" else "plan_shards_task"
+
+    def task_plan(**context):
+        """One shard per group of bases; each shard becomes a mapped fetch/transform/load chain."""
+        params = context["params"]
+        bases = _run_bases(params)
+        size = max(1, int(params.get("shard_size") or SHARD_SIZE))
+        shards = [{"bases": bases[i:i + size]} for i in range(0, len(bases), size)]
+        logging.info("Planned %d shard(s): %s", len(shards), shards)
+        return shards
+
+    def task_fetch(bases, **context):
+        from etl.fetch_data import fetch_rates
+
+        logging.info("Starting fetch_rates() for %s", bases)
+        payloads = []
+        for base in bases:
+            if USE_HTTP_CACHE:
+                # validators are committed by task_load once the snapshot is stored
+                payload = fetch_rates(base=base, retries=3, use_cache=True, commit_cache=False)
+            else:
+                payload = fetch_rates(base=base, retries=3)
+            if payload.get("not_modified"):
+                logging.info("Upstream rates for %s not modified", base)
+                continue
+            fetched = payload.get("fetched_at")
+            # make XCom-safe: convert to ISO string
+            payloads.append({
+                "base": payload.get("base", base),
+                "rates": payload.get("rates", {}),
+                "source": payload.get("source"),
+                "fetched_at": fetched.isoformat() if hasattr(fetched, "isoformat") else str(fetched),
+                "cache_entry": payload.get("cache_entry"),
+            })
+            logging.info("Fetched %d rates for %s", len(payloads[-1]["rates"]), base)
+        if not payloads:
+            logging.info("No base in this shard changed; downstream tasks will skip")
+            return {"not_modified": True, "bases": bases}
+        return {"not_modified": False, "payloads": payloads}
 
     def task_transform(**context):
-        import pandas as pd
-        from datetime import datetime
+        from airflow.exceptions import AirflowSkipException
+        from etl.staging import write_stage
+        from etl.transform import transform_rates_to_df
 
         ti = context["ti"]
-        payload = ti.xcom_pull(task_ids="fetch_rates_task")
-        if not payload:
+        fetched = ti.xcom_pull(task_ids="shard.fetch_rates_task", map_indexes=ti.map_index)
+        if not fetched:
             raise ValueError("No payload from fetch_rates_task")
+        if fetched.get("not_modified"):
+            raise AirflowSkipException("Upstream rates not modified since last load")
 
-        # convert fetched_at back to datetime for transform
-        payload["fetched_at"] = datetime.fromisoformat(payload["fetched_at"])
+        payloads = []
+        for payload in fetched["payloads"]:
+            # convert fetched_at back to datetime for transform
+            payloads.append({**payload, "fetched_at": datetime.fromisoformat(payload["fetched_at"])})
 
-        df = transform_rates_to_df(payload)
-        # make XCom-safe: convert datetimes to string
-        if "fetched_at" in df.columns:
-            df["fetched_at"] = df["fetched_at"].astype(str)
-        rows = df.to_dict(orient="records")
-        logging.info("Transformed into %d rows", len(rows))
-        return rows
+        df = transform_rates_to_df(payloads)
+        # stage rows as a columnar file; XCom only carries the manifest
+        manifest = write_stage(df, context["dag"].dag_id, context["run_id"], name=f"rates_{ti.map_index}")
+        logging.info("Transformed into %d rows", manifest["rows"])
+        return manifest
 
     def task_load(**context):
-        import pandas as pd
+        from etl.loader import get_effective_db_url, load_df_to_postgres
+        from etl.staging import read_stage, cleanup_stage
+
         ti = context["ti"]
-        rows = ti.xcom_pull(task_ids="transform_rates_task")
-        if not rows:
+        manifest = ti.xcom_pull(task_ids="shard.transform_rates_task", map_indexes=ti.map_index)
+        if not manifest or not manifest.get("rows"):
             logging.info("No rows to load; exiting.")
             return
-        df = pd.DataFrame(rows)
-        # convert fetched_at back to datetime with tz before writing
-        if "fetched_at" in df.columns:
-            df["fetched_at"] = pd.to_datetime(df["fetched_at"], utc=True, errors="coerce")
-            df = df.dropna(subset=["fetched_at"])
-        logging.info("Using DB URL: %s", get_effective_db_url() if callable(get_effective_db_url) else "unknown")
-        load_df_to_postgres(df)
+        df = read_stage(manifest)
+        logging.info("Using DB URL: %s", get_effective_db_url())
+        # summaries are refreshed once for all shards by reduce_rates_task
+        written = load_df_to_postgres(df, refresh_latest=False)
         logging.info("Loaded %d rows into Postgres", len(df))
+        # the loaded fetched_at window, for the reduce task
+        window = {
+            "rows": int(written or 0),
+            "since": df["fetched_at"].min().isoformat(),
+            "until": df["fetched_at"].max().isoformat(),
+        }
+        # only this shard's file: the other shards stage theirs in the same run directory
+        cleanup_stage(manifest)
+
+        # only now remember the validators, so a failed load is re-fetched next run
+        fetched = ti.xcom_pull(task_ids="shard.fetch_rates_task", map_indexes=ti.map_index) or {}
+        cache_entries = [p["cache_entry"] for p in fetched.get("payloads", []) if p.get("cache_entry")]
+        if cache_entries:
+            from etl.http_cache import save_entry
+            for entry in cache_entries:
+                save_entry(entry)
+        return window
+
+    def task_fused(**context):
+        """Fetch, transform and load every base in one process; returns per-stage seconds and row counts."""
+        import time
+        from airflow.exceptions import AirflowSkipException
+        from etl import metrics
+        from etl.fetch_data import fetch_rates
+        from etl.loader import get_engine, load_df_to_postgres
+        from etl.partitions import prune_partitions
+        from etl.rollups import refresh_rollups
+        from etl.transform import transform_rates_to_df
+
+        bases = _run_bases(context["params"])
+        timings = {}
+        started = time.perf_counter()
+        payloads = []
+        for base in bases:
+            if USE_HTTP_CACHE:
+                payload = fetch_rates(base=base, retries=3, use_cache=True, commit_cache=False)
+            else:
+                payload = fetch_rates(base=base, retries=3)
+            if payload.get("not_modified"):
+                logging.info("Upstream rates for %s not modified", base)
+                continue
+            payloads.append(payload)
+        timings["fetch"] = time.perf_counter() - started
+        if not payloads:
+            logging.info("Fetch timings: %s", timings)
+            raise AirflowSkipException("Upstream rates not modified since last load")
+
+        started = time.perf_counter()
+        df = transform_rates_to_df(payloads)
+        timings["transform"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        # latest_rates is refreshed in the load transaction (refresh_latest defaults to True)
+        written = load_df_to_postgres(df)
+        timings["load"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        engine = get_engine()
+        with metrics.stage("reduce"):
+            refresh_rollups(engine, df["fetched_at"].min(), df["fetched_at"].max())
+            prune_partitions(engine)
+        timings["reduce"] = time.perf_counter() - started
+
+        if USE_HTTP_CACHE:
+            from etl.http_cache import save_entry
+            for payload in payloads:
+                if payload.get("cache_entry"):
+                    save_entry(payload["cache_entry"])
+
+        logging.info("Fused run: %d bases, %d rows, %d written; stage seconds %s",
+                     len(payloads), len(df), written or 0,
+                     {k: round(v, 3) for k, v in timings.items()})
+        return {"bases": len(payloads), "rows": len(df), "written": int(written or 0), "timings": timings}
+
+    def task_reduce(**context):
+        from airflow.exceptions import AirflowException, AirflowSkipException
+        from airflow.utils.state import State
+        from etl.loader import get_engine, refresh_latest_rates
+        from etl.partitions import prune_partitions
+        from etl.rollups import refresh_rollups
+        from etl.staging import cleanup_run
+
+        if context["ti"].xcom_pull(task_ids="plan_shards_task") is None:
+            # all_done also fires when the branch skipped the sharded chain
+            raise AirflowSkipException("Fused mode; the fused task already refreshed the summaries")
+
+        # every shard's window (skipped or failed shards push nothing)
+        windows = context["ti"].xcom_pull(task_ids="shard.load_rates_task") or []
+        windows = [w for w in windows if w and w.get("rows")]
+        engine = get_engine()
+        result = {}
+        if windows:
+            # latest_rates and the rollups are refreshed once, over the union of the loaded windows
+            since = min(datetime.fromisoformat(w["since"]) for w in windows)
+            until = max(datetime.fromisoformat(w["until"]) for w in windows)
+            with engine.begin() as conn:
+                result["latest_rates"] = refresh_latest_rates(conn, since, until)
+            result["rollups"] = refresh_rollups(engine, since, until)
+        else:
+            logging.info("Nothing loaded by any shard; summaries unchanged.")
+
+        # retention: detach whole monthly partitions (no-op unless EXCHANGE_RETENTION_MONTHS is set)
+        result["pruned"] = prune_partitions(engine)
+
+        # all_done runs this after failed shards too; it is the DAG's leaf, so fail the run for them
+        failed = [f"{ti.task_id}[{ti.map_index}]"
+                  for ti in context["dag_run"].get_task_instances(state=[State.FAILED, State.UPSTREAM_FAILED])
+                  if ti.task_id.startswith("shard.")]
+        if failed:
+            # keep the staged files so cleared shard tasks can be re-run
+            raise AirflowException(f"Summaries refreshed, but {len(failed)} shard task(s) failed: {', '.join(failed)}")
+        cleanup_run(context["dag"].dag_id, context["run_id"])
+        return result
+
+    @task_group(group_id="shard")
+    def shard_group(bases):
+        fetch = PythonOperator(task_id="fetch_rates_task", python_callable=_metered(task_fetch), op_kwargs={"bases": bases})
+        transform = PythonOperator(task_id="transform_rates_task", python_callable=_metered(task_transform))
+        load = PythonOperator(task_id="load_rates_task", python_callable=_metered(task_load))
+        fetch >> transform >> load
 
-    fetch = PythonOperator(task_id="fetch_rates_task", python_callable=task_fetch)
-    transform = PythonOperator(task_id="transform_rates_task", python_callable=task_transform)
-    load = PythonOperator(task_id="load_rates_task", python_callable=task_load)
+    choose = BranchPythonOperator(task_id="choose_mode_task", python_callable=task_choose_mode)
+    fused = PythonOperator(task_id="fused_etl_task", python_callable=_metered(task_fused))
+    plan = PythonOperator(task_id="plan_shards_task", python_callable=task_plan)
+    # a mapped task group: each shard's transform/load waits only for its own fetch
+    shards = shard_group.expand_kwargs(plan.output)
+    reduce = PythonOperator(task_id="reduce_rates_task", python_callable=_metered(task_reduce), trigger_rule="all_done")
 
-    fetch >> transform >> load
+    choose >> [plan, fused]
+    plan >> shards >> reduce
@@ -0,0 +1,53 @@
+# dags/exchange_rates_backfill_DAG.py
+"""
+Manual backfill DAG: loads historical snapshots for a date range.
+Trigger with config, e.g. {"start": "2024-01-01", "end": "2024-03-31"}; optional
+keys: base, archive (JSON/CSV path on the worker), chunk_days, workers.
+Loads are idempotent upserts, so overlapping or repeated backfills are safe.
+"""
+
+from airflow import DAG
+from airflow.operators.python import PythonOperator
+from datetime import datetime, timedelta
+import logging
+
+DEFAULT_ARGS = {
+    "owner": "airflow",
+    "depends_on_past": False,
+    "retries": 0,
+    "retry_delay": timedelta(minutes=5),
+}
+
+with DAG(
+    dag_id="exchange_rates_backfill",
+    default_args=DEFAULT_ARGS,
+    start_date=datetime(2025, 1, 1),
+    schedule_interval=None,
+    catchup=False,
+    max_active_runs=1,
+    params={"start": None, "end": None, "base": "USD", "archive": None, "chunk_days": None, "workers": None},
+    tags=["exchange", "rates", "backfill"],
+) as dag:
+
+    def task_backfill(**context):
+        from etl.backfill import run_backfill
+
+        # run config overrides these params (dag_run_conf_overrides_params)
+        params = context["params"]
+        if not params.get("start") or not params.get("end"):
+            raise ValueError("Backfill needs 'start' and 'end' dates (YYYY-MM-DD) in the run config")
+
+        result = run_backfill(
+            params["start"], params["end"],
+            base=params.get("base") or "USD",
+            archive=params.get("archive"),
+            chunk_days=params.get("chunk_days"),
+            max_workers=params.get("workers"),
+        )
+        logging.info("Backfill result: %s", result)
+        if result["failed"]:
+            # loaded chunks stay committed; re-running only fills what is missing
+            raise RuntimeError(f"{len(result['failed'])} backfill chunk(s) failed: {result['failed']}")
+        return result
+
+    backfill = PythonOperator(task_id="backfill_rates_task", python_callable=task_backfill)
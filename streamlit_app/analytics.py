@@ -0,0 +1,153 @@
+"""
+Bulk analytics over exchange-rate history.
+
+History (long format: fetched_at, target_currency, rate) is pivoted once
+into a dense time x currency float64 array on a regular grid. Every metric
+is then a whole-array NumPy operation, never a per-currency loop:
+
+- log returns:        diff(log(prices)) along time
+- moving averages:    window sums from one cumulative sum
+- rolling volatility: window sums of returns and squared returns, annualized
+- correlation:        a few matrix products of returns and their validity mask
+
+NaNs (currencies missing from a fetch) are carried through: rolling
+windows count only valid observations, and correlation is computed over
+the observations each pair has in common.
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_FREQ = "h"
+PERIODS_PER_YEAR = {"h": 24 * 365, "D": 365, "W": 52}
+# gaps of up to this many periods are forward-filled before computing returns
+FILL_LIMIT = 3
+
+
+def pivot_dense(history, freq=DEFAULT_FREQ, fill_limit=FILL_LIMIT):
+    """
+    Dense time x currency frame of rates on a regular freq grid (last value per cell).
+    history columns: fetched_at, target_currency, rate.
+    """
+    if history.empty:
+        return pd.DataFrame(dtype=np.float64)
+    fetched_at = pd.DatetimeIndex(history["fetched_at"])
+    t_codes, times = pd.factorize(fetched_at.floor(freq), sort=True)
+    c_codes, currencies = pd.factorize(history["target_currency"], sort=True)
+    currencies = pd.Index(np.asarray(currencies).astype(str), name="target_currency")
+
+    grid = pd.date_range(times[0], times[-1], freq=freq)
+    row = grid.get_indexer(times)[t_codes]
+    values = np.full((len(grid), len(currencies)), np.nan)
+    # assignment order = input order, so the latest fetched_at in a cell wins for sorted input
+    order = np.argsort(fetched_at.asi8, kind="stable")
+    values[row[order], c_codes[order]] = history["rate"].to_numpy(dtype=np.float64)[order]
+
+    prices = pd.DataFrame(values, index=grid, columns=currencies)
+    if fill_limit:
+        prices = prices.ffill(limit=fill_limit)
+    return prices
+
+
+def log_returns(prices):
+    """Log returns per period; the first row is NaN."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        logs = np.log(np.where(prices.to_numpy() > 0, prices.to_numpy(), np.nan))
+    values = np.full(logs.shape, np.nan)
+    values[1:] = logs[1:] - logs[:-1]
+    return pd.DataFrame(values, index=prices.index, columns=prices.columns)
+
+
+def _window_sums(values, window):
+    """Per-window sum and count of non-NaN values, aligned to the window's last row (partial at the start)."""
+    valid = ~np.isnan(values)
+    zero_filled = np.where(valid, values, 0.0)
+    csum = np.zeros((values.shape[0] + 1, values.shape[1]))
+    ccount = np.zeros_like(csum)
+    np.cumsum(zero_filled, axis=0, out=csum[1:])
+    np.cumsum(valid, axis=0, out=ccount[1:])
+    sums, counts = csum[1:].copy(), ccount[1:].copy()
+    sums[window:] -= csum[1:-window]
+    counts[window:] -= ccount[1:-window]
+    return sums, counts
+
+
+def rolling_mean(frame, window, min_periods=None):
+    """Rolling mean over window rows, NaN where fewer than min_periods (default window) values."""
+    values = frame.to_numpy(dtype=np.float64)
+    sums, counts = _window_sums(values, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = sums / counts
+    mean[counts < (min_periods or window)] = np.nan
+    return pd.DataFrame(mean, index=frame.index, columns=frame.columns)
+
+
+def rolling_volatility(returns, window, freq=DEFAULT_FREQ, min_periods=None):
+    """Annualized rolling standard deviation of returns (sample std; min_periods defaults to window // 2)."""
+    values = returns.to_numpy(dtype=np.float64)
+    sums, counts = _window_sums(values, window)
+    sq_sums, _ = _window_sums(values * values, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var = (sq_sums - sums * sums / counts) / (counts - 1)
+    std = np.sqrt(np.clip(var, 0.0, None))
+    std[counts < max(2, min_periods or window // 2)] = np.nan
+    std *= np.sqrt(PERIODS_PER_YEAR.get(freq, 1))
+    return pd.DataFrame(std, index=returns.index, columns=returns.columns)
+
+
+def correlation_matrix(returns, min_periods=2):
+    """Pairwise Pearson correlation of returns over the observations both currencies have."""
+    values = returns.to_numpy(dtype=np.float64)
+    valid = (~np.isnan(values)).astype(np.float64)
+    # centering first keeps the raw-moment formulas below from cancelling catastrophically
+    with np.errstate(invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        values = values - np.nanmean(values, axis=0)
+    x = np.where(valid > 0, values, 0.0)
+    n = valid.T @ valid                       # common observations per pair
+    sx = x.T @ valid                          # sum of x over rows where y is valid
+    sxx = (x * x).T @ valid
+    sxy = x.T @ x
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = sxy - sx * sx.T / n
+        var_x = sxx - sx * sx / n
+        corr = cov / np.sqrt(var_x * var_x.T)
+    corr[n < min_periods] = np.nan
+    np.fill_diagonal(corr, np.where(np.diag(n) >= min_periods, 1.0, np.nan))
+    return pd.DataFrame(np.clip(corr, -1.0, 1.0), index=returns.columns, columns=returns.columns)
+
+
+def compute(history, freq=DEFAULT_FREQ, vol_window=24 * 7, ma_windows=(24, 24 * 7)):
+    """
+    All analytics for a history frame. Returns dict:
+    prices, returns, volatility, moving_averages {window: frame}, correlation, summary.
+    """
+    prices = pivot_dense(history, freq)
+    if prices.empty:
+        empty = pd.DataFrame()
+        return {"prices": empty, "returns": empty, "volatility": empty, "moving_averages": {},
+                "correlation": empty, "summary": empty}
+    returns = log_returns(prices)
+    volatility = rolling_volatility(returns, vol_window, freq)
+    moving_averages = {w: rolling_mean(prices, w) for w in ma_windows}
+
+    first = prices.bfill().iloc[0]
+    last = prices.ffill().iloc[-1]
+    summary = pd.DataFrame({
+        "last": last,
+        "change_pct": (last / first - 1.0) * 100.0,
+        "volatility_pct": volatility.ffill().iloc[-1] * 100.0,
+        "observations": prices.notna().sum(),
+    })
+    for w, ma in moving_averages.items():
+        summary[f"ma_{w}"] = ma.ffill().iloc[-1]
+    return {
+        "prices": prices,
+        "returns": returns,
+        "volatility": volatility,
+        "moving_averages": moving_averages,
+        "correlation": correlation_matrix(returns),
+        "summary": summary.rename_axis("target_currency").reset_index(),
+    }
@@ -2,10 +2,15 @@ import streamlit as st
 import os
 import sqlite3
 import pandas as pd
-from sqlalchemy import create_engine, text
 from datetime import datetime
 import plotly.graph_objects as go
 
+import cards
+import cross_rates
+import data_cache
+import downsample
+import profiler
+
 # ---------------------- Configuration ----------------------
 STREAMLIT_USERNAME = os.getenv("STREAMLIT_USERNAME", "streamlit_user")
 STREAMLIT_PASSWORD = os.getenv("STREAMLIT_PASSWORD", "streamlit123")
@@ -13,6 +18,24 @@ EXCHANGE_DB_URL = os.getenv("EXCHANGE_DB_URL")
 AIRFLOW_DB_URL = os.getenv("AIRFLOW_DB_URL", EXCHANGE_DB_URL)
 FAV_DB_PATH = os.getenv("FAV_DB_PATH", "./favorites.db")
 
+# Points sent to the browser per history chart (about one per pixel of chart width)
+CHART_POINTS = int(os.getenv("DASHBOARD_CHART_POINTS", str(downsample.DEFAULT_WIDTH)))
+CARDS_PER_PAGE = int(os.getenv("DASHBOARD_CARDS_PER_PAGE", "24"))
+CHART_STYLES = {'Line': None, 'Daily candles': 'daily', 'Weekly candles': 'weekly'}
+CANDLE_BUCKETS = {'daily': pd.Timedelta(days=1), 'weekly': pd.Timedelta(days=7)}
+# Line charts spanning more than this read the daily/weekly rollups instead of raw rows
+ROLLUP_MIN_SPAN = pd.Timedelta(days=int(os.getenv("DASHBOARD_ROLLUP_MIN_DAYS", "14")))
+ANALYTICS_WINDOWS = {'30 days': pd.Timedelta(days=30), '90 days': pd.Timedelta(days=90), '1 year': pd.Timedelta(days=365)}
+VOLATILITY_WINDOWS = {'1 day': 24, '1 week': 24 * 7, '30 days': 24 * 30}
+METRICS_WINDOWS = {'7 days': (pd.Timedelta(days=7), 'hour'), '30 days': (pd.Timedelta(days=30), 'day'),
+                   '90 days': (pd.Timedelta(days=90), 'week')}
+METRICS_LABELS = {'Wall time (s)': 'wall_seconds', 'CPU time (s)': 'cpu_seconds', 'Peak RSS (KB)': 'peak_rss_kb',
+                  'Bytes downloaded': 'bytes_in', 'Rows out': 'rows_out', 'Rows dropped': 'rows_dropped',
+                  'DB round-trips': 'db_round_trips'}
+# History windows offered for the inline chart (None = everything)
+HISTORY_WINDOWS = {'7 days': pd.Timedelta(days=7), '30 days': pd.Timedelta(days=30),
+                   '90 days': pd.Timedelta(days=90), '1 year': pd.Timedelta(days=365), 'All': None}
+
 # Minimal currency metadata (ensure USD present)
 CURRENCY_INFO = {
     'USD': {'name': 'United States Dollar', 'flag_emoji': '🇺🇸', 'symbol': '$', 'country': 'United States', 'cc': 'us'},
@@ -22,12 +45,6 @@ CURRENCY_INFO = {
     'INR': {'name': 'Indian Rupee', 'flag_emoji': '🇮🇳', 'symbol': '₹', 'country': 'India', 'cc': 'in'},
 }
 
-# Helper: build flag image URL using FlagCDN SVGs for crisp scaling
-def flag_svg_url(alpha2):
-    if not alpha2:
-        return None
-    return f"https://flagcdn.com/{alpha2.lower()}.svg"
-
 # ---------------------- Favorites persistence (SQLite) ----------------------
 
 def init_fav_db(path=FAV_DB_PATH):
@@ -70,6 +87,7 @@ DARK_CSS = """
 @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;600;800&display=swap');
 html, body, [class*="css"] { font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial; }
 .stApp { background: linear-gradient(180deg, #051426 0%, #061226 100%); color: #e6eef8; }
+.currency-grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(260px, 1fr)); gap: 0 14px; }
 .currency-card { padding: 14px; border-radius: 10px; background-color: #06182a; box-shadow: 0 6px 18px rgba(0,0,0,0.6); margin: 10px 0; }
 .currency-flag { vertical-align: middle; border-radius: 3px; margin-right: 8px; height: 20px; width: 30px; object-fit: cover; }
 .currency-title { font-weight: 700; font-size:15px; color:#e6eef8; }
@@ -77,6 +95,7 @@ html, body, [class*="css"] { font-family: 'Inter', -apple-system, BlinkMacSystem
 .big-amount { font-size:22px; font-weight:700; color:#e6eef8 }
 .muted { color: #98a9c7 }
 .small { font-size:12px }
+.fav-star { font-size:12px }
 .info-box { padding: 12px; border-radius: 8px; background-color: rgba(255,255,255,0.02); border-left: 4px solid rgba(255,255,255,0.03); }
 </style>
 """
@@ -116,75 +135,147 @@ def check_password():
     else:
         return True
 
-# ---------------------- Data helpers ----------------------
-
-def get_exchange_data(engine):
-    try:
-        with engine.connect() as conn:
-            tables_result = conn.execute(text("""
-                SELECT table_name 
-                FROM information_schema.tables 
-                WHERE table_schema = 'public' 
-                AND table_type = 'BASE TABLE'
-                ORDER BY table_name
-            """))
-            tables = [row[0] for row in tables_result]
-            if not tables:
-                return None, None
-            selected_table = tables[0]
-            for table in tables:
-                if any(keyword in table.lower() for keyword in ['exchange', 'rate', 'currency']):
-                    selected_table = table
-                    break
-            df = pd.read_sql(text(f"SELECT * FROM {selected_table}"), conn)
-            return df, selected_table
-    except Exception as e:
-        # Return exception info to caller
-        raise RuntimeError(f"Failed to fetch exchange data: {e}")
+# ---------------------- Data access ----------------------
+
+def load_latest(exchange_engine, version, store=None):
+    """Latest rate per currency, from the in-memory history store when it holds data."""
+    if store is not None:
+        latest_df = store.latest()
+        if not latest_df.empty:
+            return latest_df
+    return data_cache.latest_rates(exchange_engine, version)
+
+
+def load_history(exchange_engine, version, currency, window, store=None, candles=None):
+    """
+    History for one currency reduced for charting: about CHART_POINTS points, or OHLC
+    candles when candles is 'daily'/'weekly'. Served from memory when the window fits
+    the store's retention; longer spans read the daily/weekly rollup tables, and
+    anything else is aggregated in Postgres with date_bin.
+    """
+    now = pd.Timestamp.now(tz='UTC')
+    start = now - window if window is not None else None
+    if store is not None and store.covers(start):
+        hist = store.history(currency, start)
+        return downsample.ohlc(hist, candles) if candles else downsample.downsample(hist, CHART_POINTS)
+    period = candles
+    if not candles:
+        first = start if start is not None else data_cache.history_start(exchange_engine, version, currency)
+        if first is None:
+            return pd.DataFrame(columns=['fetched_at', 'rate'])
+        bucket = downsample.bucket_interval(first, now, CHART_POINTS)
+        if now - first > ROLLUP_MIN_SPAN:
+            period = 'weekly' if bucket >= CANDLE_BUCKETS['weekly'] else 'daily'
+    if period:
+        hist = data_cache.rollup_history(exchange_engine, version, currency, period, window)
+        if hist is not None:
+            return hist
+        # rollups not built yet: aggregate the raw rows instead
+        bucket = CANDLE_BUCKETS[period]
+    return data_cache.currency_history_binned(exchange_engine, version, currency, bucket, window)
+
+
+def history_figure(hist, currency, candles=None):
+    if candles:
+        fig = go.Figure(go.Candlestick(x=hist['fetched_at'], open=hist['open'], high=hist['high'],
+                                       low=hist['low'], close=hist['close'], name=currency))
+        fig.update_layout(xaxis_rangeslider_visible=False)
+    else:
+        fig = go.Figure()
+        if 'high' in hist:
+            # SQL-aggregated buckets: shade the min/max range so spikes stay visible
+            fig.add_trace(go.Scatter(x=hist['fetched_at'], y=hist['high'], mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'))
+            fig.add_trace(go.Scatter(x=hist['fetched_at'], y=hist['low'], mode='lines', line=dict(width=0), fill='tonexty',
+                                     fillcolor='rgba(96,165,250,0.25)', showlegend=False, hoverinfo='skip'))
+        mode = 'lines+markers' if len(hist) <= 200 else 'lines'
+        fig.add_trace(go.Scatter(x=hist['fetched_at'], y=hist['rate'], mode=mode, name=currency))
+    fig.update_layout(template='plotly_dark', height=300, margin=dict(l=20,r=20,t=40,b=20))
+    return fig
 
 # ---------------------- UI Sections ----------------------
 
-def show_currency_converter(exchange_engine):
+def toggle_favorite(currency):
+    """Button callback: flip a favorite in session and the favorites DB (runs before the rerun)."""
+    new_val = not st.session_state['favorites'].get(currency, False)
+    st.session_state['favorites'][currency] = new_val
+    try:
+        set_favorite_db(_fav_conn, currency, fav=new_val)
+    except Exception:
+        pass
+
+
+def open_history(currency):
+    st.session_state['show_history'] = currency
+
+
+def show_currency_cards(ordered, latest_rates, amount):
+    """Current page of cards as one HTML block; favorite/history actions go through a single picker."""
+    page_cards, n_pages = cards.paginate(ordered, st.session_state.get('cards_page', 1), CARDS_PER_PAGE)
+    if st.session_state.get('cards_page', 1) > n_pages:
+        # search narrowed the list; keep the page widget within range
+        st.session_state['cards_page'] = n_pages
+    if n_pages > 1:
+        st.number_input(f'Page (of {n_pages})', min_value=1, max_value=n_pages, step=1, key='cards_page')
+    st.markdown(cards.render_cards(page_cards, latest_rates, amount, CURRENCY_INFO, st.session_state['favorites']),
+                unsafe_allow_html=True)
+
+    act_cols = st.columns([0.5, 0.25, 0.25])
+    with act_cols[0]:
+        selected = st.selectbox('Currency', ordered, key='card_action_currency', label_visibility='collapsed')
+    with act_cols[1]:
+        is_fav = st.session_state['favorites'].get(selected, False)
+        st.button('☆ Unfavorite' if is_fav else '⭐ Favorite', on_click=toggle_favorite, args=(selected,),
+                  use_container_width=True)
+    with act_cols[2]:
+        st.button('📈 Show history', on_click=open_history, args=(selected,),
+                  use_container_width=True)
+
+
+def show_pair_converter(latest_df):
+    """Any-pair conversion from the already loaded USD snapshot (no extra queries)."""
+    cross = cross_rates.from_latest(latest_df)
+    codes = sorted(cross.currencies)
+    with st.expander('🔁 Convert between any two currencies', expanded=False):
+        c1, c2, c3 = st.columns([1, 1, 1])
+        with c1:
+            pair_amount = st.number_input('Amount', min_value=0.0, value=100.0, step=10.0, format='%.2f', key='pair_amount')
+        with c2:
+            frm = st.selectbox('From', codes, index=codes.index('EUR') if 'EUR' in codes else 0, key='pair_from')
+        with c3:
+            to = st.selectbox('To', codes, index=codes.index('USD') if 'USD' in codes else 0, key='pair_to')
+        rate = cross.rate(frm, to)
+        if pd.isna(rate):
+            st.warning(f'No rate available for {frm}/{to}.')
+            return
+        to_symbol = CURRENCY_INFO.get(to, {}).get('symbol', '')
+        st.markdown(f"<div class='big-amount'>{to_symbol}{cross.convert(pair_amount, frm, to):,.2f} {to}</div>"
+                    f"<div class='muted small'>1 {frm} = {rate:.6f} {to} &nbsp;•&nbsp; 1 {to} = {1 / rate:.6f} {frm}</div>",
+                    unsafe_allow_html=True)
+
+
+def show_currency_converter(exchange_engine, version=None, store=None):
     st.title("💰 Currency Converter")
     st.markdown("""
     <div class='info-box'>
     <b>ℹ️ How it works:</b> Enter an amount in USD and instantly see its value in other currencies.
-    Use the star to favorite currencies and click "Show history" to view an inline chart.
+    Pick a currency below the cards to favorite it or show an inline history chart.
     </div>
     """, unsafe_allow_html=True)
 
     try:
-        df, table_name = get_exchange_data(exchange_engine)
+        with profiler.section('latest rates'):
+            latest_df = load_latest(exchange_engine, version, store)
     except Exception as e:
         st.error(f"Database connection error: {e}")
         st.info("Make sure your DAG has run successfully and created the necessary tables.")
         return
 
-    if df is None or df.empty:
+    if latest_df.empty:
         st.warning("⚠️ No exchange rate data found. Please run your DAG first.")
         return
 
-    # Detect columns
-    currency_col = None
-    rate_col = None
-    date_col = None
-    for col in df.columns:
-        col_lower = col.lower()
-        if 'currency' in col_lower or 'code' in col_lower:
-            currency_col = col
-        if 'rate' in col_lower or 'price' in col_lower or 'value' in col_lower:
-            rate_col = col
-        if 'date' in col_lower or 'time' in col_lower:
-            date_col = col
-    if not currency_col or not rate_col:
-        st.error("❌ Could not detect currency and rate columns in the database.")
-        return
-
-    latest_rates = df.groupby(currency_col)[rate_col].last().to_dict()
+    latest_rates = dict(zip(latest_df['target_currency'], latest_df['rate']))
     available_currencies = list(latest_rates.keys())
-    if not available_currencies:
-        st.warning("⚠️ No currencies available in the dataset.")
-        return
 
     # Load favorites from DB into session_state once
     if 'favorites' not in st.session_state:
@@ -208,88 +299,47 @@ def show_currency_converter(exchange_engine):
         st.markdown(f"### 🔄 Amount: **${amount:,.2f}**")
     with col2:
         st.markdown("### 🌍 Currencies")
-        st.write("Click the ⭐ to favorite a currency. Favorites show at top.")
+        st.write("Favorite a currency with the picker below the cards. Favorites show at top.")
+
+    with profiler.section('pair converter'):
+        show_pair_converter(latest_df)
 
     # Order favorites first
     fav_list = [c for c, v in st.session_state['favorites'].items() if v]
     ordered = fav_list + [c for c in visible if c not in fav_list]
 
-    # Display cards and interactive buttons
-    for idx, currency in enumerate(ordered):
-        rate = latest_rates.get(currency, 0)
-        converted_amount = amount * rate
-        info = CURRENCY_INFO.get(currency, {'name': currency, 'flag_emoji': '🏳️', 'symbol': '', 'country': 'Unknown', 'cc': None})
-        flag_img = flag_svg_url(info.get('cc'))
-
-        st.markdown(f"""
-        <div class='currency-card'>
-            <div style='display:flex; align-items:center; gap:12px;'>
-                {f"<img src='{flag_img}' class='currency-flag' alt='{currency} flag' width='36'/>" if flag_img else info.get('flag_emoji')}
-                <div>
-                    <div class='currency-title'>{currency} &nbsp;<span class='small muted'>{info['name']}</span></div>
-                    <div class='currency-sub'>{info['country']}</div>
-                </div>
-            </div>
-            <div style='margin-top:12px; display:flex; justify-content:space-between; align-items:center;'>
-                <div>
-                    <div class='big-amount'>{info['symbol']}{converted_amount:,.2f}</div>
-                    <div class='muted small'>Rate: {rate:.4f} &nbsp;•&nbsp; 1 USD = {info['symbol']}{rate:.2f}</div>
-                </div>
-                <div>
-                </div>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
-
-        # Buttons below each card (favorites and show history)
-        cols = st.columns([0.1, 0.5, 0.4])
-        with cols[0]:
-            fav_key = f"fav_{currency}"
-            current = st.session_state['favorites'].get(currency, False)
-            if st.button('⭐' if current else '☆', key=f'btn_fav_{currency}'):
-                # Toggle in DB and session
-                new_val = not current
-                st.session_state['favorites'][currency] = new_val
-                try:
-                    set_favorite_db(_fav_conn, currency, fav=new_val)
-                except Exception:
-                    pass
-                st.experimental_rerun()
-        with cols[1]:
-            if date_col:
-                if st.button('Show history', key=f'btn_hist_{currency}'):
-                    st.session_state['show_history'] = currency
-                    st.experimental_rerun()
-            else:
-                st.write('')
-        with cols[2]:
-            st.write('')
+    with profiler.section('card grid'):
+        show_currency_cards(ordered, latest_rates, amount)
 
     # Show inline history if requested
     if st.session_state.get('show_history'):
         show_currency = st.session_state.get('show_history')
         try:
-            if show_currency in available_currencies and date_col:
+            if show_currency in available_currencies:
                 st.markdown('---')
                 st.markdown(f"### 📈 Historical trend for {show_currency}")
-                df[date_col] = pd.to_datetime(df[date_col])
-                hist = df[df[currency_col] == show_currency].sort_values(date_col)
+                window = st.radio('Window', list(HISTORY_WINDOWS), index=1, horizontal=True, key='history_window')
+                style = st.radio('Chart', list(CHART_STYLES), index=0, horizontal=True, key='history_chart')
+                candles = CHART_STYLES[style]
+                with profiler.section('history data'):
+                    hist = load_history(exchange_engine, version, show_currency, HISTORY_WINDOWS[window], store, candles)
                 if hist.empty:
                     st.info('No historical data for the selected currency.')
                 else:
-                    fig = go.Figure(go.Scatter(x=hist[date_col], y=hist[rate_col], mode='lines+markers', name=show_currency))
-                    fig.update_layout(template='plotly_dark', height=300, margin=dict(l=20,r=20,t=40,b=20))
-                    st.plotly_chart(fig, use_container_width=True)
-                    if st.button('Close history'):
-                        st.session_state['show_history'] = None
-                        st.experimental_rerun()
+                    with profiler.section('history figure'):
+                        fig = history_figure(hist, show_currency, candles)
+                    with profiler.section('render chart'):
+                        st.plotly_chart(fig, use_container_width=True)
+                if st.button('Close history'):
+                    st.session_state['show_history'] = None
+                    st.experimental_rerun()
             else:
-                st.info('No historical data for selected currency or date column missing.')
+                st.info('No historical data for selected currency.')
         except Exception as e:
             st.error(f"Could not render history: {e}")
 
     st.markdown('---')
-    with st.expander('📊 Download visible currencies as CSV'):
+    with st.expander('📊 Download visible currencies as CSV'), profiler.section('CSV export'):
         export = []
         for c in ordered:
             rate = latest_rates.get(c, 0)
@@ -300,7 +350,7 @@ def show_currency_converter(exchange_engine):
         st.download_button('📥 Download CSV', df_export.to_csv(index=False), file_name=f"currencies_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
 
 
-def show_rate_comparison(exchange_engine, flag_format='svg'):
+def show_rate_comparison(exchange_engine, version=None, flag_format='svg', store=None):
     """Show currency rate comparison with robust error handling and improved defaults"""
     st.title("📈 Exchange Rate Comparison")
     st.markdown("""
@@ -311,39 +361,22 @@ def show_rate_comparison(exchange_engine, flag_format='svg'):
     """, unsafe_allow_html=True)
 
     try:
-        df, table_name = get_exchange_data(exchange_engine)
+        with profiler.section('latest rates'):
+            latest_df = load_latest(exchange_engine, version, store)
     except Exception as e:
         st.error(f"Database connection error: {e}")
         st.info("Make sure your DAG has run successfully and created the necessary tables.")
         return
 
-    if df is None or df.empty:
-        st.warning("⚠️ No exchange rate data found. Please run your DAG first.")
-        return
-
-    # Detect columns
-    currency_col = None
-    rate_col = None
-    date_col = None
-    for col in df.columns:
-        col_lower = col.lower()
-        if 'currency' in col_lower or 'code' in col_lower:
-            currency_col = col
-        if 'rate' in col_lower or 'price' in col_lower or 'value' in col_lower:
-            rate_col = col
-        if 'date' in col_lower or 'time' in col_lower:
-            date_col = col
-    if not currency_col or not rate_col:
-        st.error("❌ Could not detect currency and rate columns.")
-        return
-
-    latest_df = df.groupby(currency_col)[rate_col].last().reset_index()
     if latest_df.empty:
-        st.warning("⚠️ No latest rate data available.")
+        st.warning("⚠️ No exchange rate data found. Please run your DAG first.")
         return
 
-    latest_df = latest_df.sort_values(rate_col, ascending=False)
-    available_currencies = latest_df[currency_col].tolist()
+    currency_col = 'target_currency'
+    rate_col = 'rate'
+    with profiler.section('sort'):
+        latest_df = latest_df.sort_values(rate_col, ascending=False)
+        available_currencies = latest_df[currency_col].tolist()
     if not available_currencies:
         st.warning("⚠️ No currencies found in data.")
         return
@@ -363,22 +396,24 @@ def show_rate_comparison(exchange_engine, flag_format='svg'):
 
     # Build chart safely
     try:
-        fig = go.Figure()
-        rates = filtered_df[rate_col].astype(float).tolist()
-        max_rate = max(rates)
-        min_rate = min(rates)
-        for idx, row in filtered_df.iterrows():
-            c = row[currency_col]
-            r = float(row[rate_col])
-            info = CURRENCY_INFO.get(c, {'flag_emoji': '🏳️'})
-            color = '#ef4444' if r == max_rate else ('#10b981' if r == min_rate else '#60a5fa')
-            fig.add_trace(go.Bar(x=[c], y=[r], name=c, hovertemplate=f"{info.get('flag_emoji')} {c}<br>Rate: {r:.4f}<extra></extra>", marker_color=color))
-        fig.update_layout(template='plotly_dark', title='Exchange Rates per 1 USD', yaxis_title='Rate', height=480)
-        st.plotly_chart(fig, use_container_width=True)
+        with profiler.section('comparison figure'):
+            fig = go.Figure()
+            rates = filtered_df[rate_col].astype(float).tolist()
+            max_rate = max(rates)
+            min_rate = min(rates)
+            for idx, row in filtered_df.iterrows():
+                c = row[currency_col]
+                r = float(row[rate_col])
+                info = CURRENCY_INFO.get(c, {'flag_emoji': '🏳️'})
+                color = '#ef4444' if r == max_rate else ('#10b981' if r == min_rate else '#60a5fa')
+                fig.add_trace(go.Bar(x=[c], y=[r], name=c, hovertemplate=f"{info.get('flag_emoji')} {c}<br>Rate: {r:.4f}<extra></extra>", marker_color=color))
+            fig.update_layout(template='plotly_dark', title='Exchange Rates per 1 USD', yaxis_title='Rate', height=480)
+        with profiler.section('render chart'):
+            st.plotly_chart(fig, use_container_width=True)
     except Exception as e:
         st.error(f'Could not render comparison chart: {e}')
 
-    with st.expander('📋 Comparison Table'):
+    with st.expander('📋 Comparison Table'), profiler.section('comparison table'):
         comp = []
         for _,row in filtered_df.iterrows():
             c = row[currency_col]
@@ -388,7 +423,7 @@ def show_rate_comparison(exchange_engine, flag_format='svg'):
         st.dataframe(pd.DataFrame(comp), use_container_width=True)
 
 
-def show_dag_logs(airflow_engine):
+def show_dag_logs(airflow_engine, version=None):
     st.title('📋 DAG Run Logs')
     st.markdown("""
     <div class='info-box'>
@@ -396,36 +431,137 @@ def show_dag_logs(airflow_engine):
     </div>
     """, unsafe_allow_html=True)
     try:
-        with airflow_engine.connect() as conn:
-            df = pd.read_sql(text('''
-                SELECT 
-                    dag_id,
-                    execution_date,
-                    state,
-                    run_type,
-                    start_date,
-                    end_date,
-                    EXTRACT(EPOCH FROM (end_date - start_date)) as duration_seconds
-                FROM dag_run
-                ORDER BY execution_date DESC
-                LIMIT 100
-            '''), conn)
-            if df.empty:
-                st.info('📭 No DAG runs found. Trigger your DAG from Airflow UI at http://localhost:8080')
-                return
-            success_count = len(df[df['state']=='success'])
-            failed_count = len(df[df['state']=='failed'])
-            running_count = len(df[df['state']=='running'])
-            col1, col2, col3, col4 = st.columns(4)
-            col1.metric('Total Runs', len(df))
-            col2.metric('✅ Successful', success_count)
-            col3.metric('❌ Failed', failed_count)
-            col4.metric('⏳ Running', running_count)
-            st.markdown('---')
+        with profiler.section('dag_run query'):
+            df = data_cache.recent_dag_runs(airflow_engine, version, limit=100)
+        if df.empty:
+            st.info('📭 No DAG runs found. Trigger your DAG from Airflow UI at http://localhost:8080')
+            return
+        success_count = len(df[df['state']=='success'])
+        failed_count = len(df[df['state']=='failed'])
+        running_count = len(df[df['state']=='running'])
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric('Total Runs', len(df))
+        col2.metric('✅ Successful', success_count)
+        col3.metric('❌ Failed', failed_count)
+        col4.metric('⏳ Running', running_count)
+        st.markdown('---')
+        with profiler.section('render table'):
             st.dataframe(df.head(20), use_container_width=True)
     except Exception as e:
         st.error(f'Error loading DAG logs: {str(e)}')
 
+def show_analytics(exchange_engine, version=None, store=None):
+    st.title('📊 Analytics')
+    st.markdown("""
+    <div class='info-box'>
+    <b>ℹ️ What is shown:</b> Hourly log returns, annualized rolling volatility, moving averages and
+    return correlations per currency against USD, computed over the selected window.
+    </div>
+    """, unsafe_allow_html=True)
+
+    c1, c2 = st.columns(2)
+    with c1:
+        window = st.radio('Window', list(ANALYTICS_WINDOWS), index=1, horizontal=True, key='analytics_window')
+    with c2:
+        vol_label = st.radio('Volatility window', list(VOLATILITY_WINDOWS), index=1, horizontal=True, key='analytics_vol')
+    vol_window = VOLATILITY_WINDOWS[vol_label]
+
+    try:
+        with st.spinner('Computing analytics...'):
+            result = data_cache.analytics_for(exchange_engine, version, ANALYTICS_WINDOWS[window], vol_window, store)
+    except Exception as e:
+        st.error(f"Database connection error: {e}")
+        return
+    summary = result['summary']
+    if summary.empty:
+        st.warning("⚠️ No exchange rate history in the selected window.")
+        return
+
+    by_volatility = summary.sort_values('volatility_pct', ascending=False)['target_currency'].tolist()
+    selected = st.multiselect('Currencies', summary['target_currency'].tolist(), default=by_volatility[:5], key='analytics_currencies')
+
+    st.dataframe(summary.round(4), use_container_width=True, hide_index=True)
+    if not selected:
+        st.info('Select currencies to chart.')
+        return
+
+    vol = result['volatility']
+    fig = go.Figure()
+    for c in selected:
+        series = vol[c].dropna().rename('rate').rename_axis('fetched_at').reset_index()
+        series = downsample.downsample(series, CHART_POINTS)
+        fig.add_trace(go.Scatter(x=series['fetched_at'], y=series['rate'] * 100, mode='lines', name=c))
+    fig.update_layout(template='plotly_dark', title=f'Annualized volatility (%), {vol_label} window', height=360)
+    st.plotly_chart(fig, use_container_width=True)
+
+    focus = st.selectbox('Moving averages for', selected, key='analytics_focus')
+    fig = go.Figure()
+    lines = [(focus, result['prices'])] + [(f'MA {w}h', ma) for w, ma in result['moving_averages'].items()]
+    for name, frame in lines:
+        series = frame[focus].dropna().rename('rate').rename_axis('fetched_at').reset_index()
+        series = downsample.downsample(series, CHART_POINTS)
+        fig.add_trace(go.Scatter(x=series['fetched_at'], y=series['rate'], mode='lines', name=name))
+    fig.update_layout(template='plotly_dark', title=f'{focus} per 1 USD', height=360)
+    st.plotly_chart(fig, use_container_width=True)
+
+    if len(selected) >= 2:
+        corr = result['correlation'].loc[selected, selected]
+        fig = go.Figure(go.Heatmap(z=corr.to_numpy(), x=selected, y=selected, zmin=-1, zmax=1, colorscale='RdBu'))
+        fig.update_layout(template='plotly_dark', title='Correlation of hourly log returns', height=420)
+        st.plotly_chart(fig, use_container_width=True)
+
+def show_pipeline_metrics(exchange_engine, version=None):
+    st.title('⏱️ Pipeline Metrics')
+    st.markdown("""
+    <div class='info-box'>
+    <b>ℹ️ What is shown:</b> Per-stage ETL measurements (fetch, transform, load and each DAG task) recorded
+    in <code>pipeline_metrics</code>, as p50 / p90 / p99 over time so regressions stand out.
+    </div>
+    """, unsafe_allow_html=True)
+
+    c1, c2 = st.columns(2)
+    with c1:
+        window = st.radio('Window', list(METRICS_WINDOWS), index=0, horizontal=True, key='metrics_window')
+    with c2:
+        label = st.selectbox('Metric', list(METRICS_LABELS), index=0, key='metrics_metric')
+    span, bucket = METRICS_WINDOWS[window]
+    try:
+        trend, recent = data_cache.pipeline_metrics(exchange_engine, version, METRICS_LABELS[label], bucket, span)
+    except Exception as e:
+        st.error(f"Database connection error: {e}")
+        return
+    if trend is None or trend.empty:
+        st.info('📭 No pipeline metrics recorded yet. They are written by each DAG task run.')
+        return
+
+    stages = sorted(trend['stage'].unique())
+    default = [s for s in stages if not s.startswith('task:')] or stages
+    selected = st.multiselect('Stages', stages, default=default, key='metrics_stages')
+    if not selected:
+        st.info('Select stages to chart.')
+        return
+
+    fig = go.Figure()
+    for stage in selected:
+        rows = trend[trend['stage'] == stage]
+        for pct, dash in (('p50', 'solid'), ('p90', 'dash'), ('p99', 'dot')):
+            fig.add_trace(go.Scatter(x=rows['period'], y=rows[pct], mode='lines+markers',
+                                     name=f'{stage} {pct}', line={'dash': dash}))
+    fig.update_layout(template='plotly_dark', title=f'{label} per {bucket}', height=420)
+    st.plotly_chart(fig, use_container_width=True)
+
+    # latest bucket vs. the rest of the window, per stage
+    summary = []
+    for stage, rows in trend[trend['stage'].isin(selected)].groupby('stage'):
+        baseline = rows['p50'].iloc[:-1].median() if len(rows) > 1 else float('nan')
+        latest = rows['p50'].iloc[-1]
+        summary.append({'Stage': stage, 'Samples': int(rows['samples'].sum()), 'Latest p50': latest,
+                        'Window median p50': baseline,
+                        'Change %': (latest / baseline - 1.0) * 100.0 if baseline else float('nan')})
+    st.dataframe(pd.DataFrame(summary).round(4), use_container_width=True, hide_index=True)
+    st.markdown('#### Recent stage runs')
+    st.dataframe(recent[recent['stage'].isin(selected)].head(50), use_container_width=True, hide_index=True)
+
 # ---------------------- App Entry ----------------------
 
 def main():
@@ -445,33 +581,63 @@ def main():
             st.rerun()
         st.markdown('---')
         st.markdown('### 📊 Navigation')
-        page = st.radio('Select Page', ['💰 Currency Converter','📈 Rate Comparison','📋 DAG Logs'], index=0)
+        page = st.radio('Select Page', ['💰 Currency Converter','📈 Rate Comparison','📊 Analytics','⏱️ Pipeline Metrics','📋 DAG Logs'], index=0)
         st.markdown('---')
+        profiling = profiler.ENABLED
+        if st.session_state.get('username') in profiler.ADMIN_USERS:
+            profiling = st.checkbox('⏱️ Profile this page', value=profiler.ENABLED, key='profiler_on')
+            st.markdown('---')
         st.write('Tip: Use ⭐ to favorite currencies. Favorites persist across restarts.')
 
+    if profiling:
+        profiler.start()
     try:
-        exchange_engine = create_engine(EXCHANGE_DB_URL) if EXCHANGE_DB_URL else None
-        airflow_engine = create_engine(AIRFLOW_DB_URL) if AIRFLOW_DB_URL else None
-
-        if page == '💰 Currency Converter':
-            if exchange_engine:
-                show_currency_converter(exchange_engine)
-            else:
-                st.error('Exchange DB URL not configured. Set EXCHANGE_DB_URL environment variable.')
-        elif page == '📈 Rate Comparison':
-            if exchange_engine:
-                show_rate_comparison(exchange_engine)
-            else:
-                st.error('Exchange DB URL not configured. Set EXCHANGE_DB_URL environment variable.')
-        elif page == '📋 DAG Logs':
-            if airflow_engine:
-                show_dag_logs(airflow_engine)
-            else:
-                st.error('Airflow DB URL not configured. Set AIRFLOW_DB_URL environment variable.')
+        exchange_engine = data_cache.get_engine(EXCHANGE_DB_URL) if EXCHANGE_DB_URL else None
+        airflow_engine = data_cache.get_engine(AIRFLOW_DB_URL) if AIRFLOW_DB_URL else None
+        with profiler.section('data version'):
+            version = data_cache.data_version(exchange_engine, airflow_engine) if exchange_engine else None
+        store = None
+        if exchange_engine:
+            try:
+                store = data_cache.get_history_store(EXCHANGE_DB_URL)
+            except Exception:
+                # Table missing or DB down: pages fall back to direct queries and report the error
+                store = None
+
+        with profiler.section(page):
+            if page == '💰 Currency Converter':
+                if exchange_engine:
+                    show_currency_converter(exchange_engine, version, store=store)
+                else:
+                    st.error('Exchange DB URL not configured. Set EXCHANGE_DB_URL environment variable.')
+            elif page == '📈 Rate Comparison':
+                if exchange_engine:
+                    show_rate_comparison(exchange_engine, version, store=store)
+                else:
+                    st.error('Exchange DB URL not configured. Set EXCHANGE_DB_URL environment variable.')
+            elif page == '📊 Analytics':
+                if exchange_engine:
+                    show_analytics(exchange_engine, version, store=store)
+                else:
+                    st.error('Exchange DB URL not configured. Set EXCHANGE_DB_URL environment variable.')
+            elif page == '⏱️ Pipeline Metrics':
+                if exchange_engine:
+                    show_pipeline_metrics(exchange_engine, version)
+                else:
+                    st.error('Exchange DB URL not configured. Set EXCHANGE_DB_URL environment variable.')
+            elif page == '📋 DAG Logs':
+                if airflow_engine:
+                    show_dag_logs(airflow_engine, version)
+                else:
+                    st.error('Airflow DB URL not configured. Set AIRFLOW_DB_URL environment variable.')
 
     except Exception as e:
         st.error(f'❌ Unexpected error: {str(e)}')
         st.info('💡 Make sure your DAG has run successfully and created the necessary tables.')
 
+    profile = profiler.finish()
+    if profile is not None:
+        profiler.render_panel(profile)
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,55 @@
+"""
+HTML rendering of the converter's currency cards.
+
+All cards of a page are built into one HTML string and emitted with a
+single st.markdown call, so a rerun costs one element per page instead of
+a markdown block, a column layout and two buttons per currency.
+"""
+
+import math
+from html import escape
+
+DEFAULT_INFO = {'name': None, 'flag_emoji': '🏳️', 'symbol': '', 'country': 'Unknown', 'cc': None}
+
+
+def flag_svg_url(alpha2):
+    if not alpha2:
+        return None
+    return f"https://flagcdn.com/{alpha2.lower()}.svg"
+
+
+def paginate(items, page, page_size):
+    """(items on page, number of pages); page is 1-based and clamped to the valid range."""
+    n_pages = max(1, math.ceil(len(items) / page_size))
+    page = min(max(1, int(page)), n_pages)
+    start = (page - 1) * page_size
+    return items[start:start + page_size], n_pages
+
+
+def render_card(currency, rate, amount, info, favorite=False):
+    info = {**DEFAULT_INFO, 'name': currency, **(info or {})}
+    name, country, symbol = escape(info['name']), escape(info['country']), escape(info['symbol'])
+    flag_img = flag_svg_url(info.get('cc'))
+    flag = (f"<img src='{flag_img}' class='currency-flag' alt='{escape(currency)} flag' width='36'/>"
+            if flag_img else info.get('flag_emoji'))
+    star = "<span class='fav-star'>⭐</span>" if favorite else ""
+    return (
+        "<div class='currency-card'>"
+        "<div style='display:flex; align-items:center; gap:12px;'>"
+        f"{flag}<div><div class='currency-title'>{escape(currency)} {star}&nbsp;<span class='small muted'>{name}</span></div>"
+        f"<div class='currency-sub'>{country}</div></div></div>"
+        "<div style='margin-top:12px;'>"
+        f"<div class='big-amount'>{symbol}{amount * rate:,.2f}</div>"
+        f"<div class='muted small'>Rate: {rate:.4f} &nbsp;•&nbsp; 1 USD = {symbol}{rate:.2f}</div>"
+        "</div></div>"
+    )
+
+
+def render_cards(currencies, rates, amount, currency_info, favorites=None):
+    """One HTML grid with a card per currency, in the given order."""
+    favorites = favorites or {}
+    body = "".join(
+        render_card(c, rates.get(c, 0), amount, currency_info.get(c), favorites.get(c, False))
+        for c in currencies
+    )
+    return f"<div class='currency-grid'>{body}</div>"
@@ -0,0 +1,87 @@
+"""
+Cross rates between any two currencies from a USD-based snapshot.
+
+With rate_X = units of X per 1 USD, one unit of A buys rate_B / rate_A
+units of B. The full N x N matrix is one broadcast division; it is built
+once per snapshot (keyed by its newest fetched_at) and shared by every
+session, so any-pair conversion needs no extra fetches or queries.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+BASE_CURRENCY = "USD"
+# snapshots kept; a new fetch evicts the oldest
+CACHE_SIZE = 8
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class CrossRates:
+    def __init__(self, currencies, rates, fetched_at=None, base=BASE_CURRENCY):
+        currencies = list(currencies)
+        rates = np.asarray(rates, dtype=np.float64)
+        if base not in currencies:
+            currencies.append(base)
+            rates = np.append(rates, 1.0)
+        # missing or non-positive rates cannot be crossed
+        rates = np.where(rates > 0, rates, np.nan)
+
+        self.currencies = tuple(currencies)
+        self.index = {c: i for i, c in enumerate(currencies)}
+        self.rates = rates
+        self.fetched_at = fetched_at
+        self.base = base
+        self._matrix = None
+
+    @property
+    def matrix(self):
+        """matrix[i, j] = units of currencies[j] per 1 unit of currencies[i]."""
+        if self._matrix is None:
+            self._matrix = self.rates[np.newaxis, :] / self.rates[:, np.newaxis]
+        return self._matrix
+
+    def _idx(self, codes):
+        if isinstance(codes, str):
+            return self.index[codes]
+        return np.fromiter((self.index[c] for c in codes), dtype=np.intp)
+
+    def rate(self, from_currency, to_currency):
+        """Units of to_currency per 1 from_currency (NaN if either rate is missing)."""
+        return float(self.matrix[self.index[from_currency], self.index[to_currency]])
+
+    def convert(self, amount, from_currency, to_currency):
+        """
+        Convert amounts. Each argument may be a scalar/code or an array/list of equal
+        length, e.g. an amount vector from one currency to another, or element-wise pairs.
+        """
+        from_idx, to_idx = self._idx(from_currency), self._idx(to_currency)
+        result = np.asarray(amount, dtype=np.float64) * self.matrix[from_idx, to_idx]
+        return float(result) if np.ndim(result) == 0 else result
+
+    def convert_to_all(self, amount, from_currency):
+        """amount of from_currency expressed in every currency, ordered as self.currencies."""
+        return amount * self.matrix[self.index[from_currency]]
+
+
+def from_latest(latest_df, base=BASE_CURRENCY):
+    """
+    CrossRates for a latest-rates frame (target_currency, rate, fetched_at),
+    cached per snapshot so every rerun and session reuses the same matrix.
+    """
+    fetched_at = latest_df["fetched_at"].max() if "fetched_at" in latest_df and len(latest_df) else None
+    key = (base, fetched_at, len(latest_df))
+    with _cache_lock:
+        cross = _cache.get(key)
+        if cross is not None:
+            _cache.move_to_end(key)
+            return cross
+    cross = CrossRates(latest_df["target_currency"].tolist(), latest_df["rate"].to_numpy(), fetched_at, base)
+    with _cache_lock:
+        _cache[key] = cross
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return cross
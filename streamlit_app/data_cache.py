@@ -0,0 +1,219 @@
+"""
+Process-wide caches shared by every Streamlit session.
+
+Engines are created once per DB URL (st.cache_resource). Query results are
+cached (st.cache_data, bounded by max_entries) under the current data
+version, which is itself re-probed at most once per DASHBOARD_CACHE_TTL
+seconds. Results are therefore only invalidated when a new successful
+dag_run or a newer fetched_at appears, and concurrent users share one
+query per refresh interval instead of one per click.
+"""
+
+import functools
+import os
+import time
+
+import pandas as pd
+import streamlit as st
+from sqlalchemy import create_engine, event
+
+import analytics
+import queries
+from ETL import prometheus  # shared with the loader; stdlib only
+from history_store import HistoryStore
+
+CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", "60"))
+CACHE_MAX_ENTRIES = int(os.getenv("DASHBOARD_CACHE_MAX_ENTRIES", "256"))
+# analytics results are large dense arrays; keep a few and share them without copying
+ANALYTICS_MAX_ENTRIES = int(os.getenv("DASHBOARD_ANALYTICS_MAX_ENTRIES", "4"))
+
+# Prometheus-style metrics, recorded and served only when DASHBOARD_METRICS_PORT is set
+prometheus.configure(os.getenv("DASHBOARD_METRICS_PORT"), os.getenv("DASHBOARD_METRICS_HOST"))
+CACHE_REQUESTS = prometheus.Counter("dashboard_cache_requests_total", "Calls of a cached data function", ["cache"])
+CACHE_MISSES = prometheus.Counter("dashboard_cache_misses_total", "Cached data function calls that ran the query", ["cache"])
+CACHE_HIT_RATIO = prometheus.Gauge("dashboard_cache_hit_ratio", "1 - misses / requests per cache", ["cache"])
+POOL_CHECKOUTS = prometheus.Counter("dashboard_db_pool_checkouts_total", "Connections checked out of an engine pool")
+LATEST_AGE = prometheus.Gauge("dashboard_latest_fetched_at_age_seconds", "Age of the newest fetched_at in latest_rates")
+
+
+def _hit_ratio(cache):
+    requests = CACHE_REQUESTS.value(cache=cache)
+    return 1.0 - CACHE_MISSES.value(cache=cache) / requests if requests else None
+
+
+def _requested(cache):
+    """Count calls of a public wrapper; the cached function it calls counts the misses."""
+    CACHE_HIT_RATIO.set_function(functools.partial(_hit_ratio, cache), cache=cache)
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            CACHE_REQUESTS.inc(cache=cache)
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _missed(cache):
+    """Count executions of a cached function body, i.e. cache misses."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            CACHE_MISSES.inc(cache=cache)
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@st.cache_resource(show_spinner=False)
+def get_engine(db_url):
+    """One pooled engine per DB URL for the whole Streamlit process."""
+    engine = create_engine(db_url, pool_pre_ping=True, pool_size=5, max_overflow=5)
+    if prometheus.enabled():
+        event.listen(engine, "checkout", lambda *args: POOL_CHECKOUTS.inc())
+        prometheus.serve()
+    return engine
+
+
+@st.cache_resource(show_spinner=False)
+def get_history_store(db_url, base=queries.BASE_CURRENCY):
+    """One incrementally synced HistoryStore per DB URL, refreshed in the background."""
+    return HistoryStore(get_engine(db_url), base=base).start()
+
+
+def _key(engine):
+    return None if engine is None else engine.url.render_as_string(hide_password=True)
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _data_version(_exchange_engine, _airflow_engine, exchange_key, airflow_key):
+    try:
+        return queries.data_version(_exchange_engine, _airflow_engine)
+    except Exception:
+        # Let the page queries surface the connection error; retry next interval
+        return (None, None)
+
+
+def data_version(exchange_engine, airflow_engine=None):
+    """Current data version; re-probed at most once per CACHE_TTL seconds."""
+    version = _data_version(exchange_engine, airflow_engine, _key(exchange_engine), _key(airflow_engine))
+    if prometheus.enabled() and version[0] is not None:
+        newest = pd.Timestamp(version[0]).timestamp()
+        LATEST_AGE.set_function(lambda: time.time() - newest)
+    return version
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+@_missed("latest_rates")
+def _latest_rates(_engine, key, version, base):
+    return queries.latest_rates(_engine, base)
+
+
+@_requested("latest_rates")
+def latest_rates(engine, version, base=queries.BASE_CURRENCY):
+    return _latest_rates(engine, _key(engine), version, base)
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+@_missed("currency_history")
+def _currency_history(_engine, key, version, currency, window, base):
+    start = pd.Timestamp.now(tz="UTC") - window if window is not None else None
+    return queries.currency_history(_engine, currency, start=start, base=base)
+
+
+@_requested("currency_history")
+def currency_history(engine, version, currency, window=None, base=queries.BASE_CURRENCY):
+    """History of one currency over the trailing window (a Timedelta, None = all)."""
+    return _currency_history(engine, _key(engine), version, currency, window, base)
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+@_missed("history_start")
+def _history_start(_engine, key, version, currency, base):
+    return queries.history_start(_engine, currency, base)
+
+
+@_requested("history_start")
+def history_start(engine, version, currency, base=queries.BASE_CURRENCY):
+    return _history_start(engine, _key(engine), version, currency, base)
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+@_missed("currency_history_binned")
+def _currency_history_binned(_engine, key, version, currency, window, bucket, base):
+    start = pd.Timestamp.now(tz="UTC") - window if window is not None else None
+    return queries.currency_history_binned(_engine, currency, bucket, start=start, base=base)
+
+
+@_requested("currency_history_binned")
+def currency_history_binned(engine, version, currency, bucket, window=None, base=queries.BASE_CURRENCY):
+    """date_bin aggregated history (OHLC + mean per bucket) over the trailing window."""
+    return _currency_history_binned(engine, _key(engine), version, currency, window, bucket, base)
+
+
+@st.cache_resource(max_entries=ANALYTICS_MAX_ENTRIES, show_spinner=False)
+@_missed("analytics")
+def _analytics(_engine, _store, key, version, store_version, window, vol_window, base):
+    start = pd.Timestamp.now(tz="UTC") - window if window is not None else None
+    if _store is not None:
+        history = _store.snapshot()
+        history = history[history["fetched_at"] >= start]
+    else:
+        history = queries.history_all(_engine, start=start, base=base)
+    return analytics.compute(history, vol_window=vol_window)
+
+
+@_requested("analytics")
+def analytics_for(engine, version, window, vol_window, store=None, base=queries.BASE_CURRENCY):
+    """
+    analytics.compute() over the trailing window, cached per data version (and store
+    version when served from the in-memory history). Treat the result as read-only.
+    """
+    if store is not None and (window is None or not store.covers(pd.Timestamp.now(tz="UTC") - window)):
+        store = None
+    store_version = store.version if store is not None else None
+    return _analytics(engine, store, _key(engine), version, store_version, window, vol_window, base)
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+@_missed("rollup_history")
+def _rollup_history(_engine, key, version, currency, period, window, base):
+    if not queries.table_exists(_engine, queries.ROLLUP_TABLES[period]):
+        return None
+    start = pd.Timestamp.now(tz="UTC") - window if window is not None else None
+    return queries.rollup_history(_engine, currency, period, start=start, base=base)
+
+
+@_requested("rollup_history")
+def rollup_history(engine, version, currency, period, window=None, base=queries.BASE_CURRENCY):
+    """Daily/weekly rollup rows over the trailing window; None if the rollup table does not exist yet."""
+    return _rollup_history(engine, _key(engine), version, currency, period, window, base)
+
+
+# also expires on TTL so running/failed runs show up between successful ones
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+@_missed("recent_dag_runs")
+def _recent_dag_runs(_engine, key, version, limit):
+    return queries.recent_dag_runs(_engine, limit)
+
+
+@_requested("recent_dag_runs")
+def recent_dag_runs(engine, version, limit=100):
+    return _recent_dag_runs(engine, _key(engine), version, limit)
+
+
+# metrics land once per task, not only with new rates; the TTL picks them up between versions
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+@_missed("pipeline_metrics")
+def _pipeline_metrics(_engine, key, version, metric, bucket, window, limit):
+    if not queries.table_exists(_engine, "pipeline_metrics"):
+        return None, None
+    start = pd.Timestamp.now(tz="UTC") - window if window is not None else None
+    return (queries.pipeline_metrics_trend(_engine, metric, bucket, start=start),
+            queries.recent_pipeline_metrics(_engine, limit))
+
+
+@_requested("pipeline_metrics")
+def pipeline_metrics(engine, version, metric, bucket, window=None, limit=200):
+    """(percentile trend, recent stage rows) from pipeline_metrics; (None, None) if the table does not exist yet."""
+    return _pipeline_metrics(engine, _key(engine), version, metric, bucket, window, limit)
@@ -0,0 +1,124 @@
+"""
+Downsampling of rate series for charting.
+
+A chart cannot show more points than it has pixels, so sending every raw
+row only inflates the browser payload. The helpers here reduce a series to
+roughly one point per pixel of chart width:
+
+- lttb:   Largest-Triangle-Three-Buckets, keeps the visual shape of smooth series
+- minmax: first/min/max/last per bucket, guarantees spikes and extrema survive
+- ohlc:   open/high/low/close candles per day or week
+
+choose_strategy() picks one from the point count and chart width; long
+ranges that are not held in memory are aggregated in SQL instead
+(queries.currency_history_binned, using bucket_interval()).
+"""
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_WIDTH = 800
+# above this many points per pixel LTTB starts smoothing away short spikes
+MINMAX_RATIO = 4
+
+OHLC_FREQS = {"daily": "D", "weekly": "W-MON"}
+
+# candidate SQL bucket sizes, smallest first
+_NICE_INTERVALS = [pd.Timedelta(minutes=m) for m in (1, 5, 15, 30)] + \
+                  [pd.Timedelta(hours=h) for h in (1, 2, 6, 12)] + \
+                  [pd.Timedelta(days=d) for d in (1, 7)]
+
+
+def _as_float(x):
+    if pd.api.types.is_datetime64_any_dtype(x):
+        # tz-aware or naive timestamps -> epoch nanoseconds
+        return pd.DatetimeIndex(x).as_unit("ns").asi8.astype(np.float64)
+    return np.asarray(x, dtype=np.float64)
+
+
+def lttb_indices(x, y, threshold):
+    """Indices (ascending) of the points LTTB keeps; at most threshold of them."""
+    n = len(y)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1])[:max(threshold, 0)]
+    x = _as_float(x)
+    y = np.asarray(y, dtype=np.float64)
+
+    # n-2 inner points split into threshold-2 buckets; first and last always kept
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # average of the next bucket (or the last point for the final bucket)
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nlo:nhi].mean()
+        avg_y = y[nlo:nhi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def minmax_indices(y, n_buckets):
+    """Indices (ascending) of first, min, max and last point of each bucket; at most 4 * n_buckets."""
+    n = len(y)
+    if n_buckets <= 0 or n <= 4 * n_buckets:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    # sort by (bucket, y): the first entry of each bucket is its argmin (argmax with -y)
+    bucket = np.repeat(np.arange(n_buckets), np.diff(edges))
+    order_min = np.lexsort((y, bucket))
+    order_max = np.lexsort((-y, bucket))
+    firsts = np.searchsorted(bucket[order_min], np.arange(n_buckets))
+    idx = np.concatenate([starts, edges[1:] - 1, order_min[firsts], order_max[firsts]])
+    return np.unique(idx)
+
+
+def choose_strategy(n_points, width=DEFAULT_WIDTH):
+    """'raw' if the series fits the chart, 'minmax' if it is much denser than the chart, else 'lttb'."""
+    if n_points <= width:
+        return "raw"
+    if n_points > MINMAX_RATIO * width:
+        return "minmax"
+    return "lttb"
+
+
+def downsample(df, width=DEFAULT_WIDTH, strategy=None, x="fetched_at", y="rate"):
+    """Reduce df (sorted by x) to roughly width points. Returns a frame with the same columns."""
+    strategy = strategy or choose_strategy(len(df), width)
+    if strategy == "raw" or len(df) <= width:
+        return df
+    if strategy == "lttb":
+        idx = lttb_indices(df[x], df[y].to_numpy(), width)
+    elif strategy == "minmax":
+        idx = minmax_indices(df[y].to_numpy(), max(1, width // 4))
+    else:
+        raise ValueError(f"Unknown downsampling strategy: {strategy}")
+    return df.iloc[idx].reset_index(drop=True)
+
+
+def ohlc(df, period="daily", x="fetched_at", y="rate"):
+    """Open/high/low/close per day or week. Columns: fetched_at (period start), open, high, low, close."""
+    freq = OHLC_FREQS[period]
+    if df.empty:
+        return pd.DataFrame(columns=[x, "open", "high", "low", "close"])
+    series = df.set_index(x)[y]
+    # weekly periods start on Monday, matching the SQL date_bin origin
+    label = "left" if period == "weekly" else None
+    candles = series.resample(freq, label=label, closed=label).ohlc().dropna()
+    return candles.reset_index()
+
+
+def bucket_interval(start, end, width=DEFAULT_WIDTH):
+    """Smallest 'nice' bucket so that [start, end) yields at most about width buckets."""
+    span = pd.Timestamp(end) - pd.Timestamp(start)
+    for interval in _NICE_INTERVALS:
+        if span / interval <= width:
+            return interval
+    return _NICE_INTERVALS[-1]
@@ -0,0 +1,125 @@
+"""
+In-memory columnar history of exchange_rates kept in sync incrementally.
+
+The store holds the last DASHBOARD_HISTORY_RETENTION_DAYS of rows for one
+base currency as a compact DataFrame (categorical currency, float64 rate,
+tz-aware fetched_at). A background thread pulls only rows whose id is above
+the store's high-water mark, so per-refresh DB traffic is proportional to
+new data. Readers get immutable snapshots and never block on a refresh.
+"""
+
+import logging
+import os
+import threading
+
+import pandas as pd
+
+import queries
+
+RETENTION_DAYS = int(os.getenv("DASHBOARD_HISTORY_RETENTION_DAYS", "90"))
+REFRESH_SECONDS = int(os.getenv("DASHBOARD_HISTORY_REFRESH_SECONDS", "60"))
+# ids are assigned at insert but become visible at commit, so concurrent loads can
+# commit slightly out of id order: re-read this many ids below the mark each sync
+ID_OVERLAP = int(os.getenv("DASHBOARD_HISTORY_ID_OVERLAP", "5000"))
+
+COLUMNS = ["id", "target_currency", "rate", "fetched_at"]
+
+
+def _empty_frame():
+    return pd.DataFrame({
+        "id": pd.Series(dtype="int64"),
+        "target_currency": pd.Series(dtype="category"),
+        "rate": pd.Series(dtype="float64"),
+        "fetched_at": pd.Series(dtype="datetime64[ns, UTC]"),
+    })
+
+
+class HistoryStore:
+    def __init__(self, engine, base=queries.BASE_CURRENCY, retention_days=RETENTION_DAYS,
+                 refresh_seconds=REFRESH_SECONDS):
+        self.engine = engine
+        self.base = base
+        self.retention = pd.Timedelta(days=retention_days)
+        self.refresh_seconds = refresh_seconds
+        self.version = 0
+        self.high_water_mark = 0
+        self._frame = _empty_frame()
+        self._latest = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---------------- sync ----------------
+
+    def refresh(self):
+        """Pull rows above the high-water mark, trim to retention. Returns the number of new rows."""
+        cutoff = pd.Timestamp.now(tz="UTC") - self.retention
+        after_id = max(0, self.high_water_mark - ID_OVERLAP) if self.version else 0
+        delta = queries.rows_since(self.engine, after_id, since=cutoff, base=self.base)
+
+        with self._lock:
+            frame = self._frame
+            if not delta.empty:
+                delta["fetched_at"] = pd.to_datetime(delta["fetched_at"], utc=True)
+                delta = delta[~delta["id"].isin(frame["id"])]
+            expired = frame["fetched_at"] < cutoff
+            if delta.empty and not expired.any() and self.version:
+                return 0
+            frame = pd.concat([frame[~expired], delta], ignore_index=True)
+            frame["target_currency"] = frame["target_currency"].astype("category")
+            self._frame = frame
+            self._latest = None
+            if not frame.empty:
+                self.high_water_mark = max(self.high_water_mark, int(frame["id"].max()))
+            self.version += 1
+        if len(delta):
+            logging.info("History store: +%d rows (%d held, hwm=%d)", len(delta), len(frame), self.high_water_mark)
+        return len(delta)
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_seconds):
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.warning("History store refresh failed: %s", e)
+
+    def start(self):
+        """Initial synchronous load, then keep refreshing on a daemon thread."""
+        self.refresh()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="history-store", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    # ---------------- reads ----------------
+
+    def snapshot(self):
+        """The current frame; treat as read-only."""
+        return self._frame
+
+    def covers(self, start):
+        """True if history from start onwards is fully held in memory."""
+        return start is not None and start >= pd.Timestamp.now(tz="UTC") - self.retention
+
+    def latest(self):
+        """Newest rate per currency. Columns: target_currency, rate, fetched_at (sorted by currency)."""
+        with self._lock:
+            if self._latest is None:
+                frame = self._frame
+                latest = (frame.sort_values("fetched_at", kind="stable")
+                          .drop_duplicates("target_currency", keep="last")
+                          .sort_values("target_currency"))
+                latest["target_currency"] = latest["target_currency"].astype(str)
+                self._latest = latest[["target_currency", "rate", "fetched_at"]].reset_index(drop=True)
+            return self._latest
+
+    def history(self, currency, start=None):
+        """Rate history of one currency from start onwards. Columns: fetched_at, rate."""
+        frame = self._frame
+        mask = frame["target_currency"] == currency
+        if start is not None:
+            mask &= frame["fetched_at"] >= start
+        return frame.loc[mask, ["fetched_at", "rate"]].sort_values("fetched_at").reset_index(drop=True)
@@ -0,0 +1,136 @@
+"""
+Opt-in per-rerun profiler for the dashboard.
+
+While a profile is active for the current script run, section() times
+nested blocks of a page (queries, pandas work, figure construction,
+rendering) and queries._read() reports every SQL statement it runs with
+its parameters, duration and row count. render_panel() draws the
+breakdown at the end of the rerun; any captured SELECT can be re-run
+under EXPLAIN ANALYZE from the panel.
+
+Profiles are kept per script-run thread, so concurrent sessions and the
+history store's background sync never mix into each other's numbers.
+Reads served from st.cache_data never reach _read() and do not appear.
+Enable for everyone with DASHBOARD_PROFILER=true, or per session from
+the sidebar toggle shown to DASHBOARD_ADMIN_USERS.
+"""
+
+import os
+import textwrap
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+from sqlalchemy import text
+
+ENABLED = os.getenv("DASHBOARD_PROFILER", "false").lower() in ("1", "true", "yes")
+ADMIN_USERS = {u.strip() for u in os.getenv("DASHBOARD_ADMIN_USERS", "").split(",") if u.strip()}
+
+_local = threading.local()
+
+
+def start():
+    """Begin profiling the current script run; returns the profile dict."""
+    _local.profile = {"started": time.perf_counter(), "sections": [], "queries": [], "depth": 0}
+    return _local.profile
+
+
+def active():
+    return getattr(_local, "profile", None)
+
+
+def finish():
+    """Stop profiling the current run and return its profile (None if none was active)."""
+    profile = active()
+    _local.profile = None
+    if profile is not None:
+        profile["total"] = time.perf_counter() - profile["started"]
+    return profile
+
+
+@contextmanager
+def section(name):
+    """Time the enclosed block as a (possibly nested) section of the current profile."""
+    profile = active()
+    if profile is None:
+        yield
+        return
+    entry = {"section": name, "depth": profile["depth"], "seconds": None}
+    profile["sections"].append(entry)
+    profile["depth"] += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        entry["seconds"] = time.perf_counter() - started
+        profile["depth"] -= 1
+
+
+def record_query(engine, name, sql, params, seconds, rows=None):
+    """Called by queries._read() for every statement; a no-op without an active profile."""
+    profile = active()
+    if profile is None:
+        return
+    profile["queries"].append({"name": name, "sql": textwrap.dedent(sql).strip(), "params": dict(params or {}),
+                               "seconds": seconds, "rows": rows, "engine": engine})
+
+
+def explain_analyze(engine, sql, params=None):
+    """
+    EXPLAIN (ANALYZE, BUFFERS) text of a read-only query. ANALYZE executes the
+    statement, so only SELECT/WITH is accepted and the transaction is rolled back.
+    """
+    if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+        raise ValueError("EXPLAIN ANALYZE is only run for SELECT statements")
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            plan = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), params or {}).scalars().all()
+        finally:
+            transaction.rollback()
+    return "\n".join(plan)
+
+
+def _run_explain(query):
+    try:
+        plan = explain_analyze(query["engine"], query["sql"], query["params"])
+    except Exception as e:
+        plan = f"EXPLAIN failed: {e}"
+    st.session_state['profiler_explain'] = (query["name"], plan)
+
+
+def sections_frame(profile):
+    """Sections as a DataFrame: indented name, milliseconds, share of the rerun."""
+    total = profile.get("total") or 0.0
+    rows = [{"Section": "\u2003" * s["depth"] + s["section"], "ms": (s["seconds"] or 0.0) * 1000,
+             "% of rerun": (s["seconds"] or 0.0) / total * 100 if total else 0.0} for s in profile["sections"]]
+    top = sum(s["seconds"] or 0.0 for s in profile["sections"] if s["depth"] == 0)
+    rows.append({"Section": "(outside sections)", "ms": max(total - top, 0.0) * 1000,
+                 "% of rerun": max(total - top, 0.0) / total * 100 if total else 0.0})
+    return pd.DataFrame(rows)
+
+
+def render_panel(profile):
+    """Per-rerun timing breakdown: sections, captured SQL, and EXPLAIN ANALYZE on demand."""
+    queries = profile["queries"]
+    sql_seconds = sum(q["seconds"] for q in queries)
+    with st.expander(f"⏱️ Profiler: rerun {profile['total'] * 1000:,.0f} ms, "
+                     f"{len(queries)} queries ({sql_seconds * 1000:,.0f} ms)", expanded=True):
+        st.dataframe(sections_frame(profile).round(1), use_container_width=True, hide_index=True)
+        if st.session_state.get('profiler_explain'):
+            # from the button in the previous rerun, whose queries may be cached by now
+            name, plan = st.session_state['profiler_explain']
+            st.markdown(f"**EXPLAIN ANALYZE: {name}**")
+            st.code(plan)
+        if not queries:
+            st.caption('No SQL ran in this rerun (results came from the caches or the history store).')
+            return
+        st.dataframe(pd.DataFrame([{"Query": q["name"], "ms": q["seconds"] * 1000, "Rows": q["rows"],
+                                    "SQL": " ".join(q["sql"].split())} for q in queries]).round(1),
+                     use_container_width=True, hide_index=True)
+        labels = [f"{i + 1}. {q['name']} ({q['seconds'] * 1000:,.1f} ms)" for i, q in enumerate(queries)]
+        choice = st.selectbox('Query', range(len(queries)), format_func=labels.__getitem__, key='profiler_query')
+        st.code(queries[choice]["sql"], language='sql')
+        st.button('Run EXPLAIN ANALYZE', on_click=_run_explain, args=(queries[choice],), key='profiler_explain_btn')
@@ -0,0 +1,265 @@
+"""
+Purpose-built queries for the dashboard.
+
+Each function pushes filtering, ordering and DISTINCT ON into Postgres and
+returns only the rows a page needs, so memory and latency stay flat as
+exchange_rates grows. All reads go through _read().
+"""
+
+import time
+
+import pandas as pd
+from sqlalchemy import text
+
+import profiler
+from ETL import prometheus
+
+BASE_CURRENCY = "USD"
+QUERY_SECONDS = prometheus.Histogram("dashboard_query_seconds", "Dashboard query latency", ["query"])
+
+
+def _read(engine, name, sql, params=None):
+    """Run one named dashboard query and return it as a DataFrame."""
+    started = time.perf_counter()
+    with QUERY_SECONDS.time(query=name), engine.connect() as conn:
+        df = pd.read_sql(text(sql), conn, params=params or {})
+    profiler.record_query(engine, name, sql, params, time.perf_counter() - started, len(df))
+    return df
+
+
+def table_exists(engine, table_name):
+    with engine.connect() as conn:
+        return bool(conn.execute(text("SELECT to_regclass(:t) IS NOT NULL"), {"t": table_name}).scalar())
+
+
+def latest_rates(engine, base=BASE_CURRENCY):
+    """
+    Newest rate per target currency for one base.
+    Columns: target_currency, rate, fetched_at (sorted by target_currency).
+    Reads the latest_rates summary table; falls back to DISTINCT ON over history.
+    """
+    if table_exists(engine, "latest_rates"):
+        sql = """
+            SELECT target_currency, rate::float8 AS rate, fetched_at
+            FROM latest_rates
+            WHERE base_currency = :base
+            ORDER BY target_currency
+        """
+    else:
+        sql = """
+            SELECT DISTINCT ON (target_currency) target_currency, rate::float8 AS rate, fetched_at
+            FROM exchange_rates
+            WHERE base_currency = :base
+            ORDER BY target_currency, fetched_at DESC
+        """
+    return _read(engine, "latest_rates", sql, {"base": base})
+
+
+def list_currencies(engine, base=BASE_CURRENCY):
+    """Sorted list of target currencies that have a rate for base."""
+    return latest_rates(engine, base)["target_currency"].tolist()
+
+
+def currency_history(engine, currency, start=None, end=None, base=BASE_CURRENCY):
+    """
+    Rate history of one currency in [start, end), oldest first.
+    Columns: fetched_at, rate. Served by the (base, target, fetched_at) unique index.
+    """
+    clauses = ["base_currency = :base", "target_currency = :currency"]
+    params = {"base": base, "currency": currency}
+    if start is not None:
+        clauses.append("fetched_at >= :start")
+        params["start"] = start
+    if end is not None:
+        clauses.append("fetched_at < :end")
+        params["end"] = end
+    sql = f"""
+        SELECT fetched_at, rate::float8 AS rate
+        FROM exchange_rates
+        WHERE {' AND '.join(clauses)}
+        ORDER BY fetched_at
+    """
+    return _read(engine, "currency_history", sql, params)
+
+
+def history_start(engine, currency, base=BASE_CURRENCY):
+    """Oldest fetched_at of one currency (None if it has no rows)."""
+    sql = """
+        SELECT min(fetched_at) AS first_fetched_at
+        FROM exchange_rates
+        WHERE base_currency = :base AND target_currency = :currency
+    """
+    value = _read(engine, "history_start", sql, {"base": base, "currency": currency})["first_fetched_at"].iloc[0]
+    return None if pd.isna(value) else pd.Timestamp(value)
+
+
+def currency_history_binned(engine, currency, bucket, start=None, end=None, base=BASE_CURRENCY):
+    """
+    History of one currency aggregated in the database into fixed buckets (date_bin, PG14+).
+    bucket is a timedelta; weekly buckets start on Monday.
+    Columns: fetched_at (bucket start), open, high, low, close, rate (mean).
+    """
+    clauses = ["base_currency = :base", "target_currency = :currency"]
+    params = {"base": base, "currency": currency, "bucket": pd.Timedelta(bucket).to_pytimedelta()}
+    if start is not None:
+        clauses.append("fetched_at >= :start")
+        params["start"] = start
+    if end is not None:
+        clauses.append("fetched_at < :end")
+        params["end"] = end
+    sql = f"""
+        SELECT date_bin(:bucket, fetched_at, TIMESTAMPTZ '2000-01-03 00:00:00+00') AS fetched_at,
+               (array_agg(rate ORDER BY fetched_at))[1]::float8 AS open,
+               max(rate)::float8 AS high,
+               min(rate)::float8 AS low,
+               (array_agg(rate ORDER BY fetched_at DESC))[1]::float8 AS close,
+               avg(rate)::float8 AS rate
+        FROM exchange_rates
+        WHERE {' AND '.join(clauses)}
+        GROUP BY 1
+        ORDER BY 1
+    """
+    return _read(engine, "currency_history_binned", sql, params)
+
+
+ROLLUP_TABLES = {"daily": "exchange_rates_daily", "weekly": "exchange_rates_weekly"}
+
+
+def rollup_history(engine, currency, period, start=None, end=None, base=BASE_CURRENCY):
+    """
+    Daily or weekly OHLC rows of one currency from the rollup tables (see etl/rollups.py).
+    Columns match currency_history_binned: fetched_at (period start), open, high, low, close, rate (mean).
+    """
+    clauses = ["base_currency = :base", "target_currency = :currency"]
+    params = {"base": base, "currency": currency}
+    if start is not None:
+        # include the bucket containing start
+        clauses.append("period_start > :start - :width")
+        params["start"] = start
+        params["width"] = pd.Timedelta(days=7 if period == "weekly" else 1).to_pytimedelta()
+    if end is not None:
+        clauses.append("period_start < :end")
+        params["end"] = end
+    sql = f"""
+        SELECT period_start AS fetched_at, open::float8 AS open, high::float8 AS high,
+               low::float8 AS low, close::float8 AS close, mean::float8 AS rate
+        FROM {ROLLUP_TABLES[period]}
+        WHERE {' AND '.join(clauses)}
+        ORDER BY period_start
+    """
+    return _read(engine, "rollup_history", sql, params)
+
+
+def history_all(engine, start=None, end=None, base=BASE_CURRENCY):
+    """
+    History of every currency in [start, end), long format for analytics.
+    Columns: fetched_at, target_currency, rate.
+    """
+    clauses = ["base_currency = :base"]
+    params = {"base": base}
+    if start is not None:
+        clauses.append("fetched_at >= :start")
+        params["start"] = start
+    if end is not None:
+        clauses.append("fetched_at < :end")
+        params["end"] = end
+    sql = f"""
+        SELECT fetched_at, target_currency, rate::float8 AS rate
+        FROM exchange_rates
+        WHERE {' AND '.join(clauses)}
+    """
+    return _read(engine, "history_all", sql, params)
+
+
+def rows_since(engine, after_id, since=None, base=BASE_CURRENCY):
+    """
+    History rows with id > after_id (and fetched_at >= since), in id order.
+    Columns: id, target_currency, rate, fetched_at. Used for incremental sync.
+    """
+    clauses = ["base_currency = :base", "id > :after_id"]
+    params = {"base": base, "after_id": int(after_id)}
+    if since is not None:
+        clauses.append("fetched_at >= :since")
+        params["since"] = since
+    sql = f"""
+        SELECT id, target_currency, rate::float8 AS rate, fetched_at
+        FROM exchange_rates
+        WHERE {' AND '.join(clauses)}
+        ORDER BY id
+    """
+    return _read(engine, "rows_since", sql, params)
+
+
+def recent_dag_runs(engine, limit=100):
+    """Most recent dag_run rows with their duration in seconds."""
+    sql = """
+        SELECT
+            dag_id,
+            execution_date,
+            state,
+            run_type,
+            start_date,
+            end_date,
+            EXTRACT(EPOCH FROM (end_date - start_date)) as duration_seconds
+        FROM dag_run
+        ORDER BY execution_date DESC
+        LIMIT :limit
+    """
+    return _read(engine, "recent_dag_runs", sql, {"limit": limit})
+
+
+# pipeline_metrics columns (written by etl/metrics.py) that can be trended
+METRIC_COLUMNS = ("wall_seconds", "cpu_seconds", "peak_rss_kb", "bytes_in", "rows_out", "rows_dropped", "db_round_trips")
+
+
+def pipeline_metrics_trend(engine, metric, bucket, start=None):
+    """
+    Percentiles of one pipeline_metrics column per stage and time bucket ('hour', 'day', 'week').
+    Columns: stage, period, samples, p50, p90, p99 (oldest period first).
+    """
+    if metric not in METRIC_COLUMNS:
+        raise ValueError(f"Unknown metric {metric!r}; expected one of {METRIC_COLUMNS}")
+    params = {"bucket": bucket}
+    where = ""
+    if start is not None:
+        where = "WHERE started_at >= :start"
+        params["start"] = start
+    sql = f"""
+        SELECT stage, date_trunc(:bucket, started_at) AS period, count({metric}) AS samples,
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY {metric}) AS p50,
+               percentile_cont(0.9) WITHIN GROUP (ORDER BY {metric}) AS p90,
+               percentile_cont(0.99) WITHIN GROUP (ORDER BY {metric}) AS p99
+        FROM pipeline_metrics
+        {where}
+        GROUP BY 1, 2
+        ORDER BY 2, 1
+    """
+    return _read(engine, "pipeline_metrics_trend", sql, params)
+
+
+def recent_pipeline_metrics(engine, limit=200):
+    """Newest pipeline_metrics rows (one per stage execution)."""
+    sql = """
+        SELECT started_at, dag_id, run_id, task_id, stage, wall_seconds, cpu_seconds, peak_rss_kb,
+               bytes_in, rows_in, rows_out, rows_dropped, db_round_trips
+        FROM pipeline_metrics
+        ORDER BY started_at DESC
+        LIMIT :limit
+    """
+    return _read(engine, "recent_pipeline_metrics", sql, {"limit": limit})
+
+
+def data_version(exchange_engine, airflow_engine=None):
+    """
+    Cheap probe that changes only when new data lands: newest fetched_at in
+    latest_rates and, when the Airflow DB is reachable, the end of the last
+    successful dag_run. Returns a tuple of ISO strings (None where unknown).
+    """
+    latest = None
+    if table_exists(exchange_engine, "latest_rates"):
+        latest = _read(exchange_engine, "data_version", "SELECT max(fetched_at) AS v FROM latest_rates")["v"].iloc[0]
+    last_run = None
+    if airflow_engine is not None and table_exists(airflow_engine, "dag_run"):
+        last_run = _read(airflow_engine, "data_version",
+                         "SELECT max(end_date) AS v FROM dag_run WHERE state = 'success'")["v"].iloc[0]
+    return tuple(None if pd.isna(v) else pd.Timestamp(v).isoformat() for v in (latest, last_run))
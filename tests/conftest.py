@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+# Make the project root importable (ETL, benchmarks) when running plain `pytest`
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# The dashboard imports its modules flat (`import queries`), as in its container
+STREAMLIT_APP_DIR = os.path.join(PROJECT_ROOT, "streamlit_app")
+for path in (STREAMLIT_APP_DIR, PROJECT_ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Tests that need Postgres run against a scratch schema of this database; they skip when it is unset
+TEST_DB_URL = os.getenv("EXCHANGE_TEST_DB_URL", "")
+TEST_SCHEMA = "etl_tests"
+
+
+@pytest.fixture
+def pg_url():
+    """URL of an empty scratch schema (created and dropped around each test), as the ETL's default search_path."""
+    if not TEST_DB_URL:
+        pytest.skip("EXCHANGE_TEST_DB_URL is not set")
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.engine import make_url
+
+    from ETL import loader
+
+    admin = create_engine(TEST_DB_URL)
+    with admin.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {TEST_SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {TEST_SCHEMA}"))
+    url = make_url(TEST_DB_URL).update_query_dict({"options": f"-csearch_path={TEST_SCHEMA}"})
+    try:
+        yield url.render_as_string(hide_password=False)
+    finally:
+        loader.dispose_engines()
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {TEST_SCHEMA} CASCADE"))
+        admin.dispose()
@@ -0,0 +1,25 @@
+"""Parse-time cost of the DAG files: loading them must not import the ETL stack."""
+
+import os
+
+import pytest
+
+pytest.importorskip("airflow")
+
+from benchmarks.bench_dag_parse import DAG_FILES, DAGS_FOLDER, parse_in_subprocess
+
+
+@pytest.mark.parametrize("dag_file", DAG_FILES, ids=os.path.basename)
+def test_dag_parse_imports_no_heavy_modules(dag_file, tmp_path):
+    result = parse_in_subprocess(dag_file, airflow_home=str(tmp_path))
+    assert result["import_errors"] == {}
+    assert result["dag_ids"]
+    # anything Airflow had not imported already (SQLAlchemy is one of Airflow's own imports)
+    assert result["heavy_modules"] == []
+
+
+def test_dags_folder_has_no_import_errors(tmp_path):
+    # the etl package mentions "airflow" and "DAG", so only .airflowignore keeps the DagBag out of it
+    result = parse_in_subprocess(DAGS_FOLDER, airflow_home=str(tmp_path))
+    assert result["import_errors"] == {}
+    assert result["dag_ids"] == ["exchange_rates_backfill", "exchange_rates_pipeline_3task"]
@@ -0,0 +1,115 @@
+"""The hourly DAG end to end (dag.test) against the stub server and a scratch Postgres schema."""
+
+import os
+
+import pytest
+
+pytest.importorskip("airflow")
+
+from sqlalchemy import create_engine, text
+
+from benchmarks.bench_dag_parse import DAGS_FOLDER
+from benchmarks.stub_server import StubRatesServer
+
+
+@pytest.fixture
+def server():
+    with StubRatesServer(n_currencies=10) as srv:
+        yield srv
+
+
+@pytest.fixture
+def hourly_dag(pg_url, server, tmp_path, monkeypatch):
+    # Airflow puts the dags folder on sys.path; the tasks import etl from there
+    monkeypatch.syspath_prepend(DAGS_FOLDER)
+    import exchange_rates_DAG
+    from etl import fetch_data, loader, staging
+
+    monkeypatch.setattr(loader, "get_effective_db_url", lambda: pg_url)
+    monkeypatch.setattr(fetch_data, "API_URL_TEMPLATE", server.url_template)
+    monkeypatch.setattr(staging, "STAGING_DIR", str(tmp_path / "staging"))
+    monkeypatch.setattr(exchange_rates_DAG, "USE_HTTP_CACHE", False)
+    dag = exchange_rates_DAG.dag
+    # a failing task fails at once instead of waiting out retry_delay
+    for task in dag.tasks:
+        if hasattr(task, "partial_kwargs"):
+            task.partial_kwargs["retries"] = 0
+        else:
+            task.retries = 0
+    yield dag
+    loader.dispose_engines()
+
+
+def _states(dagrun):
+    states = {}
+    for ti in dagrun.get_task_instances():
+        states.setdefault(ti.task_id, []).append(ti.state)
+    return states
+
+
+def _loaded_bases(pg_url):
+    engine = create_engine(pg_url)
+    with engine.connect() as conn:
+        bases = []
+        # a run that never loaded has not created the table
+        if conn.execute(text("SELECT to_regclass('exchange_rates') IS NOT NULL")).scalar():
+            bases = conn.execute(text("SELECT DISTINCT base_currency FROM exchange_rates ORDER BY 1")).scalars().all()
+    engine.dispose()
+    return bases
+
+
+def test_sharded_run_loads_every_shard(hourly_dag, pg_url):
+    from etl import staging
+
+    dagrun = hourly_dag.test(run_conf={"bases": "USD,EUR,GBP", "shard_size": 1, "mode": "sharded"})
+    states = _states(dagrun)
+    # each shard's load finds its own staged file, whichever shard finishes first
+    assert states["shard.load_rates_task"] == ["success"] * 3
+    assert states["reduce_rates_task"] == ["success"]
+    assert dagrun.state == "success"
+    assert _loaded_bases(pg_url) == ["EUR", "GBP", "USD"]
+    assert not os.path.exists(staging.run_dir(hourly_dag.dag_id, dagrun.run_id))
+
+
+def test_failed_shard_fails_the_run(hourly_dag, pg_url, server):
+    server.failures = {"GBP": 100}
+    dagrun = hourly_dag.test(run_conf={"bases": "USD,EUR,GBP", "shard_size": 1, "mode": "sharded"})
+    states = _states(dagrun)
+    assert sorted(states["shard.load_rates_task"]) == ["success", "success", "upstream_failed"]
+    # the healthy shards are still loaded and summarized before the reduce fails the run
+    assert states["reduce_rates_task"] == ["failed"]
+    assert dagrun.state == "failed"
+    assert _loaded_bases(pg_url) == ["EUR", "USD"]
+
+
+def test_fused_run_loads_and_summarizes_every_base(hourly_dag, pg_url):
+    dagrun = hourly_dag.test(run_conf={"bases": "USD,EUR,GBP", "mode": "fused"})
+    states = _states(dagrun)
+    assert states["fused_etl_task"] == ["success"]
+    assert states["plan_shards_task"] == ["skipped"]
+    for task_id in ("shard.fetch_rates_task", "shard.transform_rates_task", "shard.load_rates_task"):
+        assert set(states[task_id]) == {"skipped"}
+    # all_done still runs the reduce, which skips itself in fused mode
+    assert states["reduce_rates_task"] == ["skipped"]
+    assert dagrun.state == "success"
+    assert _loaded_bases(pg_url) == ["EUR", "GBP", "USD"]
+
+    engine = create_engine(pg_url)
+    with engine.connect() as conn:
+        latest = conn.execute(text("SELECT count(DISTINCT base_currency), count(*) FROM latest_rates")).one()
+        raw = conn.execute(text("SELECT count(*) FROM exchange_rates")).scalar()
+        daily = conn.execute(text("SELECT sum(samples) FROM exchange_rates_daily")).scalar()
+        weekly = conn.execute(text("SELECT sum(samples) FROM exchange_rates_weekly")).scalar()
+    engine.dispose()
+    assert latest == (3, raw)
+    assert daily == weekly == raw
+
+
+def test_fused_run_fails_on_fetch_failure(hourly_dag, pg_url, server):
+    server.failures = {"GBP": 100}
+    dagrun = hourly_dag.test(run_conf={"bases": "USD,EUR,GBP", "mode": "fused"})
+    states = _states(dagrun)
+    assert states["fused_etl_task"] == ["failed"]
+    assert dagrun.state == "failed"
+    # fetch, transform and load are one task: nothing was loaded
+    assert _loaded_bases(pg_url) == []
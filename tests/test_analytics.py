@@ -0,0 +1,86 @@
+"""Tests for the dashboard's bulk history analytics, against hand-computed values."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics
+
+# log returns per hour after the first price of 1.0
+RETURNS = {
+    "AAA": [0.1, 0.2, -0.1],
+    "BBB": [0.2, 0.4, -0.2],   # 2 x AAA
+    "CCC": [-0.1, -0.2, 0.1],  # -AAA
+    "DDD": [0.1, 0.0, 0.2],
+}
+
+
+def _history(returns=RETURNS, start="2025-01-01"):
+    times = pd.date_range(start, periods=4, freq="h", tz="UTC")
+    rows = []
+    for currency, rets in returns.items():
+        prices = np.exp(np.concatenate([[0.0], np.cumsum(rets)]))
+        rows += [{"fetched_at": t, "target_currency": currency, "rate": p} for t, p in zip(times, prices)]
+    return pd.DataFrame(rows)
+
+
+def test_pivot_and_log_returns():
+    prices = analytics.pivot_dense(_history())
+    assert list(prices.columns) == ["AAA", "BBB", "CCC", "DDD"]
+    assert len(prices) == 4
+    returns = analytics.log_returns(prices)
+    assert returns.iloc[0].isna().all()
+    for currency, rets in RETURNS.items():
+        assert returns[currency].iloc[1:].to_numpy() == pytest.approx(rets)
+
+
+def test_pivot_keeps_latest_value_per_cell_and_fills_gaps():
+    history = pd.DataFrame({
+        "fetched_at": pd.to_datetime(["2025-01-01 00:10", "2025-01-01 00:50", "2025-01-01 03:00"], utc=True),
+        "target_currency": ["AAA"] * 3,
+        "rate": [1.0, 2.0, 4.0],
+    })
+    prices = analytics.pivot_dense(history)
+    # 00:50 wins its hour; hours 1-2 are forward-filled (within FILL_LIMIT)
+    assert prices["AAA"].tolist() == [2.0, 2.0, 2.0, 4.0]
+
+
+def test_rolling_volatility():
+    returns = analytics.log_returns(analytics.pivot_dense(_history()))
+    vol = analytics.rolling_volatility(returns, window=3, freq="h")
+    # AAA: mean 1/15, deviations (1/30, 4/30, -5/30) square-sum to 42/900, sample variance 21/900
+    expected = np.sqrt(21 / 900) * np.sqrt(24 * 365)
+    assert vol["AAA"].iloc[-1] == pytest.approx(expected)
+    assert vol["BBB"].iloc[-1] == pytest.approx(2 * expected)
+    # fewer than max(2, window // 2) observations
+    assert vol["AAA"].iloc[:2].isna().all()
+
+
+def test_correlation_matrix():
+    returns = analytics.log_returns(analytics.pivot_dense(_history()))
+    corr = analytics.correlation_matrix(returns)
+    assert np.diag(corr) == pytest.approx([1.0] * 4)
+    assert corr.loc["AAA", "BBB"] == pytest.approx(1.0)
+    assert corr.loc["AAA", "CCC"] == pytest.approx(-1.0)
+    # deviations: AAA (1/30, 4/30, -5/30), DDD (0, -0.1, 0.1): co-moment -0.03, square sums 42/900 and 0.02
+    assert corr.loc["AAA", "DDD"] == pytest.approx(-0.03 / np.sqrt(42 / 900 * 0.02))
+    assert corr.to_numpy() == pytest.approx(corr.to_numpy().T)
+    assert corr.to_numpy() == pytest.approx(returns.corr().to_numpy())
+
+
+def test_correlation_uses_common_observations_only():
+    returns = analytics.log_returns(analytics.pivot_dense(_history()))
+    returns.loc[returns.index[1], "DDD"] = np.nan
+    corr = analytics.correlation_matrix(returns)
+    # over the last two hours both series move in opposite directions
+    assert corr.loc["AAA", "DDD"] == pytest.approx(-1.0)
+    assert corr.loc["AAA", "DDD"] == pytest.approx(returns["AAA"].corr(returns["DDD"]))
+
+
+def test_compute_summary():
+    summary = analytics.compute(_history(), freq="h", vol_window=3, ma_windows=(2,))["summary"]
+    aaa = summary.set_index("target_currency").loc["AAA"]
+    assert aaa["last"] == pytest.approx(np.exp(0.2))
+    assert aaa["change_pct"] == pytest.approx((np.exp(0.2) - 1) * 100)
+    assert aaa["ma_2"] == pytest.approx((np.exp(0.3) + np.exp(0.2)) / 2)
+    assert aaa["observations"] == 4
@@ -0,0 +1,65 @@
+"""Tests for the backfill's range splitting and archive reader."""
+
+import json
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from ETL.backfill import read_archive, split_range
+
+
+@pytest.mark.parametrize("start,end,chunk_days,expected", [
+    ("2024-01-01", "2024-01-01", 7, [("2024-01-01", "2024-01-01")]),
+    ("2024-01-01", "2024-01-07", 7, [("2024-01-01", "2024-01-07")]),
+    ("2024-01-01", "2024-01-08", 7, [("2024-01-01", "2024-01-07"), ("2024-01-08", "2024-01-08")]),
+    ("2024-02-27", "2024-03-02", 2, [("2024-02-27", "2024-02-28"), ("2024-02-29", "2024-03-01"),
+                                     ("2024-03-02", "2024-03-02")]),
+    ("2024-01-03", "2024-01-05", 1, [("2024-01-03", "2024-01-03"), ("2024-01-04", "2024-01-04"),
+                                     ("2024-01-05", "2024-01-05")]),
+    ("2024-01-03", "2024-01-12", None, [("2024-01-03", "2024-01-09"), ("2024-01-10", "2024-01-12")]),
+    ("2024-01-02", "2024-01-01", 7, []),
+])
+def test_split_range(start, end, chunk_days, expected, monkeypatch):
+    monkeypatch.setattr("ETL.backfill.CHUNK_DAYS", 7)  # used when chunk_days is None
+    chunks = split_range(start, end, chunk_days)
+    assert chunks == [(date.fromisoformat(a), date.fromisoformat(b)) for a, b in expected]
+
+
+def test_split_range_covers_every_day_once():
+    chunks = split_range(date(2023, 12, 30), "2024-03-31T12:00:00", 10)
+    days = [a + timedelta(days=i) for a, b in chunks for i in range((b - a).days + 1)]
+    assert days == list(pd.date_range("2023-12-30", "2024-03-31").date)
+
+
+def test_read_archive_json(tmp_path):
+    records = [
+        {"base": "USD", "rates": {"EUR": 0.9, "GBP": 0.8}, "date": "2024-01-02"},
+        {"base": "USD", "rates": {"EUR": 0.91}, "time_last_updated": 1704240000},  # 2024-01-03 00:00 UTC
+    ]
+    (tmp_path / "rates.json").write_text(json.dumps(records))
+    df = read_archive(str(tmp_path / "rates.json"))
+    assert list(df.columns) == ["base_currency", "target_currency", "rate", "fetched_at", "source"]
+    assert df["target_currency"].tolist() == ["EUR", "GBP", "EUR"]
+    assert df["rate"].tolist() == [0.9, 0.8, 0.91]
+    assert df["fetched_at"].tolist() == [pd.Timestamp("2024-01-02", tz="UTC")] * 2 + [pd.Timestamp("2024-01-03", tz="UTC")]
+    assert (df["source"] == "archive:rates.json").all()
+
+
+def test_read_archive_csv_and_directory(tmp_path):
+    (tmp_path / "a.csv").write_text("target_currency,rate,fetched_at\nEUR,0.9,2024-01-02T10:00:00\nGBP,bad,2024-01-02T10:00:00\n")
+    (tmp_path / "b.json").write_text(json.dumps({"base": "EUR", "rates": {"USD": 1.1}, "fetched_at": "2024-01-03T00:00:00+01:00"}))
+    (tmp_path / "notes.txt").write_text("ignored")
+    df = read_archive(str(tmp_path))
+    assert df["base_currency"].tolist() == ["USD", "USD", "EUR"]
+    assert df["target_currency"].tolist() == ["EUR", "GBP", "USD"]
+    assert df["rate"].iloc[0] == 0.9
+    assert pd.isna(df["rate"].iloc[1])  # unparseable rates are left for the loader to drop
+    assert df["fetched_at"].tolist() == [pd.Timestamp("2024-01-02 10:00", tz="UTC")] * 2 + [pd.Timestamp("2024-01-02 23:00", tz="UTC")]
+    assert df["source"].tolist() == ["archive:a.csv", "archive:a.csv", "archive:b.json"]
+
+
+def test_read_archive_without_files_is_empty(tmp_path):
+    df = read_archive(str(tmp_path))
+    assert df.empty
+    assert list(df.columns) == ["base_currency", "target_currency", "rate", "fetched_at", "source"]
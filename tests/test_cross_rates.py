@@ -0,0 +1,47 @@
+"""Tests for the dashboard's cross-rate matrix."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import cross_rates
+
+
+@pytest.fixture
+def cross():
+    # units per 1 USD; USD itself is appended by CrossRates
+    return cross_rates.CrossRates(["EUR", "GBP", "JPY"], [0.9, 0.8, 150.0])
+
+
+def test_matrix_values_and_diagonal(cross):
+    assert cross.currencies == ("EUR", "GBP", "JPY", "USD")
+    assert np.diag(cross.matrix) == pytest.approx([1.0] * 4)
+    assert cross.rate("USD", "EUR") == pytest.approx(0.9)
+    assert cross.rate("EUR", "USD") == pytest.approx(1 / 0.9)
+    assert cross.rate("EUR", "GBP") == pytest.approx(0.8 / 0.9)
+    assert cross.rate("GBP", "JPY") == pytest.approx(150.0 / 0.8)
+    # reciprocal pairs multiply to 1
+    assert cross.matrix * cross.matrix.T == pytest.approx(np.ones((4, 4)))
+
+
+def test_missing_rates_cross_to_nan():
+    cross = cross_rates.CrossRates(["EUR", "XXX", "YYY"], [0.9, 0.0, np.nan])
+    assert np.isnan(cross.rate("EUR", "XXX"))
+    assert np.isnan(cross.rate("YYY", "USD"))
+    assert cross.rate("EUR", "USD") == pytest.approx(1 / 0.9)
+
+
+def test_convert_scalar_and_vectors(cross):
+    assert cross.convert(100, "EUR", "GBP") == pytest.approx(100 * 0.8 / 0.9)
+    assert cross.convert([1, 2], "USD", "JPY") == pytest.approx([150.0, 300.0])
+    assert cross.convert(10, ["EUR", "GBP"], ["USD", "EUR"]) == pytest.approx([10 / 0.9, 10 * 0.9 / 0.8])
+    assert cross.convert_to_all(2, "USD") == pytest.approx([1.8, 1.6, 300.0, 2.0])
+
+
+def test_from_latest_is_cached_per_snapshot():
+    latest = pd.DataFrame({"target_currency": ["EUR", "GBP"], "rate": [0.9, 0.8],
+                           "fetched_at": pd.Timestamp("2025-01-01", tz="UTC")})
+    first = cross_rates.from_latest(latest)
+    assert cross_rates.from_latest(latest.copy()) is first
+    newer = latest.assign(fetched_at=pd.Timestamp("2025-01-02", tz="UTC"))
+    assert cross_rates.from_latest(newer) is not first
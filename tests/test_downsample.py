@@ -0,0 +1,78 @@
+"""Tests for the dashboard's chart downsampling."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import downsample
+
+
+def _series(n, seed=0, freq="5min"):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "fetched_at": pd.date_range("2025-01-01", periods=n, freq=freq, tz="UTC"),
+        "rate": 1.0 + np.cumsum(rng.normal(scale=0.001, size=n)),
+    })
+
+
+@pytest.mark.parametrize("strategy", ["lttb", "minmax"])
+@pytest.mark.parametrize("n,width", [(10_000, 800), (50_000, 300), (801, 800)])
+def test_point_count_is_bounded(strategy, n, width):
+    out = downsample.downsample(_series(n), width=width, strategy=strategy)
+    assert len(out) <= width
+    assert out["fetched_at"].is_monotonic_increasing
+
+
+@pytest.mark.parametrize("strategy", ["lttb", "minmax"])
+def test_endpoints_and_extrema_are_preserved(strategy):
+    df = _series(20_000)
+    df.loc[4321, "rate"] = 5.0
+    df.loc[17_000, "rate"] = -5.0
+    out = downsample.downsample(df, width=500, strategy=strategy)
+    assert out["rate"].max() == 5.0
+    assert out["rate"].min() == -5.0
+    assert out["fetched_at"].iloc[0] == df["fetched_at"].iloc[0]
+    assert out["fetched_at"].iloc[-1] == df["fetched_at"].iloc[-1]
+
+
+def test_minmax_keeps_every_bucket_extreme():
+    df = _series(8_000)
+    idx = downsample.minmax_indices(df["rate"].to_numpy(), 100)
+    kept = df["rate"].to_numpy()[idx]
+    for bucket in np.array_split(df["rate"].to_numpy(), 100):
+        assert bucket.min() in kept and bucket.max() in kept
+
+
+def test_small_series_are_returned_unchanged():
+    df = _series(100)
+    assert downsample.choose_strategy(len(df), 800) == "raw"
+    assert downsample.downsample(df, width=800) is df
+
+
+def test_choose_strategy_by_density():
+    assert downsample.choose_strategy(1_000, 800) == "lttb"
+    assert downsample.choose_strategy(100_000, 800) == "minmax"
+
+
+@pytest.mark.parametrize("period", ["daily", "weekly"])
+def test_ohlc_candles(period):
+    df = _series(24 * 60, freq="h")
+    candles = downsample.ohlc(df, period)
+    assert list(candles.columns) == ["fetched_at", "open", "high", "low", "close"]
+    assert candles["high"].max() == df["rate"].max()
+    assert candles["low"].min() == df["rate"].min()
+    assert candles["open"].iloc[0] == df["rate"].iloc[0]
+    assert candles["close"].iloc[-1] == df["rate"].iloc[-1]
+    assert (candles["low"] <= candles[["open", "close"]].min(axis=1)).all()
+    assert (candles["high"] >= candles[["open", "close"]].max(axis=1)).all()
+    if period == "weekly":
+        assert (candles["fetched_at"].dt.dayofweek == 0).all()
+    else:
+        assert len(candles) == 60
+
+
+def test_bucket_interval_bounds_bucket_count():
+    start = pd.Timestamp("2024-01-01", tz="UTC")
+    for span in (pd.Timedelta(hours=6), pd.Timedelta(days=30), pd.Timedelta(days=365)):
+        bucket = downsample.bucket_interval(start, start + span, width=800)
+        assert span / bucket <= 800
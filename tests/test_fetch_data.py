@@ -0,0 +1,94 @@
+"""Tests for the multi-base fetcher against the local stub server."""
+
+import pytest
+import requests
+
+from ETL import http_cache
+from ETL.fetch_data import fetch_rates, fetch_rates_for_bases
+from benchmarks.stub_server import StubRatesServer, synthetic_rates
+
+
+@pytest.fixture
+def server():
+    with StubRatesServer(n_currencies=20) as srv:
+        yield srv
+
+
+def test_fetch_rates_single_base(server):
+    payload = fetch_rates(base="EUR", url=server.url_template.format(base="EUR"))
+    assert payload["base"] == "EUR"
+    assert payload["rates"] == synthetic_rates("EUR", 20)
+    assert payload["fetched_at"].tzinfo is not None
+    assert payload["source"].endswith("/EUR")
+
+
+def test_fetch_rates_for_bases_returns_payload_per_base(server):
+    bases = ["usd", "EUR", "GBP", "JPY", "EUR"]
+    payloads = fetch_rates_for_bases(bases, max_workers=3, url_template=server.url_template)
+    assert list(payloads) == ["USD", "EUR", "GBP", "JPY"]
+    for base, payload in payloads.items():
+        assert set(payload) == {"base", "rates", "fetched_at", "source"}
+        assert payload["base"] == base
+        assert payload["rates"] == synthetic_rates(base, 20)
+    assert sorted(server.requests) == ["EUR", "GBP", "JPY", "USD"]
+
+
+def test_transient_errors_are_retried(server):
+    server.failures = {"EUR": 2}
+    payloads = fetch_rates_for_bases(["EUR"], retries=2, backoff=0.01, url_template=server.url_template)
+    assert payloads["EUR"]["base"] == "EUR"
+    assert server.requests == ["EUR", "EUR", "EUR"]
+
+
+def test_exhausted_retries_raise_or_skip(server):
+    server.failures = {"GBP": 10}
+    with pytest.raises(requests.HTTPError):
+        fetch_rates_for_bases(["USD", "GBP"], retries=1, backoff=0.01, url_template=server.url_template)
+
+    server.failures = {"GBP": 10}
+    payloads = fetch_rates_for_bases(["USD", "GBP"], retries=1, backoff=0.01,
+                                     url_template=server.url_template, raise_on_error=False)
+    assert list(payloads) == ["USD"]
+
+
+def test_per_request_timeout(server):
+    server.latency = 0.5
+    with pytest.raises(requests.Timeout):
+        fetch_rates_for_bases(["USD"], timeout=0.05, retries=0, url_template=server.url_template)
+
+
+def test_conditional_fetch_skips_unchanged_snapshot(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, "HTTP_CACHE_DIR", str(tmp_path))
+    url = server.url_template.format(base="USD")
+
+    first = fetch_rates(url=url, use_cache=True)
+    assert first["not_modified"] is False and first["rates"]
+
+    second = fetch_rates(url=url, use_cache=True)
+    assert second["not_modified"] is True and second["rates"] == {}
+
+    server.version += 1
+    third = fetch_rates(url=url, use_cache=True)
+    assert third["not_modified"] is False
+    assert third["rates"] == synthetic_rates("USD", 20, seed=1)
+
+
+def test_unchanged_body_without_etag_is_detected_by_hash(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, "HTTP_CACHE_DIR", str(tmp_path))
+    server.etag = False
+    url = server.url_template.format(base="USD")
+
+    fetch_rates(url=url, use_cache=True)
+    assert fetch_rates(url=url, use_cache=True)["not_modified"] is True
+
+
+def test_deferred_commit_keeps_cache_untouched(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, "HTTP_CACHE_DIR", str(tmp_path))
+    url = server.url_template.format(base="USD")
+
+    payload = fetch_rates(url=url, use_cache=True, commit_cache=False)
+    assert http_cache.load_entry(url) is None
+    assert fetch_rates(url=url, use_cache=True, commit_cache=False)["not_modified"] is False
+
+    http_cache.save_entry(payload["cache_entry"])
+    assert fetch_rates(url=url, use_cache=True)["not_modified"] is True
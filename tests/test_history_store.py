@@ -0,0 +1,71 @@
+"""Tests for the dashboard's incrementally synced history store (need EXCHANGE_TEST_DB_URL)."""
+
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+import history_store
+from ETL import loader, partitions
+
+NOW = pd.Timestamp.now(tz="UTC").floor("min")
+
+
+@pytest.fixture
+def engine(pg_url):
+    engine = loader.get_engine(pg_url)
+    loader.ensure_table(engine)
+    with engine.begin() as conn:
+        partitions.ensure_partitions(conn, NOW - pd.Timedelta(days=60), NOW)
+    return engine
+
+
+def _insert(engine, rows):
+    """rows: (id, target_currency, rate, days ago)"""
+    with engine.begin() as conn:
+        conn.execute(text('''
+            INSERT INTO exchange_rates (id, base_currency, target_currency, rate, fetched_at, source)
+            VALUES (:id, 'USD', :target, :rate, :fetched_at, 'test')
+        '''), [{"id": i, "target": c, "rate": r, "fetched_at": (NOW - pd.Timedelta(days=d)).to_pydatetime()}
+               for i, c, r, d in rows])
+
+
+def _ids(store):
+    ids = store.snapshot()["id"].tolist()
+    assert len(ids) == len(set(ids)), "duplicate ids in the store"
+    return sorted(ids)
+
+
+def test_refresh_picks_up_out_of_order_rows_and_drops_expired(engine, monkeypatch):
+    monkeypatch.setattr(history_store, "ID_OVERLAP", 100)
+    store = history_store.HistoryStore(engine, retention_days=30)
+    _insert(engine, [(1, "EUR", 0.90, 20), (2, "GBP", 0.80, 20), (3, "EUR", 0.91, 1),
+                     (4, "EUR", 0.70, 45),  # older than retention
+                     (10, "GBP", 0.81, 1)])
+    assert store.refresh() == 4
+    assert _ids(store) == [1, 2, 3, 10]
+    assert store.high_water_mark == 10
+
+    # ids 5 and 6 committed after id 10 (below the high-water mark); 12 is already expired
+    _insert(engine, [(5, "EUR", 0.92, 0), (6, "GBP", 0.82, 0), (11, "JPY", 150.0, 0), (12, "JPY", 140.0, 40)])
+    assert store.refresh() == 3
+    assert _ids(store) == [1, 2, 3, 5, 6, 10, 11]
+    assert store.high_water_mark == 11
+
+    # nothing new: the overlap re-read adds no duplicates and keeps the same version
+    version = store.version
+    assert store.refresh() == 0
+    assert store.version == version
+    assert _ids(store) == [1, 2, 3, 5, 6, 10, 11]
+    assert store.latest().set_index("target_currency")["rate"].to_dict() == {"EUR": 0.92, "GBP": 0.82, "JPY": 150.0}
+
+
+def test_refresh_trims_rows_that_age_out(engine):
+    store = history_store.HistoryStore(engine, retention_days=30)
+    _insert(engine, [(1, "EUR", 0.90, 20), (2, "EUR", 0.91, 1)])
+    store.refresh()
+    assert _ids(store) == [1, 2]
+
+    store.retention = pd.Timedelta(days=10)
+    assert store.refresh() == 0
+    assert _ids(store) == [2]
+    assert store.history("EUR")["rate"].tolist() == [0.91]
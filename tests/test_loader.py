@@ -0,0 +1,95 @@
+"""Tests for the load modes and the idempotent upsert (need EXCHANGE_TEST_DB_URL)."""
+
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from ETL import loader
+
+
+def _frame(rate=1.1, n=5):
+    return pd.DataFrame({
+        "base_currency": ["USD"] * n,
+        "target_currency": [f"C{i:02d}" for i in range(n)],
+        "rate": [rate + i for i in range(n)],
+        "fetched_at": [pd.Timestamp("2025-01-01 10:00", tz="UTC")] * n,
+        "source": ["test"] * n,
+    })
+
+
+def _rows(pg_url):
+    with loader.get_engine(pg_url).connect() as conn:
+        return conn.execute(text(
+            "SELECT target_currency, rate::float FROM exchange_rates ORDER BY target_currency"
+        )).all()
+
+
+def test_second_upsert_writes_nothing(pg_url):
+    df = _frame()
+    assert loader.load_df_to_postgres(df, db_url=pg_url, load_mode="upsert") == 5
+    assert loader.load_df_to_postgres(df, db_url=pg_url, load_mode="upsert") == 0
+    assert len(_rows(pg_url)) == 5
+
+
+def test_upsert_keeps_or_updates_existing_rows(pg_url):
+    loader.load_df_to_postgres(_frame(rate=1.1), db_url=pg_url, load_mode="upsert")
+    # on_conflict "nothing" keeps the stored rates, "update" overwrites them
+    assert loader.load_df_to_postgres(_frame(rate=2.2), db_url=pg_url, load_mode="upsert", on_conflict="nothing") == 0
+    assert _rows(pg_url)[0][1] == pytest.approx(1.1)
+    assert loader.load_df_to_postgres(_frame(rate=2.2), db_url=pg_url, load_mode="upsert", on_conflict="update") == 5
+    assert _rows(pg_url)[0][1] == pytest.approx(2.2)
+
+
+def test_duplicates_within_a_batch_are_merged(pg_url):
+    df = pd.concat([_frame(), _frame()], ignore_index=True)
+    assert loader.load_df_to_postgres(df, db_url=pg_url, load_mode="upsert") == 5
+    with loader.get_engine(pg_url).connect() as conn:
+        latest = conn.execute(text("SELECT count(*) FROM latest_rates")).scalar()
+    assert latest == 5
+
+
+@pytest.mark.parametrize("load_mode", ["copy", "insert", "upsert"])
+def test_load_modes_store_identical_rows(pg_url, load_mode):
+    df = pd.DataFrame({
+        "base_currency": ["USD"] * 5,
+        "target_currency": ["EUR", "GBP", "JPY", "BTC", "XXX"],
+        "rate": [0.9, 0.8, 151.12345678, 0.00001234, float("nan")],
+        "fetched_at": [pd.Timestamp("2025-01-01 10:00:00.123456", tz="UTC")] * 5,
+        "source": ['a "quoted", comma, source', None, "line\nbreak", "plain", "dropped"],
+    })
+    # the NaN rate is dropped before writing
+    assert loader.load_df_to_postgres(df, db_url=pg_url, load_mode=load_mode) == 4
+    with loader.get_engine(pg_url).connect() as conn:
+        rows = conn.execute(text(
+            "SELECT base_currency, target_currency, rate::text, fetched_at, source FROM exchange_rates ORDER BY target_currency"
+        )).all()
+    fetched_at = pd.Timestamp("2025-01-01 10:00:00.123456", tz="UTC").to_pydatetime()
+    assert rows == [
+        ("USD", "BTC", "0.00001234", fetched_at, "plain"),
+        ("USD", "EUR", "0.90000000", fetched_at, 'a "quoted", comma, source'),
+        ("USD", "GBP", "0.80000000", fetched_at, None),
+        ("USD", "JPY", "151.12345678", fetched_at, "line\nbreak"),
+    ]
+
+
+def _latest(conn):
+    return conn.execute(text(
+        "SELECT target_currency, rate::float, fetched_at FROM latest_rates ORDER BY target_currency"
+    )).all()
+
+
+def test_latest_rates_keeps_newest_snapshot(pg_url):
+    newer_at = pd.Timestamp("2025-01-02 10:00", tz="UTC")
+    loader.load_df_to_postgres(_frame(rate=2.0).assign(fetched_at=newer_at), db_url=pg_url)
+    # e.g. a backfill loading history after the hourly run
+    older = _frame(rate=1.0).assign(fetched_at=pd.Timestamp("2025-01-01 10:00", tz="UTC"))
+    assert loader.load_df_to_postgres(older, db_url=pg_url) == 5
+    assert len(_rows(pg_url)) == 10
+
+    expected = [(f"C{i:02d}", 2.0 + i, newer_at.to_pydatetime()) for i in range(5)]
+    engine = loader.get_engine(pg_url)
+    with engine.begin() as conn:
+        assert _latest(conn) == expected
+        # a full refresh over all of history agrees
+        loader.refresh_latest_rates(conn)
+        assert _latest(conn) == expected
@@ -0,0 +1,142 @@
+"""Tests for the partitioned layout: legacy migration, partition creation and retention (need EXCHANGE_TEST_DB_URL)."""
+
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+from sqlalchemy import event, text
+
+from ETL import loader, partitions
+
+LEGACY_DDL = '''
+CREATE TABLE exchange_rates (
+    id SERIAL PRIMARY KEY,
+    base_currency VARCHAR(10) NOT NULL,
+    target_currency VARCHAR(10) NOT NULL,
+    rate NUMERIC(18,8) NOT NULL,
+    fetched_at TIMESTAMPTZ NOT NULL,
+    source VARCHAR(255)
+);
+CREATE INDEX idx_exchange_rates_fetched_at ON exchange_rates(fetched_at);
+CREATE INDEX idx_exchange_rates_target ON exchange_rates(target_currency);
+'''
+ARCHIVE_SCHEMA = "etl_tests_archive"
+
+
+def _month(year, month):
+    return datetime(year, month, 1, tzinfo=timezone.utc)
+
+
+def _partition_months(conn):
+    return sorted(partitions.list_partitions(conn).values())
+
+
+@pytest.fixture
+def engine(pg_url):
+    return loader.get_engine(pg_url)
+
+
+@pytest.fixture
+def partitioned(engine):
+    loader.ensure_table(engine)
+    return engine
+
+
+def test_legacy_table_is_migrated_once(engine, pg_url):
+    with engine.begin() as conn:
+        conn.execute(text(LEGACY_DDL))
+        conn.execute(text('''
+            INSERT INTO exchange_rates (base_currency, target_currency, rate, fetched_at, source) VALUES
+                ('USD', 'EUR', 0.90, '2024-11-05 10:00+00', 'a'),
+                ('USD', 'EUR', 0.99, '2024-11-05 10:00+00', 'duplicate'),
+                ('USD', 'GBP', 0.80, '2024-11-05 10:00+00', 'a'),
+                ('USD', 'EUR', 0.91, '2025-01-20 10:00+00', 'b'),
+                ('USD', 'GBP', 0.81, '2025-01-20 10:00+00', 'b'),
+                ('USD', 'GBP', 0.88, '2025-01-20 10:00+00', 'duplicate')
+        '''))
+
+    loader.ensure_table(engine)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass('exchange_rates')")).scalar() == "p"
+        assert conn.execute(text("SELECT to_regclass('exchange_rates_legacy')")).scalar() is None
+        rows = conn.execute(text("SELECT id, target_currency, rate::float, source FROM exchange_rates ORDER BY id")).all()
+        # the lowest id of each natural-key duplicate is kept, with its id
+        assert rows == [(1, "EUR", 0.90, "a"), (3, "GBP", 0.80, "a"), (4, "EUR", 0.91, "b"), (5, "GBP", 0.81, "b")]
+        months = _partition_months(conn)
+        assert months[0] == _month(2024, 11) and _month(2025, 1) in months
+        # latest_rates is seeded from the migrated history
+        assert conn.execute(text("SELECT count(*) FROM latest_rates")).scalar() == 2
+
+    # the id sequence continues after the legacy ids
+    new = pd.DataFrame({"base_currency": ["USD"], "target_currency": ["JPY"], "rate": [150.0],
+                        "fetched_at": [pd.Timestamp("2025-01-20 10:00", tz="UTC")], "source": ["c"]})
+    assert loader.load_df_to_postgres(new, db_url=pg_url, load_mode="upsert") == 1
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT id FROM exchange_rates WHERE target_currency = 'JPY'")).scalar() == 7
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    loader.ensure_table(engine)
+    # second run: only the idempotent DDL, no rename, copy or seeding
+    assert not [s for s in statements if "RENAME" in s or "INSERT" in s or "DROP" in s]
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM exchange_rates")).scalar() == 5
+
+
+def test_ensure_partitions_creates_range_plus_ahead(partitioned, monkeypatch):
+    monkeypatch.setattr(partitions, "PARTITIONS_AHEAD", 2)
+    start = datetime(2099, 1, 10, tzinfo=timezone.utc)
+    end = datetime(2099, 3, 5, tzinfo=timezone.utc)
+    with partitioned.begin() as conn:
+        created = partitions.ensure_partitions(conn, start, end)
+        assert created == [f"exchange_rates_p2099{m:02d}" for m in range(1, 6)]
+        assert _partition_months(conn) == [_month(2099, m) for m in range(1, 6)]
+        assert partitions.ensure_partitions(conn, start, end) == []
+        # a row routes into its month's partition
+        conn.execute(text("INSERT INTO exchange_rates (base_currency, target_currency, rate, fetched_at) "
+                          "VALUES ('USD', 'EUR', 0.9, '2099-02-28 23:59:59+00')"))
+        assert conn.execute(text("SELECT count(*) FROM exchange_rates_p209902")).scalar() == 1
+
+
+@pytest.fixture
+def months_2099(partitioned):
+    with partitioned.begin() as conn:
+        partitions.ensure_partitions(conn, datetime(2099, 1, 1, tzinfo=timezone.utc),
+                                     datetime(2099, 5, 1, tzinfo=timezone.utc), ahead=0)
+        conn.execute(text("INSERT INTO exchange_rates (base_currency, target_currency, rate, fetched_at) "
+                          "VALUES ('USD', 'EUR', 0.9, '2099-01-15+00'), ('USD', 'EUR', 0.8, '2099-05-15+00')"))
+    return partitioned
+
+
+def test_prune_keeps_everything_without_retention(months_2099, monkeypatch):
+    monkeypatch.setattr(partitions, "RETENTION_MONTHS", 0)
+    assert partitions.prune_partitions(months_2099, now=datetime(2099, 6, 15, tzinfo=timezone.utc)) == []
+    with months_2099.connect() as conn:
+        assert _partition_months(conn) == [_month(2099, m) for m in range(1, 6)]
+
+
+def test_prune_drops_old_partitions(months_2099, monkeypatch):
+    monkeypatch.setattr(partitions, "RETENTION_MONTHS", 2)
+    monkeypatch.setattr(partitions, "ARCHIVE_SCHEMA", "")
+    removed = partitions.prune_partitions(months_2099, now=datetime(2099, 6, 15, tzinfo=timezone.utc))
+    # cutoff 2099-04: January..March leave, April and May stay
+    assert removed == ["exchange_rates_p209901", "exchange_rates_p209902", "exchange_rates_p209903"]
+    with months_2099.connect() as conn:
+        assert _partition_months(conn) == [_month(2099, 4), _month(2099, 5)]
+        assert conn.execute(text("SELECT to_regclass('exchange_rates_p209901')")).scalar() is None
+        assert conn.execute(text("SELECT count(*) FROM exchange_rates")).scalar() == 1
+
+
+def test_prune_moves_old_partitions_to_archive_schema(months_2099, monkeypatch):
+    monkeypatch.setattr(partitions, "RETENTION_MONTHS", 2)
+    monkeypatch.setattr(partitions, "ARCHIVE_SCHEMA", ARCHIVE_SCHEMA)
+    try:
+        removed = partitions.prune_partitions(months_2099, now=datetime(2099, 6, 15, tzinfo=timezone.utc))
+        assert len(removed) == 3
+        with months_2099.connect() as conn:
+            assert _partition_months(conn) == [_month(2099, 4), _month(2099, 5)]
+            archived = conn.execute(text(f"SELECT rate::float FROM {ARCHIVE_SCHEMA}.exchange_rates_p209901")).scalars().all()
+            assert archived == [0.9]
+    finally:
+        with months_2099.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {ARCHIVE_SCHEMA} CASCADE"))
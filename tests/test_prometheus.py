@@ -0,0 +1,78 @@
+"""Tests for the metrics registry's text exposition output."""
+
+import pytest
+
+from ETL import prometheus
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """A disabled registry holding only the metrics a test declares."""
+    monkeypatch.setattr(prometheus, "_metrics", [])
+    monkeypatch.setattr(prometheus, "_enabled", False)
+    monkeypatch.setattr(prometheus, "_port", None)
+    monkeypatch.setattr(prometheus, "_host", "127.0.0.1")
+    return prometheus
+
+
+def _declare(registry):
+    rows = registry.Counter("test_rows_total", "Rows written", ["table"])
+    age = registry.Gauge("test_age_seconds", "Age of the newest row")
+    seconds = registry.Histogram("test_load_seconds", "Load duration", ["mode"], buckets=(1.0, 0.125))
+    return rows, age, seconds
+
+
+def _record(rows, age, seconds):
+    rows.inc(2, table="exchange_rates")
+    rows.inc(table="exchange_rates")
+    rows.inc(table='we"ird\\')
+    age.set_function(lambda: 42)
+    for value in (0.0625, 0.125, 0.5, 4.0):
+        seconds.observe(value, mode="upsert")
+
+
+def test_nothing_is_recorded_while_disabled(registry):
+    rows, age, seconds = _declare(registry)
+    _record(rows, age, seconds)
+    with seconds.time(mode="copy"):
+        pass
+    assert not registry.enabled()
+    assert rows.value(table="exchange_rates") == 0
+    assert registry.render() == (
+        "# HELP test_rows_total Rows written\n"
+        "# TYPE test_rows_total counter\n"
+        "# HELP test_age_seconds Age of the newest row\n"
+        "# TYPE test_age_seconds gauge\n"
+        "# HELP test_load_seconds Load duration\n"
+        "# TYPE test_load_seconds histogram\n"
+    )
+
+
+def test_render_text_exposition(registry):
+    rows, age, seconds = _declare(registry)
+    assert registry.configure(9999)
+    _record(rows, age, seconds)
+    assert rows.value(table="exchange_rates") == 3
+    assert registry.render() == (
+        "# HELP test_rows_total Rows written\n"
+        "# TYPE test_rows_total counter\n"
+        'test_rows_total{table="exchange_rates"} 3.0\n'
+        'test_rows_total{table="we\\"ird\\\\"} 1.0\n'
+        "# HELP test_age_seconds Age of the newest row\n"
+        "# TYPE test_age_seconds gauge\n"
+        "test_age_seconds 42.0\n"
+        "# HELP test_load_seconds Load duration\n"
+        "# TYPE test_load_seconds histogram\n"
+        # cumulative counts; a value equal to a bound falls in that bucket
+        'test_load_seconds_bucket{mode="upsert",le="0.125"} 2.0\n'
+        'test_load_seconds_bucket{mode="upsert",le="1.0"} 3.0\n'
+        'test_load_seconds_bucket{mode="upsert",le="+Inf"} 4.0\n'
+        'test_load_seconds_sum{mode="upsert"} 4.6875\n'
+        'test_load_seconds_count{mode="upsert"} 4.0\n'
+    )
+
+
+def test_configure_without_port_stays_disabled(registry):
+    assert not registry.configure(None)
+    assert not registry.configure("")
+    assert registry.serve() is None
@@ -0,0 +1,94 @@
+"""Tests for the daily/weekly OHLC rollups (need EXCHANGE_TEST_DB_URL)."""
+
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from ETL import loader, rollups
+
+# 2025-01-06 is a Monday: Saturday and Sunday fall in the week of 2024-12-30
+RATES = [
+    ("2025-01-04 12:00", 5.0),
+    ("2025-01-05 08:00", 1.0),
+    ("2025-01-05 12:00", 3.0),
+    ("2025-01-05 20:00", 2.0),
+    ("2025-01-06 00:00", 4.0),
+    ("2025-01-06 09:00", 0.5),
+]
+
+
+def _utc(day):
+    return datetime.fromisoformat(day).replace(tzinfo=timezone.utc)
+
+
+def _load(pg_url, rates):
+    df = pd.DataFrame({
+        "base_currency": "USD",
+        "target_currency": "EUR",
+        "rate": [r for _, r in rates],
+        "fetched_at": pd.to_datetime([t for t, _ in rates], utc=True),
+        "source": "test",
+    })
+    loader.load_df_to_postgres(df, db_url=pg_url, load_mode="upsert")
+
+
+def _rollup(engine, period):
+    table = rollups.ROLLUPS[period][0]
+    with engine.connect() as conn:
+        rows = conn.execute(text(f'''
+            SELECT period_start, open::float, high::float, low::float, close::float, mean::float, samples
+            FROM {table} ORDER BY period_start
+        ''')).all()
+    return [tuple(r) for r in rows]
+
+
+@pytest.fixture
+def engine(pg_url):
+    _load(pg_url, RATES)
+    engine = loader.get_engine(pg_url)
+    rollups.refresh_rollups(engine)  # creates and seeds both tables from history
+    return engine
+
+
+def test_period_start_uses_monday_origin():
+    week = rollups.ROLLUPS["weekly"][1]
+    assert rollups.period_start(_utc("2025-01-05 23:59"), week) == _utc("2024-12-30")
+    assert rollups.period_start(_utc("2025-01-06 00:00"), week) == _utc("2025-01-06")
+
+
+def test_daily_ohlc(engine):
+    assert _rollup(engine, "daily") == [
+        (_utc("2025-01-04"), 5.0, 5.0, 5.0, 5.0, 5.0, 1),
+        (_utc("2025-01-05"), 1.0, 3.0, 1.0, 2.0, 2.0, 3),
+        (_utc("2025-01-06"), 4.0, 4.0, 0.5, 0.5, 2.25, 2),
+    ]
+
+
+def test_weekly_ohlc_starts_on_monday(engine):
+    assert _rollup(engine, "weekly") == [
+        (_utc("2024-12-30"), 5.0, 5.0, 1.0, 2.0, 2.75, 4),
+        (_utc("2025-01-06"), 4.0, 4.0, 0.5, 0.5, 2.25, 2),
+    ]
+
+
+def test_overlapping_refresh_changes_nothing(engine):
+    before = {p: _rollup(engine, p) for p in rollups.ROLLUPS}
+    written = rollups.refresh_rollups(engine, _utc("2025-01-05 12:00"), _utc("2025-01-06 00:00"))
+    # the touched buckets are rewritten from all of their rows, to the same values
+    assert written == {"daily": 2, "weekly": 2}
+    assert {p: _rollup(engine, p) for p in rollups.ROLLUPS} == before
+
+
+def test_incremental_refresh_updates_only_touched_buckets(engine, pg_url):
+    _load(pg_url, [("2025-01-06 18:00", 6.0)])
+    written = rollups.refresh_rollups(engine, _utc("2025-01-06 18:00"), _utc("2025-01-06 18:00"))
+    assert written == {"daily": 1, "weekly": 1}
+    daily = _rollup(engine, "daily")
+    assert daily[:2] == [
+        (_utc("2025-01-04"), 5.0, 5.0, 5.0, 5.0, 5.0, 1),
+        (_utc("2025-01-05"), 1.0, 3.0, 1.0, 2.0, 2.0, 3),
+    ]
+    assert daily[2] == (_utc("2025-01-06"), 4.0, 6.0, 0.5, 6.0, pytest.approx(3.5), 3)
+    assert _rollup(engine, "weekly")[1] == (_utc("2025-01-06"), 4.0, 6.0, 0.5, 6.0, pytest.approx(3.5), 3)
@@ -0,0 +1,60 @@
+"""Tests for the Arrow IPC staging handed from transform to load."""
+
+import os
+
+import pandas as pd
+import pytest
+
+from ETL import staging
+
+
+@pytest.fixture(autouse=True)
+def staging_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(staging, "STAGING_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _frame(base="USD", n=3):
+    return pd.DataFrame({
+        "base_currency": [base] * n,
+        "target_currency": [f"C{i:02d}" for i in range(n)],
+        "rate": [1.0 + i / 10 for i in range(n)],
+        "fetched_at": pd.date_range("2025-01-01", periods=n, freq="h", tz="UTC"),
+        "source": ["test"] * n,
+    })
+
+
+def test_cleanup_stage_leaves_other_shards_files(staging_dir):
+    manifests = [staging.write_stage(_frame(base), "dag", "run", name=f"rates_{i}")
+                 for i, base in enumerate(["USD", "EUR", "GBP"])]
+    staging.cleanup_stage(manifests[0])
+    assert not os.path.exists(manifests[0]["path"])
+    for manifest in manifests[1:]:
+        assert len(staging.read_stage(manifest)) == 3
+
+    staging.cleanup_run("dag", "run")
+    assert not os.path.exists(staging.run_dir("dag", "run"))
+
+
+def test_write_read_round_trip(staging_dir):
+    df = _frame(n=50)
+    manifest = staging.write_stage(df, "dag", "scheduled__2025-01-01T00:00:00+00:00")
+    assert manifest["rows"] == 50
+    assert manifest["format"] == staging.STAGE_FORMAT
+    # run ids are made filesystem-safe, and the file lives under STAGING_DIR
+    assert manifest["path"].startswith(str(staging_dir))
+    assert ":" not in os.path.relpath(manifest["path"], staging_dir)
+    pd.testing.assert_frame_equal(staging.read_stage(manifest), df)
+
+
+def test_checksum_mismatch_raises(staging_dir):
+    manifest = staging.write_stage(_frame(), "dag", "run")
+    staging.write_stage(_frame(base="EUR"), "dag", "run")  # overwrites rates.arrow under the same name
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        staging.read_stage(manifest)
+
+
+def test_unknown_format_raises(staging_dir):
+    manifest = {**staging.write_stage(_frame(), "dag", "run"), "format": "parquet"}
+    with pytest.raises(ValueError, match="Unsupported stage format"):
+        staging.read_stage(manifest)
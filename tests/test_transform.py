@@ -0,0 +1,76 @@
+"""Tests for the column-wise payload to DataFrame transform."""
+
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+
+from ETL.transform import COLUMNS, transform_rates_to_df
+
+FETCHED_AT = datetime(2025, 1, 1, 10, 0, tzinfo=timezone.utc)
+
+
+def _payload(base="USD", rates=None, fetched_at=FETCHED_AT, **extra):
+    return {"base": base, "rates": {"EUR": 0.9, "GBP": 0.8} if rates is None else rates,
+            "fetched_at": fetched_at, "source": f"https://example.test/{base}", **extra}
+
+
+def test_single_payload():
+    df = transform_rates_to_df(_payload())
+    assert list(df.columns) == COLUMNS
+    assert df["base_currency"].tolist() == ["USD", "USD"]
+    assert df["target_currency"].tolist() == ["EUR", "GBP"]
+    assert df["rate"].tolist() == [0.9, 0.8]
+    assert df["fetched_at"].tolist() == [pd.Timestamp(FETCHED_AT)] * 2
+    assert df["source"].tolist() == ["https://example.test/USD"] * 2
+
+
+def test_dtypes():
+    df = transform_rates_to_df([_payload(), _payload("EUR", {"USD": 1.1})])
+    for column in ("base_currency", "target_currency", "source"):
+        assert isinstance(df[column].dtype, pd.CategoricalDtype)
+    assert df["rate"].dtype == "float64"
+    assert isinstance(df["fetched_at"].dtype, pd.DatetimeTZDtype)
+    assert str(df["fetched_at"].dt.tz) == "UTC"
+
+
+def test_list_of_payloads_keeps_order_and_per_payload_values():
+    later = FETCHED_AT + timedelta(hours=1)
+    df = transform_rates_to_df([
+        _payload("USD", {"EUR": 0.9, "GBP": 0.8}),
+        _payload("EUR", {"USD": 1.1}, fetched_at=later.astimezone(timezone(timedelta(hours=2)))),
+        _payload("USD", {"JPY": 150.0}, fetched_at=later.isoformat()),
+    ])
+    assert df["base_currency"].tolist() == ["USD", "USD", "EUR", "USD"]
+    assert df["target_currency"].tolist() == ["EUR", "GBP", "USD", "JPY"]
+    assert df["rate"].tolist() == [0.9, 0.8, 1.1, 150.0]
+    # offsets and ISO strings are normalized to UTC
+    assert df["fetched_at"].tolist() == [pd.Timestamp(FETCHED_AT)] * 2 + [pd.Timestamp(later)] * 2
+    assert df["source"].tolist()[2] == "https://example.test/EUR"
+
+
+def test_empty_rates_contribute_no_rows():
+    df = transform_rates_to_df([_payload("USD", {}), _payload("EUR", {"USD": 1.1}), _payload("GBP", {})])
+    assert df["base_currency"].tolist() == ["EUR"]
+    assert df["target_currency"].tolist() == ["USD"]
+
+    empty = transform_rates_to_df(_payload(rates={}))
+    assert empty.empty
+    assert list(empty.columns) == COLUMNS
+
+
+def test_empty_rates_key_is_treated_as_no_rates():
+    payload = _payload()
+    payload["rates"] = None
+    assert transform_rates_to_df(payload).empty
+
+
+@pytest.mark.parametrize("source", [None, "missing"])
+def test_missing_source_is_null(source):
+    payload = _payload()
+    if source == "missing":
+        del payload["source"]
+    else:
+        payload["source"] = source
+    df = transform_rates_to_df([payload, _payload("EUR", {"USD": 1.1})])
+    assert df["source"].isna().tolist() == [True, True, False]